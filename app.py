@@ -0,0 +1,30 @@
+# One Streamlit app serving the Future You, Current You and Individuals tools as pages: streamlit run app.py
+# The pages share one server process, so libraries are imported once and the computation cache, chart renderer
+# and scenario store are shared by every page and session. Pages also share each session's st.session_state,
+# which is how Future You hands its monthly expense limit (and income) to Current You.
+# Each tool still runs on its own as well, e.g. streamlit run future_you.py.
+import streamlit as st
+
+# Widget values kept when the user switches pages; Streamlit otherwise drops the state of widgets
+# that aren't on the page being shown
+SHARED_WIDGET_KEYS = ('monthly_income', 'post_tax_income', 'category_rules', 'scenario_name')
+# 'individuals_' is individuals_tool.WIDGET_PREFIX
+SHARED_WIDGET_PREFIXES = ('fixed_', 'variable_', 'alloc_', 'individuals_')
+
+PAGES = [
+    st.Page('future_you.py', title="Future You", url_path='future_you', default=True),
+    st.Page('current_you.py', title="Current You", url_path='current_you'),
+    st.Page('individuals_tool.py', title="Get Aligned as a Couple", url_path='individuals_tool'),
+]
+
+
+# Function to carry widget values over to the next page; setting a key through the Session State API
+# makes Streamlit keep it until a widget with that key is shown again
+def keep_widget_state():
+    for key in list(st.session_state):
+        if key in SHARED_WIDGET_KEYS or str(key).startswith(SHARED_WIDGET_PREFIXES):
+            st.session_state[key] = st.session_state[key]
+
+
+keep_widget_state()
+st.navigation(PAGES).run()
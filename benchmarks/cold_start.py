@@ -0,0 +1,75 @@
+# Cold-start benchmark for the three Streamlit apps.
+# Each measurement runs in a fresh interpreter: "import" times importing the app module, and
+# "first run" times a full first script run (a new session) with Streamlit's AppTest harness.
+#
+#   python benchmarks/cold_start.py --runs 5 --json cold_start.json
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APPS = ('current_you', 'future_you', 'individuals_tool')
+
+IMPORT_SNIPPET = """
+import json, time
+start = time.perf_counter()
+import {module}
+print(json.dumps({{'seconds': time.perf_counter() - start}}))
+"""
+
+FIRST_RUN_SNIPPET = """
+import json, time
+start = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+AppTest.from_file({path!r}, default_timeout=120).run()
+elapsed = time.perf_counter() - start
+import startup
+print(json.dumps({{'seconds': elapsed, 'startup': startup.startup_report()}}))
+"""
+
+
+# Function to run a snippet in a fresh interpreter and return its JSON result (the last stdout line)
+def run_fresh(snippet):
+    completed = subprocess.run(
+        [sys.executable, '-c', snippet], cwd=REPO_ROOT, capture_output=True, text=True, check=True
+    )
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+# Function to measure the median import and first-run times of each app over several fresh interpreters
+def measure(apps=APPS, runs=3):
+    results = {}
+    for app in apps:
+        imports = [run_fresh(IMPORT_SNIPPET.format(module=app))['seconds'] for _ in range(runs)]
+        first_runs = [run_fresh(FIRST_RUN_SNIPPET.format(path=os.path.join(REPO_ROOT, f"{app}.py"))) for _ in range(runs)]
+        results[app] = {
+            'import_ms': statistics.median(imports) * 1000,
+            'first_run_ms': statistics.median(run['seconds'] for run in first_runs) * 1000,
+            'startup': first_runs[-1]['startup'],
+        }
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure cold-start time of the Streamlit apps.")
+    parser.add_argument('--runs', type=int, default=3, help="Fresh interpreters per measurement")
+    parser.add_argument('--json', help="Also write the results to this JSON file")
+    parser.add_argument('apps', nargs='*', default=list(APPS), help="Apps to measure (default: all)")
+    args = parser.parse_args(argv)
+
+    results = measure(args.apps, args.runs)
+    for app, result in results.items():
+        print(f"{app:<20} import {result['import_ms']:8.1f} ms   first run {result['first_run_ms']:8.1f} ms")
+        for label, milliseconds in result['startup']:
+            print(f"    {label:<36} {milliseconds:8.1f} ms")
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as handle:
+            json.dump(results, handle, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
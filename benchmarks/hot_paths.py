@@ -0,0 +1,447 @@
+# Microbenchmarks for the finance hot paths, with stored baselines and a regression check.
+# Every case runs at several scales (number of accounts, debts, goals or chart categories); a case's time is
+# the best of --repeat samples, each long enough (at least 0.2 s or one call) to rise above timer noise.
+#
+#   python benchmarks/hot_paths.py --save-baseline        # record benchmarks/baselines.json
+#   python benchmarks/hot_paths.py                        # compare; exits 1 if anything is >30% slower
+#   python benchmarks/hot_paths.py --filter timeline --max-scale 10000 --threshold 0.5
+#
+# Baselines are only comparable on the machine (and library versions) that recorded them; the check
+# prints a warning when they differ. Re-record after an intentional change in performance.
+import argparse
+import json
+import os
+import platform
+import sys
+import timeit
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+import numpy as np
+
+BASELINE_PATH = os.path.join(REPO_ROOT, 'benchmarks', 'baselines.json')
+DEFAULT_THRESHOLD = 0.3
+# Differences smaller than this (seconds) are never reported as regressions, however large the ratio:
+# tiny cases vary by about this much between interpreter processes (memory layout), whatever the code does
+NOISE_FLOOR = 20e-6
+DEFAULT_REPEAT = 5
+
+SCALES = (1, 100, 10_000, 100_000)
+SCALAR_SCALES = (1, 100, 10_000)
+CHART_SCALES = (1, 10, 100)
+
+
+# Function to build n random goals in the shape future_you stores them
+def make_goals(n, current_year=2025, seed=0):
+    rng = np.random.default_rng(seed)
+    amounts = rng.uniform(1_000, 500_000, n).round()
+    savings = rng.uniform(0, 10_000, n).round(2)
+    rates = rng.uniform(0, 10, n).round(1)
+    years = rng.integers(current_year + 1, current_year + 41, n)
+    return [
+        {
+            'goal_name': f"Goal {i}",
+            'goal_amount': int(amounts[i]),
+            'current_savings': float(savings[i]),
+            'interest_rate': float(rates[i]),
+            'monthly_contribution': int(amounts[i] // 240),
+            'target_year': int(years[i]),
+            'goal_type': 'Target Year' if i % 2 else 'Monthly Contribution',
+        }
+        for i in range(n)
+    ]
+
+
+# Function to build n expense categories for the Current You charts
+def make_categories(n, seed=0):
+    rng = np.random.default_rng(seed)
+    return {f"Category {i}": float(value) for i, value in enumerate(rng.uniform(50, 2_000, n).round(2))}
+
+
+# Each case takes a scale n and returns the zero-argument callable to time
+def case_future_value_scalar(n):
+    from finance.cache import default_cache
+    from individuals_tool import calculate_future_value
+
+    principals = np.linspace(0, 100_000, n).tolist()
+
+    def run():
+        default_cache.clear()
+        for principal in principals:
+            calculate_future_value(principal, 6.0, 30, 500.0)
+    return run
+
+
+def case_future_value_batch(n):
+    from finance.projections import project_yearly
+
+    principals = np.linspace(0, 100_000, n)
+    rates = np.linspace(0, 12, n)
+    contributions = np.linspace(0, 2_000, n)
+    return lambda: project_yearly(principals, rates, contributions, 30)
+
+
+def case_payback_date_scalar(n):
+    from finance.cache import default_cache
+    from individuals_tool import calculate_payback_date
+
+    amounts = np.linspace(1_000, 50_000, n).tolist()
+
+    def run():
+        default_cache.clear()
+        for amount in amounts:
+            calculate_payback_date(amount, 7.5, 750.0)
+    return run
+
+
+def case_payback_date_batch(n):
+    from finance.amortization import amortize
+
+    amounts = np.linspace(1_000, 50_000, n)
+    rates = np.linspace(0, 25, n)
+    payments = np.linspace(100, 2_000, n)
+    return lambda: amortize(amounts, rates, payments)
+
+
+def case_contributions_for_months(n):
+    from finance.goals import contributions_for_months
+
+    goals = make_goals(n)
+    amounts = np.array([goal['goal_amount'] for goal in goals], dtype=float)
+    savings = np.array([goal['current_savings'] for goal in goals])
+    rates = np.array([goal['interest_rate'] for goal in goals])
+    months = 12 * (np.array([goal['target_year'] for goal in goals]) - 2025)
+    return lambda: contributions_for_months(amounts, savings, rates, months)
+
+
+def case_months_for_contributions(n):
+    from finance.goals import months_for_contributions, target_years_for_months
+
+    goals = make_goals(n)
+    amounts = np.array([goal['goal_amount'] for goal in goals], dtype=float)
+    savings = np.array([goal['current_savings'] for goal in goals])
+    rates = np.array([goal['interest_rate'] for goal in goals])
+    contributions = np.array([goal['monthly_contribution'] for goal in goals], dtype=float)
+    return lambda: target_years_for_months(2025, months_for_contributions(amounts, savings, rates, contributions))
+
+
+def case_solve_goals(n):
+    from finance.goals import solve_goals
+
+    goals = make_goals(n)
+    return lambda: solve_goals(goals, 2025)
+
+
+# Dashboard goal funding: n goals spread over n // 10 accounts (at least one), 40 years month by month
+def case_fund_goals(n):
+    from finance.funding import fund_goals
+
+    rng = np.random.default_rng(0)
+    accounts = max(n // 10, 1)
+    balances = rng.uniform(0, 50_000, accounts)
+    rates = rng.uniform(0, 8, accounts)
+    contributions = rng.uniform(0, 1_000, accounts)
+    goal_accounts = rng.integers(0, accounts, n)
+    costs = rng.uniform(1_000, 100_000, n)
+    target_years = rng.integers(2026, 2066, n)
+    return lambda: fund_goals(balances, rates, contributions, goal_accounts, costs, target_years, 2025, 2065)
+
+
+# The same goals through the event-driven ledger, over up to 20 accounts, plus up to 20 debts whose payments
+# flow back once paid off
+def case_household_ledger(n):
+    from finance.ledger import household_ledger
+    from finance.models import HouseholdTables
+
+    rng = np.random.default_rng(0)
+    accounts = min(max(n // 10, 1), 20)
+    responses = {
+        'accounts': [(f"Account {i}", 'HYSA', float(rng.uniform(0, 8)), float(rng.uniform(0, 50_000))) for i in range(accounts)],
+        'allocations': {f"Account {i}": 100 / accounts for i in range(accounts)},
+        'goals': [
+            {'name': f"Goal {i}", 'cost': float(rng.uniform(1_000, 100_000)), 'target_year': int(rng.integers(2026, 2066)),
+             'account': f"Account {rng.integers(0, accounts)}"}
+            for i in range(n)
+        ],
+    }
+    tables = HouseholdTables.from_responses(responses)
+    debts = min(max(n // 10, 1), 20)
+    payments = rng.uniform(50, 500, debts)
+    payoff_months = rng.integers(1, 480, debts)
+    return lambda: household_ledger(
+        tables, 10_000.0 + payments.sum(), 2_000.0, payments.sum(), 2025, 2065,
+        debt_names=[f"Debt {i}" for i in range(debts)], debt_monthly_payments=payments, debt_payoff_months=payoff_months,
+    )
+
+
+# Current You statement import: an n-transaction CSV export streamed into monthly category totals
+def case_statement_import(n):
+    import io
+
+    from finance.statements import import_statement
+
+    rng = np.random.default_rng(0)
+    merchants = ['STARBUCKS', 'RENT PAYMENT', 'SAFEWAY', 'AMAZON MKTPLACE', 'CITY HYDRO', 'UBER TRIP', 'CORNER STORE']
+    lines = ['Date,Description,Amount']
+    for i, (day, merchant, amount) in enumerate(zip(rng.integers(0, 3 * 365, n), rng.integers(0, len(merchants), n), rng.uniform(1, 500, n))):
+        lines.append(f"{2023 + day // 365}-{day % 365 // 31 + 1:02d}-{day % 31 % 28 + 1:02d},{merchants[merchant]} #{i % 1000},-{amount:.2f}")
+    data = '\n'.join(lines).encode('utf-8')
+    return lambda: import_statement(io.BytesIO(data), 'statement.csv')
+
+
+# Categorizing n distinct transaction descriptions with the default rules, compiled afresh so nothing is remembered
+def case_categorize_transactions(n):
+    from finance.rules import RuleEngine
+    from finance.statements import DEFAULT_CATEGORY_RULES
+
+    rng = np.random.default_rng(0)
+    words = ['POS', 'PURCHASE', 'STARBUCKS', 'RENT', 'WALMART', 'CORNER', 'STORE', 'UBER', 'EATS', 'ONLINE', 'PMT', 'HYDRO']
+    picks = rng.integers(0, len(words), (n, 3))
+    descriptions = [f"{words[a]} {words[b]} {words[c]} #{i}" for i, (a, b, c) in enumerate(picks)]
+    return lambda: RuleEngine(DEFAULT_CATEGORY_RULES).classify(descriptions)
+
+
+# Current You's spending history: the fixed share of spending over a trailing 12-month window at each of
+# n stored months of 20 categories, read back from the memory-mapped running totals
+def case_fixed_ratio_trend(n):
+    import tempfile
+
+    from finance.history import MonthlySpending
+
+    rng = np.random.default_rng(0)
+    directory = tempfile.TemporaryDirectory()
+    spending = MonthlySpending(directory.name)
+    categories = [f"Category {i}" for i in range(20)]
+    spending.write(24_000, categories, rng.uniform(0, 2_000, (len(categories), n)), categories[:8])
+
+    def run():
+        return spending.fixed_ratio_trend(12)
+    # The temporary directory is removed once the case is dropped
+    run.directory = directory
+    return run
+
+
+# plot_timeline's DataFrame, built from scratch for a new session
+def case_timeline_frame(n):
+    from finance.goals import GoalGraph
+    from future_you import timeline_frame
+
+    goals = make_goals(n)
+
+    def run():
+        graph = GoalGraph(2025, frame_builder=timeline_frame)
+        graph.sync(goals, 8_000.0)
+        return graph.timeline_frame()
+    return run
+
+
+# plot_timeline's DataFrame after one goal is edited in an existing session
+def case_timeline_frame_edit(n):
+    from finance.goals import GoalGraph
+    from future_you import timeline_frame
+
+    goals = make_goals(n)
+    graph = GoalGraph(2025, frame_builder=timeline_frame)
+    graph.sync(goals, 8_000.0)
+    graph.timeline_frame()
+    edits = iter(range(10 ** 9))
+
+    def run():
+        index = next(edits) % n
+        goals[index] = dict(goals[index], monthly_contribution=goals[index]['monthly_contribution'] + 1)
+        graph.sync(goals, 8_000.0)
+        return graph.timeline_frame()
+    return run
+
+
+# plot_timeline's scalable per-year clusters after one goal is edited in an existing session
+def case_timeline_clusters_edit(n):
+    from finance.goals import GoalGraph
+
+    goals = make_goals(n)
+    graph = GoalGraph(2025)
+    graph.sync(goals, 8_000.0)
+    graph.timeline_clusters()
+    edits = iter(range(10 ** 9))
+
+    def run():
+        index = next(edits) % n
+        goals[index] = dict(goals[index], monthly_contribution=goals[index]['monthly_contribution'] + 1)
+        graph.sync(goals, 8_000.0)
+        return graph.timeline_clusters()
+    return run
+
+
+# Current You charts: building the figure and rendering it to PNG, as the chart renderer does
+def _chart_case(builder_name):
+    def case(n):
+        from io import BytesIO
+
+        import current_you
+        from charts import close_figure
+
+        builder = getattr(current_you, builder_name)
+        data = make_categories(n)
+
+        def run():
+            fig = builder(data, "Benchmark")
+            try:
+                fig.savefig(BytesIO(), format='png', dpi=100)
+            finally:
+                close_figure(fig)
+        return run
+    return case
+
+
+# name -> (case, scales)
+CASES = {
+    'calculate_future_value': (case_future_value_scalar, SCALAR_SCALES),
+    'project_yearly': (case_future_value_batch, SCALES),
+    'calculate_payback_date': (case_payback_date_scalar, SCALAR_SCALES),
+    'amortize': (case_payback_date_batch, SCALES),
+    'contributions_for_months': (case_contributions_for_months, SCALES),
+    'months_for_contributions': (case_months_for_contributions, SCALES),
+    'solve_goals': (case_solve_goals, SCALES),
+    'fund_goals': (case_fund_goals, SCALAR_SCALES),
+    'household_ledger': (case_household_ledger, SCALAR_SCALES),
+    'statement_import': (case_statement_import, SCALES),
+    'categorize_transactions': (case_categorize_transactions, SCALES),
+    'fixed_ratio_trend': (case_fixed_ratio_trend, SCALES),
+    'timeline_frame': (case_timeline_frame, SCALES),
+    'timeline_frame_edit': (case_timeline_frame_edit, SCALES),
+    'timeline_clusters_edit': (case_timeline_clusters_edit, SCALES),
+    'create_pie_chart': (_chart_case('create_pie_chart'), CHART_SCALES),
+    'create_bar_chart': (_chart_case('create_bar_chart'), CHART_SCALES),
+}
+
+
+# Function to time one callable: best per-call time over several samples of an auto-sized number of calls
+def time_case(run, repeat=DEFAULT_REPEAT):
+    timer = timeit.Timer(run)
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeat=repeat, number=number)) / number
+
+
+# Function to put the allocator in its steady state before timing anything
+# glibc serves large blocks with mmap until a large block has been freed, then raises its threshold;
+# without this, a case's numpy temporaries cost page faults or not depending on which cases ran before it
+def warm_allocator():
+    buffer = np.ones(2_000_000)
+    del buffer
+
+
+# Function to run the selected cases; returns {"name[n]": seconds}
+def measure(names=None, max_scale=None, repeat=DEFAULT_REPEAT, report=print):
+    warm_allocator()
+    results = {}
+    for name, (case, scales) in CASES.items():
+        if names and not any(pattern in name for pattern in names):
+            continue
+        for n in scales:
+            if max_scale is not None and n > max_scale:
+                continue
+            seconds = time_case(case(n), repeat)
+            results[f"{name}[{n}]"] = seconds
+            report(f"{name + f'[{n}]':<36} {format_seconds(seconds):>12}")
+    return results
+
+
+# Function to time flagged measurements again, keeping the better time, so one noisy sample can't fail the check
+def remeasure(keys, repeat=DEFAULT_REPEAT):
+    results = {}
+    for key in keys:
+        name, n = key[:-1].split('[')
+        results[key] = time_case(CASES[name][0](int(n)), repeat)
+    return results
+
+
+def format_seconds(seconds):
+    for unit, scale in (('s', 1), ('ms', 1e-3), ('us', 1e-6)):
+        if seconds >= scale:
+            return f"{seconds / scale:.2f} {unit}"
+    return f"{seconds / 1e-9:.0f} ns"
+
+
+# Function to describe the machine, so baselines recorded elsewhere can be spotted
+def environment():
+    import matplotlib
+    import pandas
+
+    return {
+        'machine': platform.machine(),
+        'processor': platform.processor(),
+        'cpus': os.cpu_count(),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'pandas': pandas.__version__,
+        'matplotlib': matplotlib.__version__,
+    }
+
+
+# Function to compare results with baselines; returns a list of (key, baseline, current, ratio) regressions
+def compare(results, baselines, threshold=DEFAULT_THRESHOLD, noise_floor=NOISE_FLOOR):
+    regressions = []
+    for key, seconds in results.items():
+        baseline = baselines.get(key)
+        if baseline is None:
+            continue
+        if seconds > baseline * (1 + threshold) and seconds - baseline > noise_floor:
+            regressions.append((key, baseline, seconds, seconds / baseline))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the finance hot paths and check for regressions.")
+    parser.add_argument('--filter', nargs='*', help="Only run cases whose name contains one of these strings")
+    parser.add_argument('--max-scale', type=int, help="Skip scales larger than this")
+    parser.add_argument('--repeat', type=int, default=DEFAULT_REPEAT, help="Samples per measurement")
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD, help="Allowed slowdown before failing (0.3 = 30%%)")
+    parser.add_argument('--baseline', default=BASELINE_PATH, help="Baseline file to compare with or save to")
+    parser.add_argument('--save-baseline', action='store_true', help="Record these results as the new baselines")
+    parser.add_argument('--json', help="Also write the results to this JSON file")
+    args = parser.parse_args(argv)
+
+    results = measure(args.filter, args.max_scale, args.repeat)
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as handle:
+            json.dump(results, handle, indent=2)
+
+    if args.save_baseline:
+        saved = {'environment': environment(), 'results': {}}
+        if os.path.exists(args.baseline):
+            with open(args.baseline, encoding='utf-8') as handle:
+                saved['results'] = json.load(handle)['results']
+        saved['results'].update(results)
+        with open(args.baseline, 'w', encoding='utf-8') as handle:
+            json.dump(saved, handle, indent=2, sort_keys=True)
+        print(f"Saved {len(results)} baselines to {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"No baselines at {args.baseline}; run with --save-baseline first.")
+        return 0
+    with open(args.baseline, encoding='utf-8') as handle:
+        saved = json.load(handle)
+    if saved.get('environment') != environment():
+        print("Warning: baselines were recorded on a different machine or library versions; timings may not be comparable.")
+
+    regressions = compare(results, saved['results'], args.threshold)
+    if regressions:
+        retimed = remeasure([key for key, _, _, _ in regressions], args.repeat)
+        results.update({key: min(results[key], seconds) for key, seconds in retimed.items()})
+        regressions = compare(results, saved['results'], args.threshold)
+    missing = sorted(set(results) - set(saved['results']))
+    if missing:
+        print(f"No baseline for: {', '.join(missing)}")
+    if not regressions:
+        print(f"No regressions beyond {args.threshold:.0%} in {len(results)} measurements.")
+        return 0
+    print(f"{len(regressions)} regression(s) beyond {args.threshold:.0%}:")
+    for key, baseline, seconds, ratio in regressions:
+        print(f"  {key:<36} {format_seconds(baseline):>12} -> {format_seconds(seconds):>12}  ({ratio:.2f}x)")
+    return 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
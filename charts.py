@@ -0,0 +1,110 @@
+# Renders matplotlib charts to PNG bytes off the script thread and caches them by the content of their data,
+# so rerendering an unchanged chart is a cache lookup and no figure outlives its render.
+import sys
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from io import BytesIO
+
+import profiling
+from finance.cache import content_hash
+
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+DEFAULT_WORKERS = 2
+DEFAULT_DPI = 100
+
+
+# Function to free a figure as soon as it has been rendered
+def close_figure(fig):
+    fig.clear()
+    if 'matplotlib.pyplot' in sys.modules:
+        sys.modules['matplotlib.pyplot'].close(fig)
+
+
+# Thread pool renderer with an LRU cache of PNG bytes kept under a memory budget
+# Builders must create figures with matplotlib.figure.Figure (not pyplot) so they are safe to run in threads
+class ChartRenderer:
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES, max_workers=DEFAULT_WORKERS, dpi=DEFAULT_DPI):
+        self.max_bytes = max_bytes
+        self.dpi = dpi
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='chart-render')
+        self._images = OrderedDict()
+        self._pending = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    # Function to render a builder's figure to PNG bytes, always closing the figure
+    # profile is the rerun that asked for the chart (if it is being profiled), which gets the render time
+    def _render(self, key, builder, args, kwargs, profile=None):
+        start = time.perf_counter()
+        try:
+            fig = builder(*args, **kwargs)
+            try:
+                buffer = BytesIO()
+                fig.savefig(buffer, format='png', dpi=self.dpi)
+                image = buffer.getvalue()
+            finally:
+                close_figure(fig)
+            with self._lock:
+                self._store(key, image)
+            if profile is not None:
+                profile.add_chart(builder.__qualname__, time.perf_counter() - start, False)
+            return image
+        finally:
+            # A failed render isn't cached, so the next request tries again
+            with self._lock:
+                self._pending.pop(key, None)
+
+    # Function to cache an image, evicting the least recently used ones beyond the memory budget
+    def _store(self, key, image):
+        if len(image) > self.max_bytes:
+            return
+        self._images[key] = image
+        self._bytes += len(image)
+        while self._bytes > self.max_bytes:
+            _, evicted = self._images.popitem(last=False)
+            self._bytes -= len(evicted)
+
+    # Function to start rendering a chart in the background; returns a Future of the PNG bytes
+    # Identical charts requested while one is already rendering share its Future
+    def submit(self, builder, *args, **kwargs):
+        key = content_hash(f"{builder.__module__}.{builder.__qualname__}", *args, **kwargs)
+        profile = profiling.current()
+        with self._lock:
+            image = self._images.get(key)
+            if image is not None:
+                self._images.move_to_end(key)
+                self.hits += 1
+                if profile is not None:
+                    profile.add_chart(builder.__qualname__, 0.0, True)
+                future = Future()
+                future.set_result(image)
+                return future
+            self.misses += 1
+            future = self._pending.get(key)
+            if future is None:
+                future = self._executor.submit(self._render, key, builder, args, kwargs, profile)
+                self._pending[key] = future
+            return future
+
+    # Function to render a chart and wait for the PNG bytes
+    def render(self, builder, *args, **kwargs):
+        return self.submit(builder, *args, **kwargs).result()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'images': len(self._images),
+                'bytes': self._bytes,
+            }
+
+
+# Renderer shared by every session in the server process
+default_renderer = ChartRenderer()
@@ -1,117 +1,196 @@
+from datetime import date
+
 import streamlit as st
-import pandas as pd
-import matplotlib.pyplot as plt
 
-# Set page config for better layout
-st.set_page_config(layout="wide")
+from charts import default_renderer
+from identity import owner_id
+from profile_panel import profile_panel, start_profiling
+from profiling import section
+from startup import lazy_import
+from styles import apply_styles
 
-# Custom CSS for cleaner aesthetics
-def set_custom_styles():
-    st.markdown(
-        """
-        <style>
-        /* Background color */
-        .stApp {
-            background-color: #fafafa;
-        }
-        /* General styles */
-        body {
-            color: #333333;
-            background-color: #f0f2f6;
-        }
-        
-        /* Title and description */
-        .title {
-            color: #4B0082;  /* Indigo */
-            text-align: center;
-            margin-bottom: 20px;
-        }
-        
-        .description {
-            background-color: #e6e6fa;  /* Lavender */
-            padding: 20px;
-            border-radius: 10px;
-            margin-bottom: 30px;
-            font-family: 'Verdana', sans-serif;  /* Added font style */
-        }
-        
-        /* Section headers */
-        .section-header {
-            color: #4B0082;  /* Indigo */
-            margin-top: 30px;
-            margin-bottom: 10px;
-        }
-        
-        /* Section2 headers */
-        .section2-header {
-            color: black;  /* Black */
-            margin-top: 10px;
-            margin-bottom: 10px;
-        }
-
-        /* Text styling */
-        .stApp p, .stApp div, .stApp span, .stApp label {
-            color: #4f4f4f;
-            font-family: 'Verdana', sans-serif;
-        }
-        /* Button styling */
-        .stButton>button {
-            color: #e6e6fa;
-            background-color: #e6e6fa; /* Changed for better contrast */
-            border-radius: 5px;
-            padding: 0.6em 1.2em;
-            font-weight: bold;
-        }
-        /* Input field styling */
-        input {
-            border: 2px solid #2e6ef7;
-            border-radius: 6px;
-        }
-        /* Expense Calculation Results Styling */
-        .stApp .stMarkdown h3 {
-            font-family: 'Arial', sans-serif;
-            font-weight: bold;
-            color: #2e6ef7;
-        }
-        </style>
-        """,
-        unsafe_allow_html=True
-    )
+from finance.cached import summarize_expenses
+from finance.expenses import FIXED_RATIO_THRESHOLD
+
+# Custom CSS for cleaner aesthetics, on top of the shared styles
+CURRENT_YOU_STYLES = """
+    /* Background color */
+    .stApp {
+        background-color: #fafafa;
+    }
+    .description {
+        font-family: 'Verdana', sans-serif;  /* Added font style */
+    }
+    /* Button styling */
+    .stButton>button {
+        color: #e6e6fa;
+        background-color: #e6e6fa; /* Changed for better contrast */
+        border-radius: 5px;
+        padding: 0.6em 1.2em;
+        font-weight: bold;
+    }
+    /* Input field styling */
+    input {
+        border: 2px solid #2e6ef7;
+        border-radius: 6px;
+    }
+    /* Expense Calculation Results Styling */
+    .stApp .stMarkdown h3 {
+        font-family: 'Arial', sans-serif;
+        font-weight: bold;
+        color: #2e6ef7;
+    }
+"""
+
+# Date order choices for imported CSV statements, as MonthParser's day_first
+DATE_ORDERS = {'Detect automatically': None, 'Month first (mm/dd/yyyy)': False, 'Day first (dd/mm/yyyy)': True}
 
 # Function to create pie chart
 def create_pie_chart(data, title, colors=None):
-    fig, ax = plt.subplots(figsize=(8, 5))
+    fig = lazy_import('matplotlib.figure').Figure(figsize=(8, 5))
+    ax = fig.subplots()
     ax.pie(data.values(), labels=data.keys(), autopct='%1.1f%%', startangle=90, colors=colors, textprops={'fontsize': 12})
     ax.set_title(title, fontweight="bold")
-    plt.axis('equal')
+    ax.axis('equal')
     return fig
 
 # Function to create bar chart
 def create_bar_chart(data, title):
-    fig, ax = plt.subplots(figsize=(8, 5))
+    fig = lazy_import('matplotlib.figure').Figure(figsize=(8, 5))
+    ax = fig.subplots()
     bars = ax.bar(data.keys(), data.values(), color='#2e6ef7')
     ax.set_title(title, fontweight="bold")
     ax.set_ylabel('Amount ($)', fontweight="bold")
-    plt.xticks(rotation=45, ha='right')
+    ax.tick_params(axis='x', labelrotation=45)
+    for label in ax.get_xticklabels():
+        label.set_horizontalalignment('right')
     
     for bar in bars:
         height = bar.get_height()
         ax.text(bar.get_x() + bar.get_width()/2., height + 0.01*max(data.values()),
                 f'${height:.2f}', ha='center', va='bottom')
         
-    plt.tight_layout()
+    fig.tight_layout()
     return fig
 
+# Function to lay out the import's per-rule statistics as table rows
+def rule_match_rows(statistics):
+    rows = []
+    for row in statistics:
+        if row['keyword'] is None:
+            keyword, category = '(no rule)', 'Statement category or Other'
+        else:
+            keyword, category = row['keyword'], row['category'] or 'Not spending'
+        rows.append({'Keyword': keyword, 'Category': category, 'Transactions': row['matches'], 'Amount ($)': row['amount']})
+    return rows
+
+# Function to set the expense inputs to amounts by category, adding the categories that are new
+# It must run before the inputs are drawn (above them on the page, or in a callback) for them to pick the amounts up
+def set_expense_inputs(amounts, fixed_categories=None):
+    statements = lazy_import('finance.statements')
+    fixed_categories = statements.FIXED_CATEGORIES if fixed_categories is None else fixed_categories
+    fixed, variable = statements.split_fixed_variable(amounts, st.session_state.fixed_expenses, st.session_state.variable_expenses, fixed_categories)
+    for prefix, values, expenses in (('fixed', fixed, st.session_state.fixed_expenses), ('variable', variable, st.session_state.variable_expenses)):
+        for category, amount in values.items():
+            expenses[category] = amount
+            st.session_state[f"{prefix}_{category}"] = amount
+
+# Function to fill the expense inputs with a window's averages from the spending history; runs as a button callback
+def fill_from_history(user_id, months):
+    spending = lazy_import('finance.history').get_history_store().user(user_id)
+    set_expense_inputs({category: round(amount, 2) for category, amount in spending.window_average(months).items() if amount > 0}, spending.fixed)
+
+# Function to show the spending history: save imported or entered months, compare rolling averages and
+# follow the fixed share of spending over time
+def spending_history_section():
+    history = lazy_import('finance.history')
+    statements = lazy_import('finance.statements')
+    user_id = owner_id()
+    with st.expander("Your spending history"):
+        st.caption("Your history is kept for this browser. Bookmark this page's link to come back to it.")
+        spending = history.get_history_store().user(user_id)
+        fixed_categories = list(st.session_state.fixed_expenses)
+
+        imported = st.session_state.get('statement_history')
+        if imported is not None and imported.first_month is not None:
+            imported_months = imported.recent_window(imported.totals.shape[1])
+            if st.button(f"Save the imported months ({imported_months})"):
+                spending.write_history(imported, fixed_categories)
+                st.toast(f"Saved {imported_months} to your spending history.")
+        today = date.today()
+        months = [statements.month_number(today.year, today.month) - back for back in range(1, 13)]
+        month = st.selectbox("Month", months, format_func=statements.month_name, key='history_month')
+        if st.button("Save the amounts above as this month"):
+            spending.write_month(month, {**st.session_state.fixed_expenses, **st.session_state.variable_expenses}, fixed_categories)
+            st.toast(f"Saved {statements.month_name(month)} to your spending history.")
+
+        if not spending.months:
+            return
+        st.caption(f"Stored: {spending.describe()}")
+        with section('spending history'):
+            summary = history.history_summary(spending)
+        pd = lazy_import('pandas')
+        table = pd.DataFrame({
+            f"{window['months']}-month average ($)": {category: round(amount, 2) for category, amount in window['averages'].items()}
+            for window in summary
+        })
+        table.loc['Fixed share of spending'] = [f"{window['fixed_ratio']:.0%}" for window in summary]
+        st.dataframe(table.astype(str))
+
+        window = st.selectbox("Window", history.ROLLING_WINDOWS, format_func=lambda months: f"{months} months", key='history_window')
+        ratio = spending.fixed_ratio(window)
+        if ratio > FIXED_RATIO_THRESHOLD:
+            st.write(f"Over the last {window} months your fixed expenses were {ratio:.0%} of your spending, above the {FIXED_RATIO_THRESHOLD:.0%} mark. These are hard to change month to month, so it's worth checking whether your goals are possible right now.")
+        else:
+            st.write(f"Over the last {window} months your fixed expenses were {ratio:.0%} of your spending, under the {FIXED_RATIO_THRESHOLD:.0%} mark: your elective spending is where the room to adjust is.")
+        month_numbers, trend = spending.fixed_ratio_trend(window)
+        st.line_chart(pd.DataFrame({f"Fixed share ({window}-month average, %)": trend * 100}, index=[date(number // 12, number % 12 + 1, 1) for number in month_numbers]))
+        st.button(f"Fill in my {window}-month averages", on_click=fill_from_history, args=(user_id, window))
+
+# Function to fill the expense inputs with average monthly spending from uploaded statements
+def fill_from_statements(files, charges_positive, rules_text='', day_first=None):
+    statements = lazy_import('finance.statements')
+    try:
+        # The user's own rules are checked before the defaults
+        rules = lazy_import('finance.rules').parse_rules(rules_text) + statements.DEFAULT_CATEGORY_RULES
+    except ValueError as e:
+        st.error(f"Couldn't read your rules: {e}")
+        return
+    history = None
+    for file in files:
+        file.seek(0)
+        try:
+            history = statements.import_statement(file, file.name, history, charges_positive, rules, day_first=day_first)
+        except ValueError as e:
+            st.error(f"Couldn't read {file.name}: {e}")
+            return
+    averages = history.recent_average()
+    if not averages:
+        st.warning("No spending found in those statements.")
+        return
+    set_expense_inputs(averages)
+    # Kept so the imported months can be saved to the spending history
+    st.session_state.statement_history = history
+    st.session_state.statement_rule_matches = history.rule_statistics()
+    st.session_state.statement_import = (
+        f"Filled in average monthly spending for {len(averages)} categories from {history.transactions:,} transactions "
+        f"({history.recent_window()}). Check the amounts below and adjust anything that isn't typical."
+    )
+
 def main():
+    # Set page config for better layout
+    st.set_page_config(layout="wide")
+    start_profiling('current_you')
+
     # Apply custom styles
-    set_custom_styles()
+    apply_styles(CURRENT_YOU_STYLES)
 
     st.markdown("<h1 class='title'>The Current You Tool</h1>", unsafe_allow_html=True)
 
     # Description in the correct style
     st.markdown(
         "<div class='description'><h5>This tool helps us understand your current financial habits. Use this tool in combination with the 'Future You' tool to balance your current and future desires!<br><br>"
-        "When entering your current monthly expenses, aim for accuracy to get the best insights. Using the past three months of income and spending as a guide will help provide an average for a typical month. Reviewing your credit card and bank statements is a great way to start. Please feel free to use this to analyse your personal finances, joint finances with a partner, or family finances."
+        "When entering your current monthly expenses, aim for accuracy to get the best insights. Using the past three months of income and spending as a guide will help provide an average for a typical month. Reviewing your credit card and bank statements is a great way to start, and you can import them below to have the last three months averaged for you. Please feel free to use this to analyse your personal finances, joint finances with a partner, or family finances."
         "</h5></div>",
         unsafe_allow_html=True
     )
@@ -120,7 +199,10 @@ def main():
 
     # New Section: Enter Post-Tax Income
     st.markdown("<h4 class='section2-header'>Monthly Income</h4>", unsafe_allow_html=True)
-    post_tax_income = st.number_input("Enter your monthly post-tax income:", min_value=0.0, step=100.0)
+    # Start from the income entered on the Future You page, when the tools are served together from app.py
+    if 'post_tax_income' not in st.session_state and st.session_state.get('monthly_income'):
+        st.session_state.post_tax_income = float(st.session_state.monthly_income)
+    post_tax_income = st.number_input("Enter your monthly post-tax income:", min_value=0.0, step=100.0, key='post_tax_income')
 
     # Initialize session state variables
     if 'fixed_expenses' not in st.session_state:
@@ -130,6 +212,26 @@ def main():
         # Initialize with default variable expense categories
         st.session_state.variable_expenses = {'Fun (trips, vacations etc.)': 0.0}
 
+    # Fill in the expenses from statements instead of averaging them by hand
+    with st.expander("Import your bank and credit card statements"):
+        statement_files = st.file_uploader(
+            "Upload CSV, OFX or QFX exports covering at least the last three months:",
+            type=['csv', 'ofx', 'qfx'], accept_multiple_files=True
+        )
+        charges_positive = st.checkbox("Purchases show as positive amounts in my CSV files (common in credit card exports)")
+        date_order = st.selectbox("Dates in my CSV files are written", list(DATE_ORDERS), key='statement_date_order')
+        rules_text = st.text_area(
+            "Your own categories (optional), one per line as 'keyword: Category', e.g. 'daycare: Childcare':",
+            key='category_rules'
+        )
+        if st.button("Fill in from statements", disabled=not statement_files):
+            with section('statement import'):
+                fill_from_statements(statement_files, charges_positive, rules_text, DATE_ORDERS[date_order])
+        if 'statement_import' in st.session_state:
+            st.caption(st.session_state.statement_import)
+            # Which keywords caught what, so the rules can be tuned
+            st.dataframe(rule_match_rows(st.session_state.statement_rule_matches), hide_index=True)
+
     st.markdown("<h4 class='section2-header'>Monthly Fixed Expenses</h4>", unsafe_allow_html=True)
     # Display fixed expenses inputs
     fixed_expenses_to_delete = []
@@ -182,18 +284,28 @@ def main():
         else:
             st.warning("Please enter a category name.")
 
+    spending_history_section()
+
     # Input expense limit from Future You tool
     st.markdown("<h2 class='section-header'>Step 2: Enter Expense Limit from 'Future You' Tool</h2>", unsafe_allow_html=True)
-    future_you_limit = st.number_input("Enter the monthly expense limit suggested by the Future You tool (the red number at the bottom of the Future You tool):", min_value=0.0, step=10.0)
+    # Filled in from the Future You page when it ran in this session; the input resets to it whenever it changes
+    handed_off_limit = st.session_state.get('future_you_limit')
+    future_you_limit = st.number_input(
+        "Enter the monthly expense limit suggested by the Future You tool (the red number at the bottom of the Future You tool):",
+        min_value=0.0, step=10.0, value=max(handed_off_limit, 0.0) if handed_off_limit is not None else 0.0
+    )
+    if handed_off_limit is not None:
+        st.caption("Filled in from your Future You plan.")
 
     # Calculate total expenses
     if st.button("Calculate Expenses"):
         fixed_expenses_data = st.session_state.fixed_expenses
         variable_expenses_data = st.session_state.variable_expenses
 
-        total_fixed = sum(fixed_expenses_data.values())
-        total_variable = sum(variable_expenses_data.values())
-        total_expenses = total_fixed + total_variable
+        summary = summarize_expenses(fixed_expenses_data, variable_expenses_data, post_tax_income, future_you_limit)
+        total_fixed = summary['total_fixed']
+        total_variable = summary['total_variable']
+        total_expenses = summary['total_expenses']
 
         st.markdown("<h2 class='section-header'>Results</h2>", unsafe_allow_html=True)
 
@@ -201,7 +313,7 @@ def main():
         st.markdown("<h5 style='color: black;'>Expense Limit (Future You):<span style='color: #D22B2B;'><b> ${:.2f}</b></span></h5>".format(future_you_limit), unsafe_allow_html=True)
 
         # Calculate difference between Total Expenses and Expense Limit
-        difference = total_expenses - future_you_limit
+        difference = summary['difference']
 
         if difference < 0:
             st.markdown("<h4 class='section2-header'>Great news! Your expenses are ${:.2f} under your Future You limit. This means you are on track to achieving the future you want... with extra money to spare! <br><br> Consider adjusting your inputs in the Current You and Future You tools to see if you can get your Current You expenses to match your Future You expense limit. For example, you could allocate some of your extra money to having fun, leveling up your fixed expenses, or additional goals.</h4>".format(abs(difference)), unsafe_allow_html=True)
@@ -211,41 +323,39 @@ def main():
             st.markdown("<h4 class='section2-header'>Uh oh! Your expenses are ${:.2f} over your Future You limit. This means that you are spending more than what is required to reach your Future You goals. <br><br> Consider playing around with your inputs in the Current You and Future You tools until you get your expenses to match your Future You expense limit.</h4>".format(difference), unsafe_allow_html=True)
 
        # Calculate fixed expenses ratio
-            if total_expenses > 0:
-                fixed_ratio = total_fixed / total_expenses
-            else:
-                fixed_ratio = 0
+            fixed_ratio = summary['fixed_ratio']
 
-            if fixed_ratio > 0.65:
+            if fixed_ratio > FIXED_RATIO_THRESHOLD:
                 st.write("Insights: Hmm it looks like your fixed expenses are pretty high - these are the expenses that are not easily changeable month to month. This is worth really considering if your goals are possible right now, if you have any options to reduce your fixed expenses or if you have options for additional income.")
             else:
                 st.write("Insights: You currently have a fixed to variable expense ratio of less than 65% - this means that the amount of money you have to spend every month is not the problem, instead it’s the amount you’re choosing to spend on fun and elective spending. This can be uncomfortable to adjust but it's your decision to make if you would rather change your goals or what you spend each month.")
 
         # Pie chart with fixed expenses, variable expenses, and Remaining Income
         if post_tax_income > 0:
-            remaining_income = post_tax_income - total_expenses
-            if remaining_income < 0:
-                remaining_income = 0
+            remaining_income = summary['remaining_income']
             allocation_data = {
                 'Fixed Expenses': total_fixed,
                 'Variable Expenses': total_variable,
                 'Remaining Income (to put towards goals & savings)': remaining_income
             }
-            fig = create_pie_chart(allocation_data, 'Income & Expenses Breakdown', colors=['#ff9999', '#66b3ff', '#99ff99'])
-            st.pyplot(fig)
+            pie_chart = default_renderer.submit(create_pie_chart, allocation_data, 'Income & Expenses Breakdown', colors=['#ff9999', '#66b3ff', '#99ff99'])
         else:
             # Pie chart without income
             allocation_data = {
                 'Fixed Expenses': total_fixed,
                 'Variable Expenses': total_variable
             }
-            fig = create_pie_chart(allocation_data, 'Expenses Breakdown', colors=['#ff9999', '#66b3ff'])
-            st.pyplot(fig)
+            pie_chart = default_renderer.submit(create_pie_chart, allocation_data, 'Expenses Breakdown', colors=['#ff9999', '#66b3ff'])
 
-        # Bar chart for expense breakdown
+        # Bar chart for expense breakdown, rendered alongside the pie chart
         all_expenses_data = {**fixed_expenses_data, **variable_expenses_data}
-        fig2 = create_bar_chart(all_expenses_data, 'Expense Breakdown by Category')
-        st.pyplot(fig2)
+        bar_chart = default_renderer.submit(create_bar_chart, all_expenses_data, 'Expense Breakdown by Category')
+        with section('charts'):
+            pie_image, bar_image = pie_chart.result(), bar_chart.result()
+        st.image(pie_image)
+        st.image(bar_image)
+
+    profile_panel('current_you')
 
 if __name__ == "__main__":
     main()
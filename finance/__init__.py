@@ -0,0 +1,96 @@
+# Computation core shared by the Current You, Future You and Individuals tools.
+# It never imports Streamlit or plotting libraries, and submodules (and numpy) are only
+# imported when one of their names is first used, so batch jobs and workers start fast.
+import importlib
+
+# Public names, mapped to the submodule that defines them
+_EXPORTS = {
+    'amortize': 'amortization',
+    'AmortizationSchedule': 'amortization',
+    'ComputationCache': 'cache',
+    'default_cache': 'cache',
+    'memoize': 'cache',
+    'DependencyGraph': 'depgraph',
+    'FUNDING_ORDERS': 'funding',
+    'GoalFunding': 'funding',
+    'fund_goals': 'funding',
+    'fund_responses': 'funding',
+    'fund_tables': 'funding',
+    'summarize_expenses': 'expenses',
+    'FIXED_RATIO_THRESHOLD': 'expenses',
+    'contributions_for_months': 'goals',
+    'months_for_contributions': 'goals',
+    'target_years_for_months': 'goals',
+    'solve_goals': 'goals',
+    'recompute_goals': 'goals',
+    'retirement_goal': 'goals',
+    'monthly_breakdown': 'goals',
+    'timeline_data': 'goals',
+    'cluster_timeline': 'goals',
+    'GoalGraph': 'goals',
+    'GoalSweep': 'goals',
+    'goal_sweep': 'goals',
+    'calculate_age': 'household',
+    'remaining_monthly_funds': 'household',
+    'goal_progress': 'household',
+    'income_change_months': 'household',
+    'compute_dashboard': 'household',
+    'Dashboard': 'household',
+    'Account': 'models',
+    'Debt': 'models',
+    'Asset': 'models',
+    'Goal': 'models',
+    'PlanGoal': 'models',
+    'AccountTable': 'models',
+    'DebtTable': 'models',
+    'AssetTable': 'models',
+    'GoalTable': 'models',
+    'PlanGoalTable': 'models',
+    'HouseholdTables': 'models',
+    'tabulate_responses': 'models',
+    'plain_responses': 'models',
+    'Ledger': 'ledger',
+    'HouseholdLedger': 'ledger',
+    'household_ledger': 'ledger',
+    'SpendingHistory': 'statements',
+    'import_statement': 'statements',
+    'categorize': 'statements',
+    'split_fixed_variable': 'statements',
+    'MonthlySpending': 'history',
+    'SpendingHistoryStore': 'history',
+    'get_history_store': 'history',
+    'history_summary': 'history',
+    'RuleEngine': 'rules',
+    'compile_rules': 'rules',
+    'parse_rules': 'rules',
+    'simulate_accounts': 'montecarlo',
+    'simulate_responses': 'montecarlo',
+    'SheetSync': 'sheets',
+    'FakeSheetsBackend': 'sheets',
+    'GspreadBackend': 'sheets',
+    'get_sheet_sync': 'sheets',
+    'ScenarioStore': 'store',
+    'ScenarioGrid': 'whatif',
+    'scenario_grid': 'whatif',
+    'get_store': 'store',
+    'project_monthly': 'projections',
+    'project_yearly': 'projections',
+    'project_responses': 'projections',
+    'project_tables': 'projections',
+    'future_value': 'projections',
+}
+
+__all__ = sorted(_EXPORTS)
+
+
+def __getattr__(name):
+    module_name = _EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f"{__name__}.{module_name}"), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
@@ -0,0 +1,98 @@
+from datetime import date
+
+import numpy as np
+
+from finance.projections import _growth_factors
+
+# Schedules are built at most this many months out (payoff dates are exact beyond it)
+DEFAULT_HORIZON_MONTHS = 12 * 50
+
+
+# Function to add whole months to a date for an array of month counts, clipping the day to the month's end
+def add_months(start_date, months):
+    months = np.asarray(months, dtype=np.int64)
+    month_starts = np.datetime64(start_date, 'M') + months
+    month_lengths = (month_starts + 1).astype('datetime64[D]') - month_starts.astype('datetime64[D]')
+    day_offsets = np.minimum(start_date.day - 1, month_lengths.astype(np.int64) - 1)
+    return month_starts.astype('datetime64[D]') + day_offsets
+
+
+# Month-by-month schedule for a set of debts, all starting on the same date
+class AmortizationSchedule:
+    def __init__(self, start_date, payment_counts, payoff_dates, total_interest, errors,
+                 payment_dates, balances, principal, interest):
+        self.start_date = start_date
+        self.payment_counts = payment_counts  # -1 where the debt can't be paid off
+        self.payoff_dates = payoff_dates  # NaT where the debt can't be paid off
+        self.total_interest = total_interest  # NaN where the debt can't be paid off
+        self.errors = errors  # one message per debt, None if the debt can be paid off
+        self.payment_dates = payment_dates  # shape (months,)
+        self.balances = balances  # balance after each payment, shape (debts, months)
+        self.principal = principal
+        self.interest = interest
+
+    # Function to get a debt's payoff date as a datetime.date
+    def payoff_date(self, index):
+        if self.errors[index] is not None:
+            raise ValueError(self.errors[index])
+        return self.payoff_dates[index].astype(date)
+
+
+# Function to build the amortization schedule for many debts at once
+# amounts, annual_rates (%) and monthly_payments have one entry per debt
+def amortize(amounts, annual_rates, monthly_payments, start_date=None, horizon_months=DEFAULT_HORIZON_MONTHS):
+    start_date = date.today() if start_date is None else start_date
+    amounts = np.asarray(amounts, dtype=float)
+    monthly_rates = np.asarray(annual_rates, dtype=float) / 100 / 12
+    payments = np.asarray(monthly_payments, dtype=float)
+
+    # Validate every debt up front, with the same messages as the single-debt calculation
+    errors = [None] * len(amounts)
+    no_payment = payments <= 0
+    interest_not_covered = ~no_payment & (monthly_rates > 0) & (payments <= amounts * monthly_rates)
+    for i in np.flatnonzero(no_payment):
+        errors[i] = "Monthly payment must be greater than zero."
+    for i in np.flatnonzero(interest_not_covered):
+        errors[i] = "The monthly payment is not sufficient to cover the interest on the debt."
+    feasible = ~(no_payment | interest_not_covered)
+
+    # Number of payments, from the closed form n = log(P / (P - A r)) / log(1 + r), or A / P at 0%
+    safe_payments = np.where(feasible, payments, 1.0)
+    safe_rates = np.where(monthly_rates > 0, monthly_rates, 1.0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        exact_counts = np.where(
+            monthly_rates > 0,
+            np.log(safe_payments / (safe_payments - amounts * monthly_rates)) / np.log1p(safe_rates),
+            amounts / safe_payments,
+        )
+    # The last, partial payment still falls in its own month
+    payment_counts = np.where(feasible, np.ceil(np.maximum(exact_counts, 0) - 1e-9), -1).astype(np.int64)
+
+    payoff_dates = np.full(len(amounts), np.datetime64('NaT'), dtype='datetime64[D]')
+    payoff_dates[feasible] = add_months(start_date, payment_counts[feasible])
+
+    # Balance after k payments: A (1 + r)^k - P ((1 + r)^k - 1) / r
+    horizon = int(min(horizon_months, payment_counts.max(initial=0)))
+    months = np.arange(1, horizon + 1)
+    growth, annuity = _growth_factors(monthly_rates, months)
+    balances = amounts[:, np.newaxis] * growth - payments[:, np.newaxis] * annuity
+    paid_off = months[np.newaxis, :] >= payment_counts[:, np.newaxis]
+    balances = np.where(paid_off | ~feasible[:, np.newaxis], 0.0, np.maximum(balances, 0.0))
+
+    opening = np.concatenate([amounts[:, np.newaxis], balances[:, :-1]], axis=1)
+    active = (months[np.newaxis, :] <= payment_counts[:, np.newaxis]) & feasible[:, np.newaxis]
+    interest = np.where(active, opening * monthly_rates[:, np.newaxis], 0.0)
+    principal = np.where(active, opening - balances, 0.0)
+
+    # Total interest: every payment but the last is in full, the last clears the remaining balance
+    last_counts = np.maximum(payment_counts - 1, 0)
+    last_growth = np.exp(last_counts * np.log1p(monthly_rates))
+    with np.errstate(invalid='ignore'):
+        last_annuity = np.where(monthly_rates > 0, np.expm1(last_counts * np.log1p(monthly_rates)) / safe_rates, last_counts)
+    balance_before_last = amounts * last_growth - payments * last_annuity
+    total_paid = payments * last_counts + np.where(payment_counts > 0, balance_before_last * (1 + monthly_rates), 0.0)
+    total_interest = np.where(feasible, np.maximum(total_paid - amounts, 0.0), np.nan)
+
+    payment_dates = add_months(start_date, months)
+    return AmortizationSchedule(start_date, payment_counts, payoff_dates, total_interest, errors,
+                                payment_dates, balances, principal, interest)
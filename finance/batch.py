@@ -0,0 +1,228 @@
+# Batch runner for the Individuals dashboard numbers over a book of households.
+#
+#   python -m finance.batch households.jsonl --output results.jsonl --year 2030 --shard 0/4 --workers 8
+#
+# Each input record is one household in the st.session_state.responses shape (accounts, allocations,
+# expenses, debts, assets, goals, paycheck, ...), optionally wrapped as {"household_id": ..., "responses": {...}}.
+# CSV and Parquet inputs hold one household per row, with the list/dict fields JSON-encoded.
+# Results are written as JSON lines, one per household, in input order.
+import argparse
+import csv
+import json
+import math
+import sys
+import zlib
+from datetime import date
+from itertools import islice
+
+from finance.household import compute_dashboard
+
+JSON_FIELDS = ('accounts', 'allocations', 'expenses', 'debts', 'assets', 'goals', 'income_changes')
+NUMBER_FIELDS = ('paycheck', 'total_expenses', 'total_debt_payments')
+DEFAULT_BATCH_SIZE = 1_000
+
+
+# Function to parse a "--shard i/n" value into (i, n), with 0 <= i < n
+def parse_shard(text):
+    try:
+        index, count = (int(part) for part in text.split('/'))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Shard must look like i/n, got {text!r}.")
+    if count <= 0 or not 0 <= index < count:
+        raise argparse.ArgumentTypeError(f"Shard index must be between 0 and {count - 1}, got {index}.")
+    return index, count
+
+
+# Function to decide whether a household belongs to a shard
+# Households are split by a stable hash of their id, so a shard always gets the same households
+def in_shard(household_id, shard):
+    index, count = shard
+    return zlib.crc32(str(household_id).encode('utf-8')) % count == index
+
+
+# A line or row of the input that couldn't be read as a household record
+# The readers yield it in the record's place, and evaluate_household reports it as that household's error
+class UnreadableRecord:
+    def __init__(self, error):
+        self.error = error
+
+
+# Function to turn one CSV/Parquet row into a household record, decoding JSON-encoded fields
+# number is the row's position in the file (1 for the first data row), for the error when a field can't be decoded
+def _record_from_row(row, number):
+    record = {}
+    for key, value in row.items():
+        if value is None or value == '':
+            continue
+        try:
+            if key in JSON_FIELDS and isinstance(value, str):
+                value = json.loads(value)
+            elif key in NUMBER_FIELDS or key == 'selected_year':
+                value = float(value)
+        except ValueError as e:
+            return UnreadableRecord(f"Row {number}: can't read {key} ({e}).")
+        record[key] = value
+    return record
+
+
+# Function to stream households from a JSON lines file ('-' reads stdin)
+def read_jsonl(path):
+    handle = sys.stdin if path == '-' else open(path, encoding='utf-8')
+    try:
+        for number, line in enumerate(handle, start=1):
+            if line.strip():
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError as e:
+                    yield UnreadableRecord(f"Line {number} isn't valid JSON ({e.msg} at column {e.colno}).")
+    finally:
+        if handle is not sys.stdin:
+            handle.close()
+
+
+# Function to stream households from a CSV file
+def read_csv(path):
+    with open(path, newline='', encoding='utf-8') as handle:
+        for number, row in enumerate(csv.DictReader(handle), start=1):
+            yield _record_from_row(row, number)
+
+
+# Function to stream households from a Parquet file one row group batch at a time (needs pyarrow)
+def read_parquet(path, batch_size=DEFAULT_BATCH_SIZE):
+    try:
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise SystemExit("Reading Parquet files requires pyarrow (pip install pyarrow).")
+    number = 0
+    for batch in pq.ParquetFile(path).iter_batches(batch_size=batch_size):
+        for row in batch.to_pylist():
+            number += 1
+            yield _record_from_row(row, number)
+
+
+# Function to pick the reader for a file from its extension or an explicit format
+def read_households(path, input_format=None, batch_size=DEFAULT_BATCH_SIZE):
+    input_format = input_format or ('jsonl' if path == '-' else path.rsplit('.', 1)[-1].lower())
+    if input_format in ('jsonl', 'json', 'ndjson'):
+        return read_jsonl(path)
+    if input_format == 'csv':
+        return read_csv(path)
+    if input_format in ('parquet', 'pq'):
+        return read_parquet(path, batch_size)
+    raise SystemExit(f"Unsupported input format: {input_format}")
+
+
+# Function to split a record into (household_id, responses), filling in totals the app normally keeps
+def household_responses(record, index):
+    household_id = record.get('household_id', index)
+    responses = dict(record.get('responses', record))
+    for field in JSON_FIELDS:
+        responses.setdefault(field, {} if field in ('allocations', 'expenses') else [])
+    responses.setdefault('paycheck', 0)
+    responses.setdefault('total_expenses', sum(responses['expenses'].values()))
+    responses.setdefault('total_debt_payments', sum(debt['monthly_payment'] for debt in responses['debts']))
+    return household_id, responses
+
+
+# Function to compute one household's dashboard numbers as a JSON-ready dict
+# A household whose record can't be read or computed gets an error result instead of stopping the batch
+def evaluate_household(job):
+    household_id, record, index, selected_year, as_of = job
+    try:
+        if isinstance(record, UnreadableRecord):
+            raise ValueError(record.error)
+        _, responses = household_responses(record, index)
+        selected_year = int(record.get('selected_year', selected_year))
+        dashboard = compute_dashboard(responses, selected_year, as_of.year, start_date=as_of)
+        schedule = dashboard.schedule
+        debts = []
+        for idx, debt in enumerate(responses['debts']):
+            error = schedule.errors[idx]
+            debts.append({
+                'name': debt['name'],
+                'payoff_date': None if error else schedule.payoff_date(idx).isoformat(),
+                'total_interest': None if error else float(schedule.total_interest[idx]),
+                'error': error,
+            })
+        goals = [
+            {'name': goal['name'], 'account': goal['account'], 'progress': progress, 'paid_out_year': paid_out_year}
+            for goal, progress, paid_out_year in zip(responses['goals'], dashboard.goal_progress, dashboard.funding.withdrawal_years())
+        ]
+        return {
+            'household_id': household_id,
+            'selected_year': selected_year,
+            'remaining_funds': dashboard.remaining_funds,
+            'account_balances': dashboard.account_balances,
+            'asset_values': dict(dashboard.projection.asset_values(selected_year)),
+            'debts': debts,
+            'goals': goals,
+            'error': None,
+        }
+    except Exception as e:
+        return {'household_id': household_id, 'selected_year': selected_year, 'error': f"{type(e).__name__}: {e}"}
+
+
+# Function to build the jobs for the households in this shard
+# Records are only unpacked in evaluate_household, so one bad record can't end the run
+def _jobs(records, selected_year, as_of, shard):
+    for index, record in enumerate(records):
+        household_id = record.get('household_id', index) if isinstance(record, dict) else index
+        if shard is not None and not in_shard(household_id, shard):
+            continue
+        yield household_id, record, index, selected_year, as_of
+
+
+# Function to run the batch, writing one JSON line per household; returns the number of households written
+# Households are read and evaluated batch_size at a time, so memory stays bounded however large the input is
+def run(records, output, selected_year, as_of=None, shard=None, workers=1, batch_size=DEFAULT_BATCH_SIZE):
+    as_of = date.today() if as_of is None else as_of
+    jobs = _jobs(records, selected_year, as_of, shard)
+    pool = None
+    if workers > 1:
+        from multiprocessing import Pool
+        pool = Pool(workers)
+    written = 0
+    try:
+        while True:
+            batch = list(islice(jobs, batch_size))
+            if not batch:
+                break
+            if pool is None:
+                results = map(evaluate_household, batch)
+            else:
+                results = pool.imap(evaluate_household, batch, chunksize=max(1, math.ceil(len(batch) / (workers * 4))))
+            for result in results:
+                output.write(json.dumps(result) + '\n')
+                written += 1
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+    return written
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m finance.batch', description="Compute Individuals dashboard numbers for many households.")
+    parser.add_argument('input', help="Households file (.jsonl, .csv or .parquet), or '-' for JSON lines on stdin")
+    parser.add_argument('--format', dest='input_format', choices=['jsonl', 'csv', 'parquet'], help="Input format (default: from the file extension)")
+    parser.add_argument('--output', '-o', default='-', help="Output JSON lines file (default: stdout)")
+    parser.add_argument('--year', type=int, default=date.today().year + 5, help="Snapshot year (default: five years from now)")
+    parser.add_argument('--as-of', type=date.fromisoformat, default=date.today(), help="Date the projections start from, yyyy-mm-dd (default: today)")
+    parser.add_argument('--shard', type=parse_shard, help="Only process shard i of n (0-based), e.g. 0/4")
+    parser.add_argument('--workers', type=int, default=1, help="Number of worker processes")
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE, help="Households read and evaluated per batch")
+    args = parser.parse_args(argv)
+
+    records = read_households(args.input, args.input_format, args.batch_size)
+    output = sys.stdout if args.output == '-' else open(args.output, 'w', encoding='utf-8')
+    try:
+        written = run(records, output, args.year, args.as_of, args.shard, args.workers, args.batch_size)
+    finally:
+        if output is not sys.stdout:
+            output.close()
+    print(f"Processed {written} households.", file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
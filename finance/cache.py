@@ -0,0 +1,118 @@
+import functools
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from datetime import date, datetime
+
+DEFAULT_MAX_ENTRIES = 512
+DEFAULT_TTL_SECONDS = 60 * 60
+
+
+# Function to make arguments JSON-serialisable for hashing (dates, numpy values, sets, ...)
+def _encode(value):
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    if hasattr(value, 'tolist'):
+        return value.tolist()
+    if isinstance(value, (set, frozenset)):
+        return sorted(value, key=repr)
+    return repr(value)
+
+
+# Function to hash arbitrary call arguments by content, so equal inputs share a cache entry
+def content_hash(*args, **kwargs):
+    payload = json.dumps([args, kwargs], sort_keys=True, default=_encode, separators=(',', ':'))
+    return hashlib.blake2b(payload.encode('utf-8'), digest_size=16).hexdigest()
+
+
+# Thread-safe LRU cache with a size limit and time-to-live, keeping hit/miss counts per name
+class ComputationCache:
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES, ttl_seconds=DEFAULT_TTL_SECONDS):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {}
+
+    def _count(self, name, field):
+        counts = self._stats.setdefault(name, {'hits': 0, 'misses': 0, 'evictions': 0, 'expirations': 0})
+        counts[field] += 1
+
+    # Function to look up a key; returns (found, value)
+    def get(self, name, key):
+        with self._lock:
+            entry = self._entries.get((name, key))
+            if entry is not None:
+                value, expires_at = entry
+                if expires_at > time.monotonic():
+                    self._entries.move_to_end((name, key))
+                    self._count(name, 'hits')
+                    return True, value
+                del self._entries[(name, key)]
+                self._count(name, 'expirations')
+            self._count(name, 'misses')
+            return False, None
+
+    # Function to store a value, evicting the least recently used entries beyond max_entries
+    def set(self, name, key, value):
+        with self._lock:
+            self._entries[(name, key)] = (value, time.monotonic() + self.ttl_seconds)
+            self._entries.move_to_end((name, key))
+            while len(self._entries) > self.max_entries:
+                (evicted_name, _), _ = self._entries.popitem(last=False)
+                self._count(evicted_name, 'evictions')
+
+    # Function to load previously exported (name, key, value) entries, e.g. results restored from disk
+    def prime(self, entries):
+        for name, key, value in entries:
+            self.set(name, key, value)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._stats.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+    # Function to report hit/miss counts and hit rate per cached function
+    def stats(self):
+        with self._lock:
+            report = {}
+            for name, counts in self._stats.items():
+                lookups = counts['hits'] + counts['misses']
+                report[name] = {**counts, 'hit_rate': counts['hits'] / lookups if lookups else 0.0}
+            return report
+
+
+# Cache shared by every session in the server process
+default_cache = ComputationCache()
+
+
+# Decorator to memoize a pure function on the content hash of its arguments
+# Cached results are shared, so callers must treat them as read-only
+def memoize(func=None, cache=None, name=None):
+    if func is None:
+        return functools.partial(memoize, cache=cache, name=name)
+    cache = default_cache if cache is None else cache
+    name = name or f"{func.__module__}.{func.__qualname__}"
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        key = content_hash(*args, **kwargs)
+        found, value = cache.get(name, key)
+        if not found:
+            value = func(*args, **kwargs)
+            cache.set(name, key, value)
+        return value
+
+    # Function to compute (or look up) a result and return it as a (name, key, value) cache entry
+    def entry(*args, **kwargs):
+        return name, content_hash(*args, **kwargs), wrapper(*args, **kwargs)
+
+    wrapper.cache = cache
+    wrapper.cache_name = name
+    wrapper.entry = entry
+    return wrapper
@@ -0,0 +1,25 @@
+# Memoized versions of the computations the Streamlit apps run on every rerun.
+# A rerun that doesn't change a computation's inputs gets its result from finance.cache.default_cache.
+# The underlying module (and numpy) is only imported on the first call.
+import importlib
+
+from finance.cache import memoize
+
+
+# Function to build a memoized wrapper that imports finance.<module_name>.<func_name> on first call
+def _lazy(module_name, func_name):
+    @memoize(name=f"finance.{module_name}.{func_name}")
+    def call(*args, **kwargs):
+        return getattr(importlib.import_module(f"finance.{module_name}"), func_name)(*args, **kwargs)
+    call.__name__ = call.__qualname__ = func_name
+    return call
+
+
+compute_dashboard = _lazy('household', 'compute_dashboard')
+amortize = _lazy('amortization', 'amortize')
+simulate_responses = _lazy('montecarlo', 'simulate_responses')
+summarize_expenses = _lazy('expenses', 'summarize_expenses')
+contributions_for_months = _lazy('goals', 'contributions_for_months')
+months_for_contributions = _lazy('goals', 'months_for_contributions')
+goal_sweep = _lazy('goals', 'goal_sweep')
+scenario_grid = _lazy('whatif', 'scenario_grid')
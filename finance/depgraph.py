@@ -0,0 +1,75 @@
+from collections import defaultdict
+
+
+# Small reactive dependency graph: input nodes hold values, derived nodes compute from other nodes.
+# Changing an input only marks the nodes downstream of it dirty, and dirty nodes are recomputed lazily
+# the next time they are read, so an edit costs O(affected nodes) rather than O(graph).
+class DependencyGraph:
+    def __init__(self):
+        self._computes = {}  # name -> (function, dependency names); None for input nodes
+        self._values = {}
+        self._dirty = set()
+        self._dependents = defaultdict(set)
+        self.recomputed = 0  # number of derived node evaluations, for monitoring
+
+    # Function to mark a node's dependents (transitively) as needing recomputation
+    def _invalidate(self, name):
+        stack = list(self._dependents.get(name, ()))
+        while stack:
+            node = stack.pop()
+            # A node that is already dirty already has all of its dependents dirty
+            if node not in self._dirty:
+                self._dirty.add(node)
+                stack.extend(self._dependents.get(node, ()))
+
+    def __contains__(self, name):
+        return name in self._computes
+
+    # Function to set an input node; dependents are only invalidated when the value actually changes
+    def set_input(self, name, value):
+        if self._computes.get(name, None) is not None:
+            raise ValueError(f"{name} is a derived node.")
+        if name in self._values:
+            old = self._values[name]
+            if old is value or (type(old) is type(value) and old == value):
+                return
+        self._computes[name] = None
+        self._values[name] = value
+        self._invalidate(name)
+
+    # Function to define (or redefine) a derived node computed as function(*dependency values)
+    def define(self, name, function, dependencies):
+        previous = self._computes.get(name)
+        if previous is not None:
+            for dependency in previous[1]:
+                self._dependents[dependency].discard(name)
+        self._computes[name] = (function, tuple(dependencies))
+        for dependency in dependencies:
+            self._dependents[dependency].add(name)
+        self._dirty.add(name)
+        self._invalidate(name)
+
+    # Function to remove a node; anything still depending on it must be redefined or removed too
+    def remove(self, name):
+        if name not in self._computes:
+            return
+        self._invalidate(name)
+        compute = self._computes.pop(name)
+        if compute is not None:
+            for dependency in compute[1]:
+                self._dependents[dependency].discard(name)
+        self._values.pop(name, None)
+        self._dirty.discard(name)
+
+    # Function to read a node, recomputing it (and any dirty dependencies) first if needed
+    def get(self, name):
+        if name in self._dirty or name not in self._values:
+            compute = self._computes.get(name)
+            if compute is None:
+                raise KeyError(name)
+            function, dependencies = compute
+            value = function(*(self.get(dependency) for dependency in dependencies))
+            self._values[name] = value
+            self._dirty.discard(name)
+            self.recomputed += 1
+        return self._values[name]
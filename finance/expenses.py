@@ -0,0 +1,19 @@
+# Fixed expenses above this share of total expenses are flagged in the Current You insights
+FIXED_RATIO_THRESHOLD = 0.65
+
+
+# Function to summarise Current You expenses against income and the Future You expense limit
+def summarize_expenses(fixed_expenses, variable_expenses, post_tax_income=0.0, future_you_limit=0.0):
+    total_fixed = sum(fixed_expenses.values())
+    total_variable = sum(variable_expenses.values())
+    total_expenses = total_fixed + total_variable
+    remaining_income = post_tax_income - total_expenses
+    return {
+        'total_fixed': total_fixed,
+        'total_variable': total_variable,
+        'total_expenses': total_expenses,
+        # Positive when spending is over the Future You limit
+        'difference': total_expenses - future_you_limit,
+        'fixed_ratio': total_fixed / total_expenses if total_expenses > 0 else 0,
+        'remaining_income': remaining_income if remaining_income > 0 else 0,
+    }
@@ -0,0 +1,123 @@
+import numpy as np
+
+from finance.models import HouseholdTables
+
+# How goals sharing an account are queued for its money: earliest target year first, or the order
+# the goals were added in (their priority)
+FUNDING_ORDERS = ('target_date', 'priority')
+
+
+# Funding of a household's goals from the accounts they draw on
+# funded has shape (goals, years + 1): the money set aside for each goal at the start of each projection year,
+# which stays at the goal's cost once it has been paid out; withdrawal_month is the month each goal was paid out
+# (-1 if never) and balances the accounts' balances at the start of each year, after payouts
+# Goals are in the responses' order; goals whose account doesn't exist have no row and come back as None
+class GoalFunding:
+    def __init__(self, start_year, goal_names, costs, target_years, kept, funded, withdrawal_month, balances):
+        self.start_year = start_year
+        self.goal_names = goal_names
+        self.costs = costs
+        self.target_years = target_years
+        self.kept = kept
+        self.funded = funded
+        self.withdrawal_month = withdrawal_month
+        self.balances = balances
+
+    @property
+    def end_year(self):
+        return self.start_year + self.funded.shape[1] - 1
+
+    # Function to get the column index for a calendar year
+    def year_index(self, year):
+        index = int(year) - self.start_year
+        if index < 0 or index >= self.funded.shape[1]:
+            raise ValueError(f"Year {year} is outside the funding simulation {self.start_year}-{self.end_year}.")
+        return index
+
+    # Function to get each goal's progress (funded share of its cost, 0..1) in a given year, in goal order
+    def progress_in(self, year):
+        column = self.year_index(year)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            progress = np.where(self.costs > 0, self.funded[:, column] / self.costs, 1.0)
+        values = iter(np.minimum(progress, 1.0).tolist())
+        return [next(values) if kept else None for kept in self.kept]
+
+    # Function to get the year each goal is paid out in, or None when it isn't reached in the simulation
+    def withdrawal_years(self):
+        months = iter(self.withdrawal_month.tolist())
+        years = []
+        for kept in self.kept:
+            month = next(months) if kept else -1
+            years.append(self.start_year + month // 12 if month >= 0 else None)
+        return years
+
+    # Function to list the withdrawals as (goal name, year, amount), in the order they happen
+    def withdrawals(self):
+        paid = np.flatnonzero(self.withdrawal_month >= 0)
+        paid = paid[np.argsort(self.withdrawal_month[paid], kind='stable')]
+        return [(self.goal_names[goal], self.start_year + int(self.withdrawal_month[goal]) // 12, float(self.costs[goal])) for goal in paid]
+
+
+# Function to simulate funding goals from account balances and monthly inflows, one month at a time
+# Each account's money is set aside for its goals in queue order: the head of the queue takes what it needs,
+# the rest spills to the next goal, and so on. A goal is withdrawn (its cost leaves the account) in the first
+# month, from its target year on, that it is fully funded; goals that miss their target year keep saving.
+# Every month handles all goals of all accounts in a few array operations, with the per-account queues
+# kept as one array sorted by (account, queue position) and a mask of the goals still open.
+# The dashboard runs the same rules through the event-driven finance.ledger, which skips the quiet months;
+# this month-stepping version is the reference it is checked and benchmarked against.
+def fund_goals(balances, annual_rates, monthly_contributions, goal_accounts, costs, target_years, start_year, end_year, priorities=None):
+    balances = np.array(balances, dtype=float)
+    monthly_rates = np.asarray(annual_rates, dtype=float) / 100 / 12
+    monthly_contributions = np.broadcast_to(np.asarray(monthly_contributions, dtype=float), balances.shape)
+    goal_accounts = np.asarray(goal_accounts, dtype=int)
+    costs = np.asarray(costs, dtype=float)
+    target_years = np.asarray(target_years, dtype=float)
+    priorities = target_years if priorities is None else np.asarray(priorities, dtype=float)
+    months = 12 * max(int(end_year) - int(start_year), 0)
+
+    # Queue order: by account, then priority, then position in the goal list
+    queue = np.lexsort((np.arange(len(costs)), priorities, goal_accounts))
+    accounts = goal_accounts[queue]
+    queued_costs = costs[queue]
+    due = np.maximum(12 * (target_years[queue] - int(start_year)), 0)
+    group_start = np.searchsorted(accounts, accounts, side='left')
+
+    is_open = np.ones(len(queue), dtype=bool)
+    funded = np.empty((len(queue), months + 1))
+    withdrawal_month = np.full(len(queue), -1)
+    account_balances = np.empty((len(balances), months + 1))
+    growth = 1 + monthly_rates
+    for month in range(months + 1):
+        if month:
+            balances = balances * growth + monthly_contributions
+        needed = np.where(is_open, queued_costs, 0.0)
+        # Money claimed by the open goals ahead of each goal in its account's queue
+        ahead = np.cumsum(needed) - needed
+        ahead -= ahead[group_start]
+        set_aside = np.clip(balances[accounts] - ahead, 0.0, needed)
+        paid = is_open & (set_aside >= needed) & (month >= due)
+        if paid.any():
+            balances = balances - np.bincount(accounts[paid], weights=queued_costs[paid], minlength=len(balances))
+            is_open &= ~paid
+            withdrawal_month[paid] = month
+        funded[:, month] = np.where(is_open, set_aside, queued_costs)
+        account_balances[:, month] = balances
+
+    # Back to the callers' goal order
+    order = np.argsort(queue)
+    return funded[order], withdrawal_month[order], account_balances
+
+
+# Function to simulate goal funding from columnar household tables, from start_year to end_year (or the last target year)
+# order is one of FUNDING_ORDERS; every account's inflow is its share of the remaining monthly funds
+def fund_tables(tables, remaining_funds, start_year, end_year, order='target_date'):
+    # Imported here: finance.ledger builds on this module
+    from finance.ledger import household_ledger
+
+    return household_ledger(tables, remaining_funds, 0.0, 0.0, start_year, end_year, order).funding
+
+
+# Function to simulate goal funding for one set of responses, as stored by individuals_tool
+def fund_responses(responses, remaining_funds, start_year, end_year, order='target_date'):
+    return fund_tables(HouseholdTables.from_responses(responses), remaining_funds, start_year, end_year, order)
@@ -0,0 +1,276 @@
+import numpy as np
+
+from finance.depgraph import DependencyGraph
+
+
+# Function to get the monthly contribution needed to reach each goal in the given number of months
+# Works in log space: (1 + r) ** m is never formed, so long horizons can't overflow
+# Goals whose savings already grow past the target need no contribution (0); months <= 0 gives NaN
+def contributions_for_months(goal_amounts, current_savings, annual_rates, months):
+    goal_amounts, current_savings, monthly_rates, months = np.broadcast_arrays(
+        np.asarray(goal_amounts, dtype=float),
+        np.asarray(current_savings, dtype=float),
+        np.asarray(annual_rates, dtype=float) / 100 / 12,
+        np.asarray(months, dtype=float),
+    )
+    with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+        log_growth = months * np.log1p(monthly_rates)
+        # c = G r / ((1 + r)^m - 1) - S r (1 + r)^m / ((1 + r)^m - 1), with the second term as S r / (1 - (1 + r)^-m)
+        compounded = goal_amounts * monthly_rates / np.expm1(log_growth) + current_savings * monthly_rates / np.expm1(-log_growth)
+        simple = (goal_amounts - current_savings) / months
+        contributions = np.where(monthly_rates > 0, compounded, simple)
+    contributions = np.where(months > 0, np.maximum(contributions, 0.0), np.nan)
+    return contributions
+
+
+# Function to get the number of months each goal takes to reach with a given monthly contribution
+# Solves S (1 + r)^n + c ((1 + r)^n - 1) / r = G as n = log((G r + c) / (S r + c)) / log(1 + r)
+# Goals that can never be reached come back as inf
+def months_for_contributions(goal_amounts, current_savings, annual_rates, contributions):
+    goal_amounts, current_savings, monthly_rates, contributions = np.broadcast_arrays(
+        np.asarray(goal_amounts, dtype=float),
+        np.asarray(current_savings, dtype=float),
+        np.asarray(annual_rates, dtype=float) / 100 / 12,
+        np.asarray(contributions, dtype=float),
+    )
+    with np.errstate(divide='ignore', invalid='ignore'):
+        compounded = (np.log(goal_amounts * monthly_rates + contributions)
+                      - np.log(current_savings * monthly_rates + contributions)) / np.log1p(monthly_rates)
+        simple = (goal_amounts - current_savings) / contributions
+        months = np.where(monthly_rates > 0, compounded, simple)
+    months = np.where(np.isnan(months), np.inf, months)
+    months = np.where(current_savings >= goal_amounts, 0.0, months)
+    return months
+
+
+# Function to turn months-to-goal into target years; unreachable goals give -1
+def target_years_for_months(current_year, months):
+    months = np.asarray(months, dtype=float)
+    finite = np.isfinite(months)
+    # The small tolerance keeps round-off (e.g. 119.99999 months) from spilling into the next year
+    years = np.ceil(np.where(finite, months, 0) / 12 - 1e-9)
+    return np.where(finite, current_year + years, -1).astype(np.int64)
+
+
+# Function to recompute every goal in one vectorized call
+# 'Target Year' goals get their monthly contribution and 'Monthly Contribution' goals get their target year
+# Returns (monthly_contributions, target_years) arrays in goal order
+def solve_goals(goals, current_year):
+    goal_amounts = np.array([goal['goal_amount'] for goal in goals], dtype=float)
+    current_savings = np.array([goal['current_savings'] for goal in goals], dtype=float)
+    interest_rates = np.array([goal['interest_rate'] for goal in goals], dtype=float)
+    contributions = np.array([goal['monthly_contribution'] or 0 for goal in goals], dtype=float)
+    target_years = np.array([goal['target_year'] for goal in goals], dtype=np.int64)
+    by_target_year = np.array([goal['goal_type'] == 'Target Year' for goal in goals], dtype=bool)
+
+    solved_contributions = contributions_for_months(goal_amounts, current_savings, interest_rates, 12 * (target_years - current_year))
+    solved_years = target_years_for_months(current_year, months_for_contributions(goal_amounts, current_savings, interest_rates, contributions))
+
+    monthly_contributions = np.where(by_target_year, solved_contributions, contributions)
+    target_years = np.where(by_target_year, target_years, solved_years)
+    return monthly_contributions, target_years
+
+
+# Function to recompute a whole goal list (e.g. after an income or rate change), rounding as the app stores it
+# Goals that can't be solved keep their previous values
+def recompute_goals(goals, current_year):
+    if not goals:
+        return []
+    monthly_contributions, target_years = solve_goals(goals, current_year)
+    updated = []
+    for goal, contribution, target_year in zip(goals, monthly_contributions, target_years):
+        goal = dict(goal)
+        if np.isfinite(contribution) and target_year >= 0:
+            goal['monthly_contribution'] = int(round(contribution))
+            goal['target_year'] = int(target_year)
+        updated.append(goal)
+    return updated
+
+
+SWEEP_YEARS = 60
+SWEEP_RATES = np.round(np.arange(0, 20.25, 0.25), 2)
+
+
+# Monthly contribution a goal needs for every target year (1..max_years out) and rate of return on a grid
+# contributions has shape (rates, years); lookups are plain indexing, so a slider over it costs nothing
+class GoalSweep:
+    def __init__(self, current_year, years, rates, contributions):
+        self.current_year = current_year
+        self.years = years
+        self.rates = rates
+        self.contributions = contributions
+
+    # Function to get the grid index of a target year and a rate (the nearest rate on the grid)
+    def index(self, target_year, rate):
+        year_index = int(np.clip(int(target_year) - self.years[0], 0, len(self.years) - 1))
+        return int(np.abs(self.rates - float(rate)).argmin()), year_index
+
+    def contribution(self, target_year, rate):
+        return float(self.contributions[self.index(target_year, rate)])
+
+    # Function to get the contribution for every target year at one rate
+    def by_year(self, rate):
+        return self.contributions[self.index(self.years[0], rate)[0]]
+
+    # Function to get the contribution for every rate at one target year
+    def by_rate(self, target_year):
+        return self.contributions[:, self.index(target_year, self.rates[0])[1]]
+
+
+# Function to sweep a goal's required monthly contribution over target years and rates of return in one call
+# The goal's own rate is always on the rate grid, so the sweep reproduces the contribution the app shows
+def goal_sweep(goal_amount, current_savings, interest_rate, current_year, max_years=SWEEP_YEARS, rates=SWEEP_RATES):
+    years = np.arange(int(current_year) + 1, int(current_year) + int(max_years) + 1)
+    rates = np.union1d(np.asarray(rates, dtype=float), [round(float(interest_rate), 2)])
+    contributions = contributions_for_months(goal_amount, current_savings, rates[:, np.newaxis], 12 * (years - int(current_year))[np.newaxis, :])
+    return GoalSweep(int(current_year), years, rates, contributions)
+
+
+# Function to build the default 'Retirement' goal: 25x annual income, 40 years out at 7%
+def retirement_goal(monthly_income, current_year):
+    goal = {
+        'goal_name': 'Retirement',
+        'goal_amount': int(round(monthly_income * 12 * 25)),
+        'current_savings': 0.0,
+        'interest_rate': 7.0,
+        'monthly_contribution': None,
+        'target_year': current_year + 40,
+        'goal_type': 'Target Year'
+    }
+    months_to_goal = 12 * (goal['target_year'] - current_year)
+    goal['monthly_contribution'] = int(round(float(contributions_for_months(
+        goal['goal_amount'], goal['current_savings'], goal['interest_rate'], months_to_goal
+    ))))
+    return goal
+
+
+# Function to get the total monthly contribution towards goals and what's left for current you
+def monthly_breakdown(goals, monthly_income):
+    total_contribution = sum(goal['monthly_contribution'] for goal in goals)
+    return total_contribution, monthly_income - total_contribution
+
+
+# Function to build the hover text for the current-year point of the timeline
+def current_year_text(monthly_income, total_contribution, remaining_for_current_you, current_year):
+    return f"<b>Year:</b> {current_year}<br><b>Monthly Income:</b> ${int(round(monthly_income))}<br><b>Monthly contributions towards goals:</b> ${int(round(total_contribution))}<br><b>Monthly money remaining for current you:</b> ${int(round(remaining_for_current_you))}"
+
+
+# Function to build one goal's timeline point as (year, event name, hover text)
+def goal_point(goal):
+    text = f"<b>Year:</b> {goal['target_year']}<br><b>Goal Name:</b> {goal['goal_name']}<br><b>Goal Amount:</b> ${int(round(goal['goal_amount']))}<br><b>Initial Contribution:</b> ${int(round(goal['current_savings']))}<br><b>Monthly Contribution:</b> ${int(round(goal['monthly_contribution']))}"
+    return goal['target_year'], goal['goal_name'], text
+
+
+# Function to assemble timeline points (years, event names and hover text) into columns
+def _timeline_columns(current_point, points):
+    return {
+        'Year': [current_point[0]] + [point[0] for point in points],
+        'Event': [current_point[1]] + [point[1] for point in points],
+        'Text': [current_point[2]] + [point[2] for point in points],
+    }
+
+
+# Function to build the timeline points (years, event names and hover text) for a goal list
+def timeline_data(goals, monthly_income, current_year):
+    total_contribution, remaining_for_current_you = monthly_breakdown(goals, monthly_income)
+    current_point = (current_year, 'Current Year', current_year_text(monthly_income, total_contribution, remaining_for_current_you, current_year))
+    return _timeline_columns(current_point, [goal_point(goal) for goal in goals])
+
+
+TIMELINE_CLUSTER_NAMES = 10
+
+
+# Function to cluster timeline points that share a year into one point per year, in year order
+# A year with one event keeps its label and hover text; a busier year is labelled with its size and
+# lists its first few events on hover, so labels don't pile up and the hover text stays small
+# Returns the timeline columns plus 'Count', the number of events behind each point
+def cluster_timeline(timeline, max_names=TIMELINE_CLUSTER_NAMES):
+    groups = {}
+    for year, event, text in zip(timeline['Year'], timeline['Event'], timeline['Text']):
+        groups.setdefault(year, []).append((event, text))
+    clusters = {'Year': [], 'Event': [], 'Text': [], 'Count': []}
+    for year in sorted(groups):
+        events = groups[year]
+        if len(events) == 1:
+            event, text = events[0]
+        else:
+            goals = len(events) - (events[0][0] == 'Current Year')
+            event = f"{goals} goals" if goals == len(events) else f"Current Year + {goals} goals"
+            names = ''.join(f"<br>• {name}" for name, _ in events[:max_names])
+            more = f"<br>...and {len(events) - max_names} more" if len(events) > max_names else ''
+            text = f"<b>Year:</b> {year}<br><b>{event}:</b>{names}{more}"
+        clusters['Year'].append(year)
+        clusters['Event'].append(event)
+        clusters['Text'].append(text)
+        clusters['Count'].append(len(events))
+    return clusters
+
+
+# Incremental view of a goal list: per-goal contributions and timeline points, the contribution total,
+# what's left for current you and the timeline (and its per-year clusters), recomputed only downstream of what changed.
+# Goals are tracked by identity, so a goal replaced with a new dict (as the app does on update) is
+# recomputed while untouched goals are not; goal dicts must not be mutated in place.
+class GoalGraph:
+    def __init__(self, current_year, frame_builder=None):
+        self.graph = DependencyGraph()
+        self._goals = {}
+        self._order = None
+        self._total = 0
+        self.graph.set_input('current_year', current_year)
+        self.graph.set_input('income', 0.0)
+        self.graph.set_input('total_contribution', 0)
+        self.graph.define('remaining_for_current_you', lambda income, total: income - total, ['income', 'total_contribution'])
+        self.graph.define(
+            'current_point',
+            lambda income, total, remaining, year: (year, 'Current Year', current_year_text(income, total, remaining, year)),
+            ['income', 'total_contribution', 'remaining_for_current_you', 'current_year'],
+        )
+        self.graph.define('timeline_clusters', cluster_timeline, ['timeline'])
+        if frame_builder is not None:
+            self.graph.define('timeline_frame', frame_builder, ['timeline'])
+
+    # Function to bring the graph in line with the current goal list and income
+    def sync(self, goals, monthly_income, current_year=None):
+        graph = self.graph
+        ids = [id(goal) for goal in goals]
+        current = set(ids)
+        for goal_id in [goal_id for goal_id in self._goals if goal_id not in current]:
+            self._total -= graph.get(f'contribution:{goal_id}')
+            for prefix in ('contribution', 'point', 'goal'):
+                graph.remove(f'{prefix}:{goal_id}')
+            del self._goals[goal_id]
+        for goal, goal_id in zip(goals, ids):
+            if goal_id in self._goals:
+                continue
+            self._goals[goal_id] = goal
+            graph.set_input(f'goal:{goal_id}', goal)
+            graph.define(f'contribution:{goal_id}', lambda goal: goal['monthly_contribution'], [f'goal:{goal_id}'])
+            graph.define(f'point:{goal_id}', goal_point, [f'goal:{goal_id}'])
+            self._total += graph.get(f'contribution:{goal_id}')
+
+        graph.set_input('income', monthly_income)
+        graph.set_input('total_contribution', self._total)
+        if current_year is not None:
+            graph.set_input('current_year', current_year)
+        if ids != self._order:
+            self._order = ids
+            graph.define(
+                'timeline',
+                lambda current_point, *points: _timeline_columns(current_point, points),
+                ['current_point'] + [f'point:{goal_id}' for goal_id in ids],
+            )
+
+    def total_contribution(self):
+        return self.graph.get('total_contribution')
+
+    def remaining_for_current_you(self):
+        return self.graph.get('remaining_for_current_you')
+
+    def timeline(self):
+        return self.graph.get('timeline')
+
+    def timeline_clusters(self):
+        return self.graph.get('timeline_clusters')
+
+    def timeline_frame(self):
+        return self.graph.get('timeline_frame')
@@ -0,0 +1,248 @@
+# Local columnar store of each user's monthly spending per category, for Current You's trends and rolling averages.
+# A user's history is a directory of flat float64 files, one value per month from first_month on:
+#   meta.json               first_month, number of months, categories (in column order) and the fixed ones
+#   amounts/<column>.f8     the category's spending each month
+#   cumulative/<column>.f8  its running total up to and including each month
+# plus a 'recorded' column, 1 for the months that were written and 0 for gaps between them, so averages are
+# over the months with data.
+# Appending a month appends a value to each column, and reads memory-map the columns, so nothing is loaded whole.
+# Any window's total is the difference of two running totals, so window means and fixed-to-variable ratios
+# cost the same for three months or ten years, and never rescan the monthly amounts or the raw transactions.
+import json
+import os
+import threading
+
+import numpy as np
+
+from finance.cache import content_hash
+from finance.expenses import FIXED_RATIO_THRESHOLD
+from finance.statements import month_name
+
+DEFAULT_DIRECTORY = os.environ.get('INDIVIDUALS_TOOL_HISTORY', 'spending_history')
+# Windows (in months) Current You compares
+ROLLING_WINDOWS = (3, 6, 12)
+
+_VALUE = np.dtype('<f8')
+
+
+# Function to write a file through a temporary copy, so readers never see it half-written
+def _replace_file(path, text):
+    temporary = f"{path}.tmp"
+    with open(temporary, 'w', encoding='utf-8') as handle:
+        handle.write(text)
+    os.replace(temporary, path)
+
+
+# One user's monthly spending history (see the module comment for the layout); safe to share between sessions
+class MonthlySpending:
+    def __init__(self, directory):
+        self.directory = directory
+        self._lock = threading.Lock()
+        # Memory maps of the columns, kept until the next write changes the files under them
+        self._maps = {}
+        os.makedirs(os.path.join(directory, 'amounts'), exist_ok=True)
+        os.makedirs(os.path.join(directory, 'cumulative'), exist_ok=True)
+        meta_path = os.path.join(directory, 'meta.json')
+        if os.path.exists(meta_path):
+            with open(meta_path, encoding='utf-8') as handle:
+                meta = json.load(handle)
+        else:
+            meta = {'first_month': None, 'months': 0, 'categories': [], 'fixed': []}
+        self.first_month = meta['first_month']
+        self.months = meta['months']
+        self.categories = meta['categories']
+        self.fixed = set(meta['fixed'])
+
+    @property
+    def last_month(self):
+        return None if self.first_month is None else self.first_month + self.months - 1
+
+    def _path(self, kind, column):
+        return os.path.join(self.directory, kind, f"{column}.f8")
+
+    # Function to memory-map one column (kind is 'amounts' or 'cumulative'); an empty array when there are no months
+    def _column(self, kind, column):
+        if not self.months:
+            return np.zeros(0)
+        mapped = self._maps.get((kind, column))
+        if mapped is None:
+            mapped = self._maps[(kind, column)] = np.memmap(self._path(kind, column), dtype=_VALUE, mode='r', shape=(self.months,))
+        return mapped
+
+    # Function to write a column's values from row `start` on, dropping anything after them
+    def _write_column(self, kind, column, start, values):
+        path = self._path(kind, column)
+        with open(path, 'r+b' if os.path.exists(path) else 'w+b') as handle:
+            handle.truncate(start * _VALUE.itemsize)
+            handle.seek(start * _VALUE.itemsize)
+            handle.write(np.asarray(values, dtype=_VALUE).tobytes())
+
+    # Function to store monthly totals: totals[i, j] is categories[i]'s spending in month first_month + j
+    # The months written replace what was stored for them (categories left out count as zero); months before,
+    # between or after the stored ones are added. Categories in fixed_categories are marked fixed; the others
+    # keep their kind, and new ones are variable.
+    def write(self, first_month, categories, totals, fixed_categories=()):
+        totals = np.asarray(totals, dtype=float).reshape(len(categories), -1)
+        count = totals.shape[1]
+        if not count:
+            return
+        with self._lock:
+            old_first, old_months = self.first_month, self.months
+            new_first = first_month if old_first is None else min(old_first, first_month)
+            new_last = first_month + count - 1 if old_first is None else max(self.last_month, first_month + count - 1)
+            new_months = new_last - new_first + 1
+            shift = 0 if old_first is None else old_first - new_first
+            # Rows before `start` are unchanged, so only the rest is rewritten (all of it if the history now starts earlier)
+            start = 0 if shift or old_first is None else min(first_month - new_first, old_months)
+            rows = {category: row for category, row in zip(categories, totals)}
+            all_categories = self.categories + [category for category in categories if category not in self.categories]
+            written_from = first_month - new_first
+            columns = [(column, rows.get(category), column >= len(self.categories)) for column, category in enumerate(all_categories)]
+            columns.append(('recorded', np.ones(count), not old_months))
+            for column, row, is_new in columns:
+                column_start = 0 if is_new else start
+                values = np.zeros(new_months - column_start)
+                if not is_new and old_months:
+                    old = self._column('amounts', column)
+                    # Old row i is new row i + shift; copy the old rows that land at or after column_start
+                    first_old = max(column_start - shift, 0)
+                    values[first_old + shift - column_start:old_months + shift - column_start] = old[first_old:]
+                    before = float(self._column('cumulative', column)[column_start - 1]) if column_start else 0.0
+                else:
+                    before = 0.0
+                window = slice(written_from - column_start, written_from - column_start + count)
+                values[window] = row if row is not None else 0.0
+                self._write_column('amounts', column, column_start, values)
+                self._write_column('cumulative', column, column_start, before + np.cumsum(values))
+            self._maps.clear()
+            self.first_month, self.months, self.categories = new_first, new_months, all_categories
+            self.fixed = (self.fixed - set(categories)) | (set(categories) & set(fixed_categories))
+            _replace_file(os.path.join(self.directory, 'meta.json'), json.dumps({
+                'first_month': self.first_month, 'months': self.months, 'categories': self.categories, 'fixed': sorted(self.fixed),
+            }))
+
+    # Function to store a statements.SpendingHistory's monthly totals
+    def write_history(self, history, fixed_categories=()):
+        if history.first_month is not None:
+            self.write(history.first_month, history.categories, history.totals, fixed_categories)
+
+    # Function to store one month's amounts ({category: amount}), replacing that month if it's already stored
+    def write_month(self, month, amounts, fixed_categories=()):
+        self.write(month, list(amounts), [[amount] for amount in amounts.values()], fixed_categories)
+
+    # Function to get the running totals at the end of each of the given months (rows of the history, -1 for
+    # "before the history starts"), as an array of (columns, months); the columns are the categories by default
+    def _running_totals(self, rows, columns=None):
+        rows = np.asarray(rows)
+        columns = range(len(self.categories)) if columns is None else columns
+        totals = np.zeros((len(columns), len(rows)))
+        inside = rows >= 0
+        for index, column in enumerate(columns):
+            totals[index, inside] = self._column('cumulative', column)[rows[inside]]
+        return totals
+
+    # Function to get the row of the window's last month: end_month, or the last stored month by default
+    def _end_row(self, end_month):
+        if self.first_month is None:
+            raise ValueError("No spending history has been stored yet.")
+        end = self.months - 1 if end_month is None else int(end_month) - self.first_month
+        if not 0 <= end < self.months:
+            raise ValueError(f"{month_name(int(end_month))} is outside the stored history {self.describe()}.")
+        return end
+
+    # Function to get each category's total spending over the `months` months ending at end_month (or the last stored
+    # month), or from the start of the history if it's shorter, with the number of those months that have data
+    def window_totals(self, months, end_month=None):
+        with self._lock:
+            end = self._end_row(end_month)
+            start = max(end - months, -1)
+            totals = self._running_totals([start, end])
+            recorded = self._running_totals([start, end], ['recorded'])
+        return dict(zip(self.categories, (totals[:, 1] - totals[:, 0]).tolist())), int(round(recorded[0, 1] - recorded[0, 0]))
+
+    # Function to get each category's average monthly spending over a window's months with data, as {category: amount}
+    def window_average(self, months, end_month=None):
+        totals, recorded = self.window_totals(months, end_month)
+        return {category: total / recorded if recorded else 0.0 for category, total in totals.items()}
+
+    # Function to get the fixed share of spending over a window (0 when nothing was spent)
+    def fixed_ratio(self, months, end_month=None, fixed_categories=None):
+        totals, _ = self.window_totals(months, end_month)
+        fixed = self.fixed if fixed_categories is None else set(fixed_categories)
+        total = sum(totals.values())
+        return sum(amount for category, amount in totals.items() if category in fixed) / total if total > 0 else 0.0
+
+    # Function to get trailing `months`-month averages for every month of the history, as (month numbers,
+    # {category: array}); each averages over the months with data in its window (0 if there are none)
+    def rolling_average(self, months):
+        with self._lock:
+            if not self.months:
+                return np.zeros(0, dtype=int), {}
+            ends = np.arange(self.months)
+            starts = np.maximum(ends - months, -1)
+            totals = self._running_totals(ends) - self._running_totals(starts)
+            recorded = (self._running_totals(ends, ['recorded']) - self._running_totals(starts, ['recorded']))[0]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            averages = np.where(recorded > 0, totals / recorded, 0.0)
+        return self.first_month + ends, dict(zip(self.categories, averages))
+
+    # Function to get the fixed share of spending over a trailing `months`-month window at every month of the history
+    def fixed_ratio_trend(self, months, fixed_categories=None):
+        month_numbers, averages = self.rolling_average(months)
+        fixed = self.fixed if fixed_categories is None else set(fixed_categories)
+        total = sum(averages.values(), np.zeros(len(month_numbers)))
+        fixed_total = sum((row for category, row in averages.items() if category in fixed), np.zeros(len(month_numbers)))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return month_numbers, np.where(total > 0, fixed_total / total, 0.0)
+
+    # Function to describe the stored months, e.g. 'Jan 2024 - Mar 2025'
+    def describe(self):
+        if self.first_month is None:
+            return 'no months stored'
+        return f"{month_name(self.first_month)} - {month_name(self.last_month)}"
+
+
+# Function to summarise the stored history for Current You: averages and the fixed share over each window
+# in `windows` that the history covers, ending at its last month, plus whether that share is over the threshold
+def history_summary(spending, windows=ROLLING_WINDOWS, fixed_categories=None):
+    summary = []
+    for months in windows:
+        if months > spending.months and summary:
+            break
+        averages = spending.window_average(months)
+        ratio = spending.fixed_ratio(months, fixed_categories=fixed_categories)
+        summary.append({
+            'months': min(months, spending.months), 'averages': averages, 'fixed_ratio': ratio,
+            'fixed_heavy': ratio > FIXED_RATIO_THRESHOLD,
+        })
+    return summary
+
+
+# A directory of users' histories; each user gets a subdirectory named by a hash of their id
+# user_id should be an id the user can't guess for someone else (see identity.owner_id), not a name they type
+class SpendingHistoryStore:
+    def __init__(self, directory=DEFAULT_DIRECTORY):
+        self.directory = directory
+        self._users = {}
+        self._lock = threading.Lock()
+
+    # Function to open a user's history, creating it on first use
+    def user(self, user_id):
+        with self._lock:
+            spending = self._users.get(user_id)
+            if spending is None:
+                spending = self._users[user_id] = MonthlySpending(os.path.join(self.directory, content_hash(user_id)))
+            return spending
+
+
+_default_history_store = None
+_default_history_store_lock = threading.Lock()
+
+
+# Function to get the history store shared by every session in the server process, opening it on first use
+def get_history_store():
+    global _default_history_store
+    with _default_history_store_lock:
+        if _default_history_store is None:
+            _default_history_store = SpendingHistoryStore()
+        return _default_history_store
@@ -0,0 +1,83 @@
+from datetime import date
+
+
+# Function to calculate age from birthday (a date or an ISO "yyyy-mm-dd" string)
+def calculate_age(birthday, today=None):
+    today = date.today() if today is None else today
+    if isinstance(birthday, str):
+        birthday = date.fromisoformat(birthday[:10])
+    return today.year - birthday.year - ((today.month, today.day) < (birthday.month, birthday.day))
+
+
+# Function to calculate the money left each month after expenses and debt payments (never negative)
+def remaining_monthly_funds(responses):
+    remaining = responses.get('paycheck', 0) - responses.get('total_expenses', 0) - responses.get('total_debt_payments', 0)
+    return remaining if remaining > 0 else 0
+
+
+# Function to calculate progress toward each goal from projected account balances
+# Returns one fraction (capped at 1) per goal, or None when the goal's account doesn't exist
+# Each goal is measured against its account's whole balance; the dashboard uses finance.funding instead,
+# which splits an account between the goals it funds
+def goal_progress(goals, account_balances):
+    progress = []
+    for goal in goals:
+        if goal['account'] not in account_balances:
+            progress.append(None)
+        elif goal['cost'] <= 0:
+            progress.append(1.0)
+        else:
+            progress.append(min(account_balances[goal['account']] / goal['cost'], 1.0))
+    return progress
+
+
+# Every number shown on the Individuals dashboard for one set of responses
+# Account balances come from the cash-flow ledger, so they include money freed by paid-off debts, income changes
+# and goal payouts; goal_progress comes from the same run, so goals sharing an account split its balance.
+# cash_flow_changes lists (months from now, remaining monthly funds from then on, reason) after the first month
+class Dashboard:
+    def __init__(self, selected_year, remaining_funds, projection, schedule, account_balances, goal_progress, funding=None, cash_flow_changes=()):
+        self.selected_year = selected_year
+        self.remaining_funds = remaining_funds
+        self.projection = projection
+        self.schedule = schedule
+        self.account_balances = account_balances
+        self.goal_progress = goal_progress
+        self.funding = funding
+        self.cash_flow_changes = cash_flow_changes
+
+
+# Function to turn the responses' income changes ({'year', 'paycheck'} dicts) into (months from now, income) pairs
+def income_change_months(income_changes, current_year):
+    return [(12 * (int(change['year']) - int(current_year)), float(change['paycheck'])) for change in income_changes]
+
+
+# Function to compute the whole dashboard for one set of responses without any UI
+# goal_order is how goals sharing an account are funded (see finance.funding.FUNDING_ORDERS)
+def compute_dashboard(responses, selected_year, current_year=None, start_date=None, goal_order='target_date'):
+    # Imported here so the lighter helpers above don't pull in numpy
+    from finance.amortization import amortize
+    from finance.ledger import household_ledger
+    from finance.models import HouseholdTables
+    from finance.projections import project_tables
+
+    current_year = date.today().year if current_year is None else current_year
+    remaining_funds = remaining_monthly_funds(responses)
+    tables = HouseholdTables.from_responses(responses)
+
+    debts = tables.debts
+    schedule = amortize(debts['amount'], debts['rate'], debts['monthly_payment'], start_date=start_date)
+
+    ledger = household_ledger(
+        tables, responses.get('paycheck', 0), responses.get('total_expenses', 0), responses.get('total_debt_payments', 0),
+        current_year, selected_year, goal_order,
+        debt_names=debts['name'], debt_monthly_payments=debts['monthly_payment'].tolist(),
+        debt_payoff_months=schedule.payment_counts.tolist(),
+        income_changes=income_change_months(responses.get('income_changes', []), current_year),
+    )
+    years = max(int(selected_year) - int(current_year), 0)
+    projection = project_tables(tables, remaining_funds, current_year, selected_year, account_matrix=ledger.account_matrix[:, :years + 1])
+
+    account_balances = projection.account_balances(selected_year)
+    progress = ledger.funding.progress_in(selected_year)
+    return Dashboard(selected_year, remaining_funds, projection, schedule, account_balances, progress, ledger.funding, ledger.inflows[1:])
@@ -0,0 +1,198 @@
+import heapq
+import itertools
+
+import numpy as np
+
+from finance.funding import FUNDING_ORDERS, GoalFunding
+from finance.projections import _growth_factors
+
+# Event kinds; events in the same month are applied in this order
+INFLOW = 0  # the remaining monthly funds change (a debt is paid off, income changes)
+GOAL_DUE = 1  # a goal's target year has come: it joins its account's waiting goals
+FUNDING_CHECK = 2  # an account may now hold enough for its first waiting goal: pay out what it can
+SNAPSHOT = 3  # record balances and goal funding at the start of a projection year
+
+# Funding checks that fall short by less than this share of the money needed count as funded,
+# so closed-form round-off doesn't push a payout a month late
+FUNDED_TOLERANCE = 1e-9
+
+
+# Cash-flow engine for a set of accounts: balances grow at their monthly rates with a monthly inflow each,
+# and timestamped events (a heap keyed by month) change the inflows or take money out.
+# Between events every balance is moved forward in closed form, so a quiet stretch costs the same
+# whether it lasts one month or forty years.
+class Ledger:
+    def __init__(self, balances, annual_rates, contributions):
+        self.balances = np.array(balances, dtype=float)
+        self.monthly_rates = np.asarray(annual_rates, dtype=float) / 100 / 12
+        self.contributions = np.array(np.broadcast_to(np.asarray(contributions, dtype=float), self.balances.shape))
+        self.month = 0
+        self._events = []
+        self._sequence = itertools.count()
+
+    # Function to schedule an event; the payload is handed back to the handler when it fires
+    def schedule(self, month, kind, payload=None):
+        heapq.heappush(self._events, (int(month), kind, next(self._sequence), payload))
+
+    # Function to move every balance forward to a later month
+    def advance(self, month):
+        steps = month - self.month
+        if steps <= 0:
+            return
+        growth, annuity = _growth_factors(self.monthly_rates, np.array([float(steps)]))
+        self.balances = self.balances * growth[:, 0] + self.contributions * annuity[:, 0]
+        self.month = month
+
+    # Function to take money out of one account now
+    def withdraw(self, account, amount):
+        self.balances[account] -= amount
+
+    # Function to get the months until an account holds at least target at the current inflow (None if never)
+    def months_until(self, account, target):
+        balance = self.balances[account]
+        if balance >= target:
+            return 0
+        rate = self.monthly_rates[account]
+        contribution = self.contributions[account]
+        if rate == 0:
+            return int(np.ceil((target - balance) / contribution - 1e-9)) if contribution > 0 else None
+        # B (1 + r)^m + c ((1 + r)^m - 1) / r >= T  <=>  (1 + r)^m >= (T + c / r) / (B + c / r)
+        floor = contribution / rate
+        if balance + floor <= 0 or target + floor <= 0:
+            return None
+        return int(np.ceil(np.log((target + floor) / (balance + floor)) / np.log1p(rate) - 1e-9))
+
+    # Function to fire events in order until the heap runs dry or the next event is after the last month
+    def run(self, handle, last_month):
+        while self._events and self._events[0][0] <= last_month:
+            month, kind, _, payload = heapq.heappop(self._events)
+            self.advance(month)
+            handle(month, kind, payload)
+
+
+# A household's projected cash flows: account balances at the start of each year once money freed by paid-off
+# debts, income changes and goal payouts is accounted for, the goals' funding, and the inflow changes applied
+# inflows is a list of (month, remaining monthly funds from then on, reason)
+class HouseholdLedger:
+    def __init__(self, start_year, account_names, account_matrix, funding, inflows):
+        self.start_year = start_year
+        self.account_names = account_names
+        self.account_matrix = account_matrix
+        self.funding = funding
+        self.inflows = inflows
+
+
+# Function to run a household's cash flows as events from start_year to end_year (or the last target year)
+# The remaining monthly funds (income - expenses - debt payments still being made, never negative) are split
+# across accounts by allocation; a debt's payment flows back in once debt_payoff_months says it's paid off
+# (-1 for never), and income_changes are (month, new monthly income) pairs. Goals sharing an account are
+# queued as in finance.funding and paid out once fully funded and due.
+def household_ledger(tables, income, expenses, debt_payments, start_year, end_year, order='target_date',
+                     debt_names=(), debt_monthly_payments=(), debt_payoff_months=(), income_changes=()):
+    if order not in FUNDING_ORDERS:
+        raise ValueError(f"Unknown funding order {order!r}; expected one of {FUNDING_ORDERS}.")
+    accounts = tables.accounts
+    account_index = accounts.index_by('name')
+    goals = tables.goals
+    kept = [account in account_index for account in goals['account']]
+    keep = np.array(kept, dtype=bool)
+    goal_names = [name for name, is_kept in zip(goals['name'], kept) if is_kept]
+    goal_accounts = np.array([account_index[account] for account in goals['account'] if account in account_index], dtype=int)
+    costs = goals['cost'][keep]
+    target_years = goals['target_year'][keep]
+    priorities = target_years if order == 'target_date' else np.arange(len(costs), dtype=float)
+    start_year = int(start_year)
+    end_year = max([int(end_year)] + [int(year) for year in target_years])
+    last_month = 12 * max(end_year - start_year, 0)
+
+    # Goals in queue order: by account, then priority, then position in the goal list
+    queue = np.lexsort((np.arange(len(costs)), priorities, goal_accounts))
+    queued_accounts = goal_accounts[queue]
+    queued_costs = costs[queue]
+    group_start = np.searchsorted(queued_accounts, queued_accounts, side='left')
+    is_open = np.ones(len(queue), dtype=bool)
+    withdrawal_month = np.full(len(queue), -1)
+    # Per account: due goals not yet paid out (a heap of queue positions) and the current funding check's version
+    waiting = [[] for _ in range(len(accounts))]
+    check_version = [0] * len(accounts)
+
+    shares = tables.allocations / 100
+    state = {'income': float(income), 'debt_payments': float(debt_payments)}
+
+    def remaining_funds():
+        return max(state['income'] - expenses - state['debt_payments'], 0.0)
+
+    ledger = Ledger(accounts['balance'], accounts['interest_rate'], remaining_funds() * shares)
+    inflows = [(0, remaining_funds(), None)]
+    years = last_month // 12 + 1
+    account_matrix = np.empty((len(accounts), years))
+    funded = np.empty((len(queue), years))
+
+    for month, name, payment in zip(debt_payoff_months, debt_names, debt_monthly_payments):
+        if 0 <= month < last_month:
+            ledger.schedule(month, INFLOW, ('debt', name, payment))
+    for month, new_income in income_changes:
+        if 0 <= month < last_month:
+            ledger.schedule(month, INFLOW, ('income', None, new_income))
+    for position, target_year in enumerate(target_years[queue]):
+        ledger.schedule(max(12 * (int(target_year) - start_year), 0), GOAL_DUE, position)
+    for year in range(years):
+        ledger.schedule(12 * year, SNAPSHOT)
+
+    # Function to pay out an account's waiting goals while it holds enough for the first one, then schedule
+    # a check for when it will hold enough for the next. A goal needs its account to hold its cost plus what
+    # the open goals ahead of it claim, and that never shrinks down the queue, so only the first waiting goal
+    # can be next; paying it out takes its cost off both sides, so the others' timing doesn't change.
+    def check_account(month, account):
+        queue_heap = waiting[account]
+        while queue_heap:
+            position = queue_heap[0]
+            start = group_start[position]
+            needed = queued_costs[start:position + 1][is_open[start:position + 1]].sum()
+            if ledger.balances[account] < needed - FUNDED_TOLERANCE * max(needed, 1.0):
+                wait = ledger.months_until(account, needed)
+                check_version[account] += 1
+                if wait is not None and month + wait <= last_month:
+                    ledger.schedule(month + max(wait, 1), FUNDING_CHECK, (account, check_version[account]))
+                return
+            heapq.heappop(queue_heap)
+            ledger.withdraw(account, queued_costs[position])
+            is_open[position] = False
+            withdrawal_month[position] = month
+
+    def handle(month, kind, payload):
+        if kind == INFLOW:
+            reason, name, amount = payload
+            if reason == 'debt':
+                state['debt_payments'] -= amount
+            else:
+                state['income'] = float(amount)
+            ledger.contributions = remaining_funds() * shares
+            inflows.append((month, remaining_funds(), f"{name} paid off" if reason == 'debt' else "Income change"))
+            # Accounts with goals waiting on their funding now get there at a different pace
+            for account, queue_heap in enumerate(waiting):
+                if queue_heap:
+                    check_account(month, account)
+        elif kind == GOAL_DUE:
+            account = queued_accounts[payload]
+            heapq.heappush(waiting[account], payload)
+            check_account(month, account)
+        elif kind == FUNDING_CHECK:
+            account, version = payload
+            if version == check_version[account]:
+                check_account(month, account)
+        else:
+            year = month // 12
+            account_matrix[:, year] = ledger.balances
+            needed = np.where(is_open, queued_costs, 0.0)
+            ahead = np.cumsum(needed) - needed
+            ahead -= ahead[group_start]
+            set_aside = np.clip(ledger.balances[queued_accounts] - ahead, 0.0, needed)
+            funded[:, year] = np.where(is_open, set_aside, queued_costs)
+
+    ledger.run(handle, last_month)
+
+    # Back to the goals' own order
+    order_back = np.argsort(queue)
+    funding = GoalFunding(start_year, goal_names, costs, target_years, kept, funded[order_back], withdrawal_month[order_back], account_matrix)
+    return HouseholdLedger(start_year, list(accounts['name']), account_matrix, funding, inflows)
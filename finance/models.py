@@ -0,0 +1,276 @@
+import numpy as np
+
+
+# Base for the compact single-item records; subclasses list their fields in __slots__
+class Record:
+    __slots__ = ()
+
+    def __init__(self, *values, **named):
+        for field, value in zip(self.__slots__, values):
+            setattr(self, field, value)
+        for field, value in named.items():
+            setattr(self, field, value)
+
+    # Function to build a record from the app's stored shape: a tuple, a dict or another record
+    @classmethod
+    def coerce(cls, item):
+        if isinstance(item, cls):
+            return item
+        if isinstance(item, dict):
+            return cls(*(item.get(field) for field in cls.__slots__))
+        return cls(*item)
+
+    def to_tuple(self):
+        return tuple(getattr(self, field) for field in self.__slots__)
+
+    def to_dict(self):
+        return {field: getattr(self, field) for field in self.__slots__}
+
+    def __eq__(self, other):
+        return type(self) is type(other) and self.to_tuple() == other.to_tuple()
+
+    def __repr__(self):
+        return f"{type(self).__name__}({', '.join(f'{field}={getattr(self, field)!r}' for field in self.__slots__)})"
+
+
+# Bank account, stored by individuals_tool as a (name, type, interest_rate, balance) tuple
+class Account(Record):
+    __slots__ = ('name', 'type', 'interest_rate', 'balance')
+
+
+class Debt(Record):
+    __slots__ = ('name', 'amount', 'rate', 'monthly_payment')
+
+
+class Asset(Record):
+    __slots__ = ('name', 'value', 'rate')
+
+
+# Goal funded from an account (individuals_tool)
+class Goal(Record):
+    __slots__ = ('name', 'cost', 'target_year', 'account')
+
+
+# Goal with its own savings plan (future_you)
+class PlanGoal(Record):
+    __slots__ = ('goal_name', 'goal_amount', 'current_savings', 'interest_rate', 'monthly_contribution', 'target_year', 'goal_type')
+
+
+# Struct-of-arrays store: numeric fields live in float64 numpy arrays (handed out as views),
+# text fields in plain lists. Appends grow the arrays geometrically.
+# table['field'] is a column; table[index], iteration and tolist() give rows back in the shape the apps
+# stored them in before (ROW_SHAPE: a tuple or a dict), so app code can keep the table instead of the list.
+class ColumnTable:
+    RECORD = None
+    TEXT_FIELDS = ()
+    NUMBER_FIELDS = ()
+    # Numeric fields given back as ints (e.g. years)
+    INTEGER_FIELDS = ()
+    ROW_SHAPE = dict
+
+    def __init__(self, capacity=0):
+        self._size = 0
+        self._text = {field: [] for field in self.TEXT_FIELDS}
+        self._numbers = {field: np.empty(capacity) for field in self.NUMBER_FIELDS}
+
+    # Function to build a table from records in any of the app's stored shapes; a table is returned as it is
+    @classmethod
+    def from_records(cls, items):
+        if isinstance(items, cls):
+            return items
+        records = [cls.RECORD.coerce(item) for item in items]
+        table = cls()
+        table._size = len(records)
+        for field in cls.TEXT_FIELDS:
+            table._text[field] = [getattr(record, field) for record in records]
+        for field in cls.NUMBER_FIELDS:
+            values = (getattr(record, field) for record in records)
+            table._numbers[field] = np.fromiter((np.nan if value is None else value for value in values), dtype=float, count=len(records))
+        return table
+
+    def __len__(self):
+        return self._size
+
+    # Function to get a column by name (a numpy view for numeric fields, a list for text fields), or a row by index
+    def __getitem__(self, key):
+        if not isinstance(key, str):
+            return self.row(key)
+        if key in self._numbers:
+            return self._numbers[key][:self._size]
+        return self._text[key]
+
+    # Function to replace a row with an item in any of the app's stored shapes
+    def __setitem__(self, index, item):
+        index = self._position(index)
+        record = self.RECORD.coerce(item)
+        for field in self.TEXT_FIELDS:
+            self._text[field][index] = getattr(record, field)
+        for field in self.NUMBER_FIELDS:
+            value = getattr(record, field)
+            self._numbers[field][index] = np.nan if value is None else value
+
+    def __delitem__(self, index):
+        self.remove(index)
+
+    # Function to turn a possibly negative row index into a position in the columns
+    def _position(self, index):
+        if not -self._size <= index < self._size:
+            raise IndexError(index)
+        return index % self._size
+
+    def _grow(self, needed):
+        capacity = len(next(iter(self._numbers.values()))) if self._numbers else needed
+        if needed <= capacity:
+            return
+        capacity = max(needed, capacity * 2, 8)
+        for field, column in self._numbers.items():
+            grown = np.empty(capacity)
+            grown[:self._size] = column[:self._size]
+            self._numbers[field] = grown
+
+    def append(self, item):
+        record = self.RECORD.coerce(item)
+        self._grow(self._size + 1)
+        for field in self.TEXT_FIELDS:
+            self._text[field].append(getattr(record, field))
+        for field in self.NUMBER_FIELDS:
+            value = getattr(record, field)
+            self._numbers[field][self._size] = np.nan if value is None else value
+        self._size += 1
+
+    def remove(self, index):
+        index = self._position(index)
+        for column in self._text.values():
+            del column[index]
+        for column in self._numbers.values():
+            column[index:self._size - 1] = column[index + 1:self._size]
+        self._size -= 1
+
+    # Function to get one row back as a record (missing numbers come back as None)
+    def record(self, index):
+        index = self._position(index)
+        values = []
+        for field in self.RECORD.__slots__:
+            if field in self._text:
+                values.append(self._text[field][index])
+            else:
+                value = float(self._numbers[field][index])
+                values.append(None if np.isnan(value) else int(value) if field in self.INTEGER_FIELDS else value)
+        return self.RECORD(*values)
+
+    def records(self):
+        return (self.record(index) for index in range(self._size))
+
+    # Function to get one row in ROW_SHAPE
+    def row(self, index):
+        record = self.record(index)
+        return record.to_tuple() if self.ROW_SHAPE is tuple else record.to_dict()
+
+    def __iter__(self):
+        return (self.row(index) for index in range(self._size))
+
+    # Function to get every row in ROW_SHAPE, e.g. to save the table as JSON (content_hash uses it too)
+    def tolist(self):
+        return list(self)
+
+    def total(self, field):
+        return float(self[field].sum())
+
+    # Function to build a new table from the given row indices, in that order
+    def take(self, indices):
+        indices = np.asarray(indices, dtype=np.int64)
+        table = type(self)()
+        table._size = len(indices)
+        for field, column in self._text.items():
+            table._text[field] = [column[index] for index in indices]
+        for field in self.NUMBER_FIELDS:
+            table._numbers[field] = self[field][indices]
+        return table
+
+    # Function to get a copy of the table sorted by one numeric field
+    def sorted_by(self, field, descending=False):
+        order = np.argsort(self[field], kind='stable')
+        return self.take(order[::-1] if descending else order)
+
+    # Function to index rows by a text field (e.g. name -> row); later rows win on duplicates
+    def index_by(self, field):
+        return {value: index for index, value in enumerate(self._text[field])}
+
+    # Function to change a text field from one value to another in every row, e.g. when an account is renamed
+    def replace(self, field, old, new):
+        self._text[field] = [new if value == old else value for value in self._text[field]]
+
+
+class AccountTable(ColumnTable):
+    RECORD = Account
+    TEXT_FIELDS = ('name', 'type')
+    NUMBER_FIELDS = ('interest_rate', 'balance')
+    ROW_SHAPE = tuple
+
+
+class DebtTable(ColumnTable):
+    RECORD = Debt
+    TEXT_FIELDS = ('name',)
+    NUMBER_FIELDS = ('amount', 'rate', 'monthly_payment')
+
+
+class AssetTable(ColumnTable):
+    RECORD = Asset
+    TEXT_FIELDS = ('name',)
+    NUMBER_FIELDS = ('value', 'rate')
+
+
+class GoalTable(ColumnTable):
+    RECORD = Goal
+    TEXT_FIELDS = ('name', 'account')
+    NUMBER_FIELDS = ('cost', 'target_year')
+    INTEGER_FIELDS = ('target_year',)
+
+
+class PlanGoalTable(ColumnTable):
+    RECORD = PlanGoal
+    TEXT_FIELDS = ('goal_name', 'goal_type')
+    NUMBER_FIELDS = ('goal_amount', 'current_savings', 'interest_rate', 'monthly_contribution', 'target_year')
+    INTEGER_FIELDS = ('target_year',)
+
+
+# Tables for the item lists in an individuals_tool responses dict, by key
+RESPONSE_TABLES = {'accounts': AccountTable, 'debts': DebtTable, 'assets': AssetTable, 'goals': GoalTable}
+
+
+# Function to get a responses dict with its item lists as tables, the way Individuals keeps it in session state
+def tabulate_responses(responses):
+    return {key: RESPONSE_TABLES[key].from_records(value) if key in RESPONSE_TABLES else value for key, value in responses.items()}
+
+
+# Function to get the plain responses dict back from tabulate_responses' shape, with lists of tuples and dicts
+# (e.g. to save it as JSON)
+def plain_responses(responses):
+    return {key: value.tolist() if isinstance(value, ColumnTable) else value for key, value in responses.items()}
+
+
+# Columnar view of one set of individuals_tool responses; item lists that are already tables are used as they are
+class HouseholdTables:
+    def __init__(self, accounts, debts, assets, goals, allocations):
+        self.accounts = accounts
+        self.debts = debts
+        self.assets = assets
+        self.goals = goals
+        # Share of remaining funds (%) going to each account, aligned with the account rows
+        self.allocations = allocations
+
+    @classmethod
+    def from_responses(cls, responses):
+        accounts = AccountTable.from_records(responses.get('accounts', []))
+        allocations = responses.get('allocations', {})
+        return cls(
+            accounts,
+            DebtTable.from_records(responses.get('debts', [])),
+            AssetTable.from_records(responses.get('assets', [])),
+            GoalTable.from_records(responses.get('goals', [])),
+            np.array([allocations.get(name, 0) for name in accounts['name']], dtype=float),
+        )
+
+    # Function to get each account's monthly contribution given the remaining monthly funds
+    def account_contributions(self, remaining_funds):
+        return remaining_funds * (self.allocations / 100)
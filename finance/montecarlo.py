@@ -0,0 +1,226 @@
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from finance.funding import FUNDING_ORDERS
+from finance.ledger import FUNDED_TOLERANCE
+from finance.models import HouseholdTables
+
+# Most paths simulated per account; fewer are used once the estimates settle (see _converged)
+DEFAULT_PATHS = 20_000
+# Paths are simulated in blocks so a single block's (paths x months) matrix stays small
+PATH_BLOCK = 2_000
+# Simulation stops once every goal probability's standard error is within this (the dashboard shows whole percents)
+PROBABILITY_TOLERANCE = 0.005
+# ... and the final year's percentiles' standard error is within this fraction of their value
+PERCENTILE_TOLERANCE = 0.01
+# Below this many simulated path-months the work runs inline instead of on the process pool
+POOL_THRESHOLD = 5_000_000
+PERCENTILES = (10, 50, 90)
+
+# Default annual volatility (%) of returns by account type
+DEFAULT_VOLATILITY = {
+    'Chequing': 0.0,
+    'Regular Savings': 0.0,
+    'HYSA': 0.0,
+    'Invested': 15.0,
+    'Registered': 15.0,
+}
+
+_executor = None
+
+
+# Function to get the shared process pool, creating it on first use
+# Workers are spawned rather than forked: forking the threaded Streamlit server can copy a lock held by another thread
+def _get_executor(max_workers=None):
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(max_workers=max_workers or os.cpu_count(),
+                                        mp_context=multiprocessing.get_context('spawn'))
+    return _executor
+
+
+# Function to check whether the paths simulated so far pin down the goal probabilities and final-year percentiles
+# reached has one column per goal, True on the paths where it was paid out by the end of its target year
+# A percentile's standard error is read off the sample itself: the values one standard error of rank either side
+def _converged(yearly, reached):
+    n = len(yearly)
+    for probability in reached.mean(axis=0):
+        if np.sqrt(probability * (1 - probability) / n) > PROBABILITY_TOLERANCE:
+            return False
+    for percentile in PERCENTILES:
+        q = percentile / 100
+        error = np.sqrt(q * (1 - q) / n)
+        low, value, high = np.percentile(yearly[:, -1], [100 * max(q - error, 0), percentile, 100 * min(q + error, 1)])
+        if (high - low) / 2 > PERCENTILE_TOLERANCE * abs(value):
+            return False
+    return True
+
+
+# Function to pay out an account's goals along each path, with the rules of finance.funding: a goal is paid out
+# in the first month, from its due month on, that its account holds its cost plus the costs of the open goals
+# ahead of it in the queue (costs are in queue order)
+# balances and growth are (paths, months + 1) arrays of the balance before any payouts and exp(cumulative log
+# return) at each month; returns the balances after payouts and the month each goal was paid out (-1 if never)
+# Rather than stepping through the months, each round finds every path's next payout month with one search
+# over all of them; a payout can't make another goal payable the same month, so there are at most as many
+# rounds as goals
+def _pay_goals(balances, growth, costs, due_months):
+    size, width = balances.shape
+    month = np.arange(width)
+    rows = np.arange(size)
+    is_open = np.ones((size, len(costs)), dtype=bool)
+    paid_month = np.full((size, len(costs)), -1)
+    after = balances
+    earliest = np.zeros(size, dtype=int)
+    for _ in range(len(costs)):
+        claimed = np.cumsum(np.where(is_open, costs, 0.0), axis=1)
+        short = claimed - FUNDED_TOLERANCE * np.maximum(claimed, 1.0)
+        next_month = np.full(size, width)
+        for goal, due in enumerate(due_months):
+            payable = (after >= short[:, goal, None]) & (month >= np.maximum(earliest, due)[:, None]) & is_open[:, goal, None]
+            next_month = np.minimum(next_month, np.where(payable.any(axis=1), payable.argmax(axis=1), width))
+        paying = next_month < width
+        if not paying.any():
+            break
+        at = np.minimum(next_month, width - 1)
+        paid = paying[:, None] & is_open & (after[rows, at][:, None] >= short) & (at[:, None] >= due_months)
+        paid_month = np.where(paid, at[:, None], paid_month)
+        # The payout leaves the account and the rest of the path grows from the lower balance
+        payout = (paid * costs).sum(axis=1) / growth[rows, at]
+        after = after - np.where(month >= at[:, None], growth * payout[:, None], 0.0)
+        is_open &= ~paid
+        earliest = at + 1
+    return after, paid_month
+
+
+# Function to simulate one account's year-end balances along many random return paths
+# Monthly log returns are normal with a mean chosen so the expected monthly growth matches annual_rate / 12,
+# so a volatility of 0 reproduces the fixed-rate projection exactly
+# goal_checks lists the account's goals as (year_index, cost) pairs in funding queue order; each path pays them
+# out as in finance.funding, so the balances are after payouts and a goal's probability is the share of paths
+# paying it out by the end of its target year. Returns (percentiles, goal_probabilities)
+# Blocks of paths are added until _converged, up to n_paths
+def _simulate_account(principal, annual_rate, volatility, monthly_contribution, years, n_paths, seed, account_index, goal_checks):
+    months = years * 12
+    sigma = volatility / 100 / np.sqrt(12)
+    mu = np.log1p(annual_rate / 100 / 12) - sigma ** 2 / 2
+    due_months = np.array([12 * max(year_index, 0) for year_index, _ in goal_checks], dtype=int)
+    deadlines = np.array([12 * year_index + 11 for year_index, _ in goal_checks], dtype=int)
+    costs = np.array([cost for _, cost in goal_checks], dtype=float)
+
+    yearly = np.empty((n_paths, years + 1))
+    reached = np.zeros((n_paths, len(goal_checks)), dtype=bool)
+    for block_index, start in enumerate(range(0, n_paths, PATH_BLOCK)):
+        size = min(PATH_BLOCK, n_paths - start)
+        # Seeding by (account, block) keeps results identical whatever the number of workers
+        rng = np.random.default_rng(np.random.SeedSequence(seed, spawn_key=(account_index, block_index)))
+        cumulative = np.zeros((size, months + 1))
+        cumulative[:, 1:] = np.cumsum(rng.normal(mu, sigma, size=(size, months)), axis=1)
+        growth = np.exp(cumulative)
+        # Balance after month t: exp(L_t) * (principal + contribution * sum_{0<s<=t} exp(-L_s))
+        inflows = np.zeros((size, months + 1))
+        inflows[:, 1:] = np.cumsum(1 / growth[:, 1:], axis=1)
+        balances = growth * (principal + monthly_contribution * inflows)
+        if goal_checks:
+            balances, paid_month = _pay_goals(balances, growth, costs, due_months)
+            reached[start:start + size] = (paid_month >= 0) & (paid_month <= deadlines)
+        yearly[start:start + size] = balances[:, ::12]
+        if _converged(yearly[:start + size], reached[:start + size]):
+            yearly = yearly[:start + size]
+            reached = reached[:start + size]
+            break
+
+    percentiles = np.percentile(yearly, PERCENTILES, axis=0)
+    return percentiles, reached.mean(axis=0).tolist()
+
+
+# Results of a Monte Carlo run over a set of accounts
+class MonteCarloResult:
+    def __init__(self, start_year, account_names, percentiles, goal_probabilities):
+        self.start_year = start_year
+        self.account_names = account_names
+        self.percentiles = percentiles  # shape (accounts, len(PERCENTILES), years + 1)
+        self.goal_probabilities = goal_probabilities
+
+    # Function to get the (P10, P50, P90) balances of every account in a given year
+    def account_percentiles(self, year):
+        index = int(year) - self.start_year
+        if index < 0 or index >= self.percentiles.shape[2]:
+            raise ValueError(f"Year {year} is outside the simulated range.")
+        return {name: tuple(self.percentiles[i, :, index].tolist()) for i, name in enumerate(self.account_names)}
+
+
+# Function to run the Monte Carlo simulation for many accounts
+# goal_checks has one list of (year_index, cost) pairs per account, in funding queue order (see _simulate_account)
+# Accounts are spread over a process pool once the job is large enough to be worth it
+def simulate_accounts(principals, annual_rates, volatilities, monthly_contributions, years, goal_checks=None,
+                      n_paths=DEFAULT_PATHS, seed=0, max_workers=None):
+    years = max(int(years), 0)
+    count = len(principals)
+    if goal_checks is None:
+        goal_checks = [[] for _ in range(count)]
+    jobs = [
+        (float(principals[i]), float(annual_rates[i]), float(volatilities[i]), float(monthly_contributions[i]),
+         years, int(n_paths), seed, i, goal_checks[i])
+        for i in range(count)
+    ]
+
+    if count > 1 and count * n_paths * years * 12 >= POOL_THRESHOLD:
+        results = list(_get_executor(max_workers).map(_simulate_account, *zip(*jobs)))
+    else:
+        results = [_simulate_account(*job) for job in jobs]
+
+    percentiles = np.empty((count, len(PERCENTILES), years + 1))
+    goal_probabilities = []
+    for i, (account_percentiles, probabilities) in enumerate(results):
+        percentiles[i] = account_percentiles
+        goal_probabilities.append(probabilities)
+    return percentiles, goal_probabilities
+
+
+# Function to simulate every account in a set of dashboard responses
+# Goals sharing an account are queued for its money by order, one of finance.funding.FUNDING_ORDERS, as on the dashboard
+# Returns a MonteCarloResult whose goal_probabilities line up with responses['goals'] (None if the account is missing)
+def simulate_responses(responses, start_year, end_year, volatility_by_type=None, n_paths=DEFAULT_PATHS, seed=0,
+                       order='target_date'):
+    if order not in FUNDING_ORDERS:
+        raise ValueError(f"Unknown funding order {order!r}; expected one of {FUNDING_ORDERS}.")
+    volatility_by_type = DEFAULT_VOLATILITY if volatility_by_type is None else volatility_by_type
+    tables = HouseholdTables.from_responses(responses)
+    accounts = tables.accounts
+    goals = tables.goals
+
+    # Simulate far enough to cover the snapshot year and every goal's target year
+    last_year = int(max(int(end_year), goals['target_year'].max(initial=0)))
+    years = max(last_year - int(start_year), 0)
+
+    account_names = list(accounts['name'])
+    account_index = accounts.index_by('name')
+    # Each account's goals in queue order: by priority, then position in the goal list
+    queued = [[] for _ in account_names]
+    for position, (account_name, target_year) in enumerate(zip(goals['account'], goals['target_year'].tolist())):
+        i = account_index.get(account_name)
+        if i is not None:
+            queued[i].append((target_year if order == 'target_date' else position, position))
+    goal_checks = [[] for _ in account_names]
+    goal_slots = [None] * len(goals)
+    for i, account_goals in enumerate(queued):
+        for _, position in sorted(account_goals):
+            goal_slots[position] = (i, len(goal_checks[i]))
+            goal_checks[i].append((int(goals['target_year'][position]) - int(start_year), float(goals['cost'][position])))
+
+    percentiles, probabilities = simulate_accounts(
+        accounts['balance'],
+        accounts['interest_rate'],
+        [volatility_by_type.get(account_type, 0.0) for account_type in accounts['type']],
+        tables.account_contributions(responses.get('remaining_funds', 0)),
+        years,
+        goal_checks=goal_checks,
+        n_paths=n_paths,
+        seed=seed,
+    )
+    goal_probabilities = [None if slot is None else probabilities[slot[0]][slot[1]] for slot in goal_slots]
+    return MonteCarloResult(int(start_year), account_names, percentiles, goal_probabilities)
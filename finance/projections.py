@@ -0,0 +1,92 @@
+import numpy as np
+
+from finance.models import HouseholdTables
+
+
+# Function to compute the growth and annuity factors for a set of monthly rates and month offsets
+# (1 + r) ** m is evaluated as exp(m * log1p(r)) so a whole matrix costs one exp call
+def _growth_factors(monthly_rates, months):
+    log_growth = months[np.newaxis, :] * np.log1p(monthly_rates)[:, np.newaxis]
+    growth = np.exp(log_growth)
+    # ((1 + r) ** m - 1) / r, falling back to m when the rate is 0 (no interest)
+    safe_rates = np.where(monthly_rates == 0, 1.0, monthly_rates)[:, np.newaxis]
+    annuity = np.where(
+        monthly_rates[:, np.newaxis] == 0,
+        months[np.newaxis, :],
+        np.expm1(log_growth) / safe_rates,
+    )
+    return growth, annuity
+
+
+# Function to project balances month by month for many accounts/assets in one batched call
+# principals, annual_rates (%) and monthly_contributions have one entry per item
+# Returns a matrix of shape (items, len(months))
+def project_monthly(principals, annual_rates, monthly_contributions, months):
+    principals = np.asarray(principals, dtype=float)
+    monthly_rates = np.asarray(annual_rates, dtype=float) / 100 / 12
+    monthly_contributions = np.broadcast_to(np.asarray(monthly_contributions, dtype=float), principals.shape)
+    months = np.asarray(months, dtype=float)
+
+    growth, annuity = _growth_factors(monthly_rates, months)
+    return principals[:, np.newaxis] * growth + monthly_contributions[:, np.newaxis] * annuity
+
+
+# Function to project balances year by year (years 0..years inclusive) for many accounts/assets
+def project_yearly(principals, annual_rates, monthly_contributions, years):
+    months = np.arange(int(years) + 1) * 12
+    return project_monthly(principals, annual_rates, monthly_contributions, months)
+
+
+# Function to calculate a single future value with the same engine
+def future_value(principal, annual_rate, years, monthly_contribution):
+    return float(project_monthly([principal], [annual_rate], [monthly_contribution], [years * 12])[0, 0])
+
+
+# Precomputed year-by-year balances for every account and asset in a set of dashboard responses
+class DashboardProjection:
+    def __init__(self, start_year, account_names, account_matrix, asset_names, asset_matrix):
+        self.start_year = start_year
+        self.account_names = account_names
+        self.account_matrix = account_matrix
+        self.asset_names = asset_names
+        self.asset_matrix = asset_matrix
+
+    @property
+    def end_year(self):
+        return self.start_year + self.account_matrix.shape[1] - 1
+
+    # Function to get the column index for a calendar year
+    def year_index(self, year):
+        index = int(year) - self.start_year
+        if index < 0 or index >= self.account_matrix.shape[1]:
+            raise ValueError(f"Year {year} is outside the projected range {self.start_year}-{self.end_year}.")
+        return index
+
+    # Function to get projected account balances in a given year, keyed by account name
+    def account_balances(self, year):
+        column = self.account_matrix[:, self.year_index(year)]
+        return dict(zip(self.account_names, column.tolist()))
+
+    # Function to get projected asset values in a given year, as (name, value) pairs
+    def asset_values(self, year):
+        column = self.asset_matrix[:, self.year_index(year)]
+        return list(zip(self.asset_names, column.tolist()))
+
+
+# Function to build the projection matrix for every account and asset from columnar household tables
+# account_matrix, when given, holds account balances already projected elsewhere (e.g. by finance.ledger)
+def project_tables(tables, remaining_funds, start_year, end_year, account_matrix=None):
+    years = max(int(end_year) - int(start_year), 0)
+    accounts = tables.accounts
+    if account_matrix is None:
+        account_matrix = project_yearly(accounts['balance'], accounts['interest_rate'], tables.account_contributions(remaining_funds), years)
+    assets = tables.assets
+    asset_matrix = project_yearly(assets['value'], assets['rate'], 0.0, years)
+    return DashboardProjection(int(start_year), list(accounts['name']), account_matrix, list(assets['name']), asset_matrix)
+
+
+# Function to build the projection matrix for every account and asset in the responses
+# Accounts are (name, type, interest_rate, balance) tuples and assets are dicts, as stored by individuals_tool
+def project_responses(responses, start_year, end_year):
+    tables = HouseholdTables.from_responses(responses)
+    return project_tables(tables, responses.get('remaining_funds', 0), start_year, end_year)
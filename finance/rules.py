@@ -0,0 +1,139 @@
+# Keyword rules for categorizing transactions, compiled into one pattern.
+# Rules are (category, keywords) pairs checked in order: a description belongs to the first rule with one of its
+# keywords in it as whole words (case-insensitive), so 'rent' matches "RENT PAYMENT" but not "CURRENT ELECTRIC". Rather than testing every keyword against every description, all keywords are
+# merged into a single trie-shaped regex that finds every keyword occurrence in one scan of the description, and
+# each occurrence is scored by its rule's position. Compiled rule sets are cached, and each remembers the rule
+# for the descriptions it has seen, so a batch only scans the descriptions that are new.
+import functools
+import re
+
+import numpy as np
+
+# Rule sets kept compiled (the defaults plus a few users' own rules)
+COMPILED_RULES_CACHE = 32
+# Rule ids returned for a description no rule matches
+NO_MATCH = -1
+# Characters a whole-word keyword can't be next to
+_WORD_CHAR = re.compile(r'\w')
+# Descriptions whose rule id an engine remembers; beyond this the memo starts over, so exports full of one-off
+# descriptions (reference numbers, card terminals) still classify in bounded memory
+MATCH_MEMO_SIZE = 100_000
+
+
+# Function to build a regex matching any of the words, with shared prefixes factored out (a trie)
+# At each position it matches the longest word starting there; with whole_word, only words that aren't followed by
+# a letter, digit or underscore (the caller checks the character before)
+def _trie_pattern(words, whole_word=False):
+    trie = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[''] = True
+    end = r'(?!\w)' if whole_word else ''
+
+    def emit(node):
+        # Longer words first, so a word ending here is only tried once they fail
+        branches = [re.escape(char) + emit(child) for char, child in sorted(node.items()) if char]
+        if '' in node:
+            branches.append(end)
+        return branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+
+    return emit(trie)
+
+
+# A compiled set of keyword rules
+# rules lists each (keyword, category) in priority order; a rule id is a position in it
+# With whole_word=False keywords match anywhere in a description, as plain substrings
+class RuleEngine:
+    def __init__(self, rules, whole_word=True):
+        self.rules = []
+        self.whole_word = whole_word
+        priority = {}
+        for category, keywords in rules:
+            for keyword in keywords:
+                keyword = keyword.lower().strip() if whole_word else keyword.lower()
+                if keyword and keyword not in priority:
+                    priority[keyword] = len(self.rules)
+                    self.rules.append((keyword, category))
+        # The scan reports the longest keyword at each position; every shorter keyword that is a prefix of it
+        # matches there too (as a whole word, when the keyword goes on with a non-word character), so score each
+        # keyword by the best rule among its matching keyword prefixes
+        self._score = {
+            keyword: min(
+                priority[keyword[:length]] for length in range(1, len(keyword) + 1)
+                if keyword[:length] in priority
+                and not (whole_word and length < len(keyword) and _WORD_CHAR.match(keyword[length]))
+            )
+            for keyword in priority
+        }
+        start = r'(?<!\w)' if whole_word else ''
+        self._pattern = re.compile(f'(?={start}({_trie_pattern(priority, whole_word)}))') if priority else None
+        self.categories = [category for _, category in self.rules]
+        self._memo = {}
+
+    # Function to get the id of the first rule matching a description, or NO_MATCH
+    def match(self, description):
+        rule = self._memo.get(description)
+        if rule is None:
+            if len(self._memo) >= MATCH_MEMO_SIZE:
+                self._memo.clear()
+            rule = self._memo[description] = self._match(description)
+        return rule
+
+    def _match(self, description):
+        if self._pattern is None:
+            return NO_MATCH
+        score = self._score
+        matches = self._pattern.findall(description.lower())
+        return min(score[keyword] for keyword in matches) if matches else NO_MATCH
+
+    # Function to get the category for a description (None for a transfer rule), or default when no rule matches
+    def category(self, description, default=None):
+        rule = self.match(description)
+        return default if rule == NO_MATCH else self.categories[rule]
+
+    # Function to classify a batch of descriptions in one pass, as an array of rule ids (NO_MATCH where none match)
+    def classify(self, descriptions):
+        return np.fromiter(map(self.match, descriptions), dtype=int, count=len(descriptions))
+
+    # Function to count the matches (and add up the amounts) for each rule over classified rule ids
+    def match_counts(self, rule_ids, amounts=None):
+        rule_ids = np.asarray(rule_ids, dtype=int)
+        counts = np.bincount(rule_ids + 1, minlength=len(self.rules) + 1)
+        totals = np.bincount(rule_ids + 1, weights=amounts, minlength=len(self.rules) + 1) if amounts is not None else None
+        return counts, totals
+
+    # Function to list per-rule statistics from match_counts' arrays, most used rule first, as dicts with the
+    # keyword, category, number of matches and amount; descriptions no rule matched come last, with keyword None
+    def statistics(self, counts, totals=None):
+        stats = [
+            {'keyword': self.rules[rule][0], 'category': self.rules[rule][1], 'matches': int(counts[rule + 1]),
+             'amount': float(totals[rule + 1]) if totals is not None else None}
+            for rule in np.flatnonzero(counts[1:])
+        ]
+        stats.sort(key=lambda row: -row['matches'])
+        if counts[0]:
+            stats.append({'keyword': None, 'category': None, 'matches': int(counts[0]),
+                          'amount': float(totals[0]) if totals is not None else None})
+        return stats
+
+
+# Function to get the compiled engine for a rule set (a tuple of (category, keywords tuple) pairs), compiling it once
+@functools.lru_cache(maxsize=COMPILED_RULES_CACHE)
+def compile_rules(rules, whole_word=True):
+    return RuleEngine(rules, whole_word)
+
+
+# Function to parse a user's own rules, one 'keyword: Category' per line, into a rule set (blank lines are skipped)
+# Raises ValueError naming the first line that isn't a rule
+def parse_rules(text):
+    rules = []
+    for number, line in enumerate(text.splitlines(), start=1):
+        if not line.strip():
+            continue
+        keyword, separator, category = line.partition(':')
+        if not separator or not keyword.strip() or not category.strip():
+            raise ValueError(f"Line {number} should look like 'keyword: Category', got {line.strip()!r}.")
+        rules.append((category.strip(), (keyword.strip(),)))
+    return tuple(rules)
@@ -0,0 +1,314 @@
+# Write-behind sync of submitted profiles to a Google Sheet. Sessions only queue rows; a background
+# thread coalesces them (the latest row per key wins) and writes each batch with one batch_update call,
+# retrying with backoff, so the UI never waits on the Sheets API or spends quota per rerun.
+import atexit
+import os
+import random
+import threading
+import time
+from collections import deque
+
+SPREADSHEET_KEY = os.environ.get('INDIVIDUALS_TOOL_SHEET')
+CREDENTIALS_PATH = os.environ.get('INDIVIDUALS_TOOL_SHEET_CREDENTIALS', 'service_account.json')
+WORKSHEET = os.environ.get('INDIVIDUALS_TOOL_WORKSHEET', 'Profiles')
+
+PROFILE_HEADER = [
+    'Key', 'Updated', 'Age', 'Monthly Income', 'Total Expenses', 'Debt Payments', 'Remaining Funds',
+    'Accounts', 'Account Balances', 'Debts', 'Assets', 'Goals',
+]
+
+
+# Function to build the sheet row for one submitted Individuals profile
+def profile_row(key, responses, updated=None):
+    return [
+        key,
+        time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(updated)),
+        responses.get('age', ''),
+        round(float(responses.get('paycheck', 0)), 2),
+        round(float(responses.get('total_expenses', 0)), 2),
+        round(float(responses.get('total_debt_payments', 0)), 2),
+        round(float(responses.get('remaining_funds', 0)), 2),
+        len(responses.get('accounts', [])),
+        round(sum(float(account[3]) for account in responses.get('accounts', [])), 2),
+        round(sum(float(debt['amount']) for debt in responses.get('debts', [])), 2),
+        round(sum(float(asset['value']) for asset in responses.get('assets', [])), 2),
+        len(responses.get('goals', [])),
+    ]
+
+
+# Function to convert a 1-based column number to its A1 letters (1 -> A, 27 -> AA)
+def column_letter(column):
+    letters = ''
+    while column > 0:
+        column, remainder = divmod(column - 1, 26)
+        letters = chr(ord('A') + remainder) + letters
+    return letters
+
+
+# Function to group (row number, values) pairs into batch_update ranges, one per run of consecutive rows
+def batch_ranges(rows):
+    data = []
+    for row_number, values in sorted(rows, key=lambda item: item[0]):
+        last = data[-1] if data else None
+        if last is not None and last['end'] + 1 == row_number and len(last['values'][0]) == len(values):
+            last['end'] = row_number
+            last['values'].append(values)
+        else:
+            data.append({'start': row_number, 'end': row_number, 'values': [values]})
+    return [
+        {'range': f"A{run['start']}:{column_letter(len(run['values'][0]))}{run['end']}", 'values': run['values']}
+        for run in data
+    ]
+
+
+# Worksheet backed by the Sheets API through gspread; the client is authorised once, on first use
+class GspreadBackend:
+    def __init__(self, spreadsheet_key, worksheet=WORKSHEET, credentials_path=CREDENTIALS_PATH):
+        self.spreadsheet_key = spreadsheet_key
+        self.worksheet_name = worksheet
+        self.credentials_path = credentials_path
+        self._worksheet = None
+
+    def worksheet(self):
+        if self._worksheet is None:
+            import gspread
+
+            client = gspread.service_account(filename=self.credentials_path)
+            spreadsheet = client.open_by_key(self.spreadsheet_key)
+            try:
+                self._worksheet = spreadsheet.worksheet(self.worksheet_name)
+            except gspread.exceptions.WorksheetNotFound:
+                self._worksheet = spreadsheet.add_worksheet(self.worksheet_name, rows=1000, cols=len(PROFILE_HEADER))
+        return self._worksheet
+
+    def column_values(self, column):
+        return self.worksheet().col_values(column)
+
+    def batch_update(self, data):
+        self.worksheet().batch_update(data, value_input_option='RAW')
+
+    # Rate limits (429), server errors and dropped connections are worth retrying; bad requests are not
+    def is_retryable(self, error):
+        import gspread
+
+        if isinstance(error, gspread.exceptions.APIError):
+            return error.code == 429 or error.code >= 500
+        return isinstance(error, (ConnectionError, TimeoutError, OSError))
+
+
+# In-memory stand-in for a worksheet, with the same interface as GspreadBackend
+# fail_next makes the next n batch_update calls raise error; calls records every batch written
+class FakeSheetsBackend:
+    def __init__(self, fail_next=0, error=ConnectionError):
+        self.cells = {}
+        self.calls = []
+        self.fail_next = fail_next
+        self.error = error
+        self._lock = threading.Lock()
+
+    def column_values(self, column):
+        with self._lock:
+            last_row = max((row for row, col in self.cells if col == column), default=0)
+            values = [self.cells.get((row, column), '') for row in range(1, last_row + 1)]
+        return values
+
+    def batch_update(self, data):
+        with self._lock:
+            if self.fail_next > 0:
+                self.fail_next -= 1
+                raise self.error("fake sheets backend unavailable")
+            self.calls.append(data)
+            for update in data:
+                start = int(update['range'].split(':')[0].lstrip('ABCDEFGHIJKLMNOPQRSTUVWXYZ'))
+                for row_offset, values in enumerate(update['values']):
+                    for col_offset, value in enumerate(values):
+                        self.cells[(start + row_offset, col_offset + 1)] = value
+
+    def is_retryable(self, error):
+        return isinstance(error, (ConnectionError, TimeoutError, OSError))
+
+    # Function to read back the sheet as a list of rows, header first
+    def rows(self):
+        with self._lock:
+            last_row = max((row for row, _ in self.cells), default=0)
+            last_col = max((col for _, col in self.cells), default=0)
+            return [[self.cells.get((row, col), '') for col in range(1, last_col + 1)] for row in range(1, last_row + 1)]
+
+
+# Write-behind queue of keyed rows: submit() only records the row, and a background thread writes
+# whatever is pending every flush_interval seconds (or as soon as max_batch rows are waiting).
+# Each key owns one sheet row, found in the key column on first write or appended after the last row.
+# A batch that still fails after its retries goes back on the queue at most max_requeues times; rows that
+# run out of requeues, or fail with an error that isn't worth retrying, move to a failed list holding the
+# last max_failed of them (see failed()), so a broken sheet can't keep the queue busy forever.
+class SheetSync:
+    def __init__(self, backend, header=PROFILE_HEADER, flush_interval=2.0, max_batch=500,
+                 max_retries=5, backoff=0.5, max_backoff=30.0, max_requeues=3, max_failed=100):
+        self.backend = backend
+        self.header = list(header)
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.max_requeues = max_requeues
+        self._pending = {}
+        # Times each pending key's row has gone back on the queue after a failed batch
+        self._requeues = {}
+        self._failed = deque(maxlen=max_failed)
+        self._row_numbers = None
+        self._next_row = None
+        self._condition = threading.Condition()
+        self._write_lock = threading.Lock()
+        self._thread = None
+        self._closed = False
+        self._stats = {'submitted': 0, 'coalesced': 0, 'rows_written': 0, 'batches': 0, 'retries': 0, 'failed_batches': 0, 'failed_rows': 0}
+
+    # Function to queue a row for key, replacing any row for the same key that hasn't been written yet
+    def submit(self, key, values):
+        with self._condition:
+            if self._closed:
+                raise RuntimeError("SheetSync is closed.")
+            self._stats['submitted'] += 1
+            if key in self._pending:
+                self._stats['coalesced'] += 1
+                del self._pending[key]
+            self._pending[key] = list(values)
+            self._requeues.pop(key, None)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='sheet-sync', daemon=True)
+                self._thread.start()
+            if len(self._pending) >= self.max_batch:
+                self._condition.notify()
+
+    # Function to write everything queued so far, on the calling thread; returns the rows written
+    def flush(self):
+        written = 0
+        while True:
+            batch = self._take()
+            if not batch:
+                return written
+            if not self._write(batch):
+                return written
+            written += len(batch)
+
+    # Function to stop the background thread after writing whatever is still queued
+    def close(self, timeout=None):
+        with self._condition:
+            self._closed = True
+            self._condition.notify()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        self.flush()
+
+    def pending(self):
+        with self._condition:
+            return len(self._pending)
+
+    def stats(self):
+        with self._condition:
+            return dict(self._stats, pending=len(self._pending), failed=len(self._failed))
+
+    # Function to list the most recent rows given up on, as (key, values, error) tuples, oldest first
+    def failed(self):
+        with self._condition:
+            return list(self._failed)
+
+    def _run(self):
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: self._pending or self._closed)
+                if self._closed:
+                    return
+                # Leave the window open so rows from other sessions (and reruns of this one) join the batch
+                self._condition.wait_for(lambda: len(self._pending) >= self.max_batch or self._closed, self.flush_interval)
+                if self._closed:
+                    return
+            self.flush()
+
+    def _take(self):
+        with self._condition:
+            keys = list(self._pending)[:self.max_batch]
+            return [(key, self._pending.pop(key)) for key in keys]
+
+    # Function to write one batch with a single batch_update call, retrying with exponential backoff and jitter
+    # Rows that still fail go back on the queue (unless a newer row for the same key arrived meanwhile) while
+    # the error is retryable and they have requeues left; otherwise they move to the failed list
+    def _write(self, batch):
+        with self._write_lock:
+            error = None
+            for attempt in range(self.max_retries + 1):
+                if attempt:
+                    with self._condition:
+                        self._stats['retries'] += 1
+                    delay = min(self.max_backoff, self.backoff * 2 ** (attempt - 1))
+                    time.sleep(delay * random.uniform(0.5, 1.0))
+                try:
+                    data, row_numbers, next_row = self._batch_data(batch)
+                    self.backend.batch_update(data)
+                except Exception as exc:
+                    error = exc
+                    if not self.backend.is_retryable(exc):
+                        break
+                else:
+                    self._row_numbers, self._next_row = row_numbers, next_row
+                    with self._condition:
+                        self._stats['batches'] += 1
+                        self._stats['rows_written'] += len(batch)
+                        for key, _ in batch:
+                            self._requeues.pop(key, None)
+                    return True
+            retryable = self.backend.is_retryable(error)
+            with self._condition:
+                self._stats['failed_batches'] += 1
+                self._stats['last_error'] = repr(error)
+                for key, values in batch:
+                    if key in self._pending:
+                        continue
+                    requeues = self._requeues.get(key, 0)
+                    if retryable and requeues < self.max_requeues:
+                        self._requeues[key] = requeues + 1
+                        self._pending[key] = values
+                    else:
+                        self._requeues.pop(key, None)
+                        self._failed.append((key, values, repr(error)))
+                        self._stats['failed_rows'] += 1
+            return False
+
+    # Function to map the batch onto sheet rows; the key column is read once, then new rows are tracked locally
+    # Returns the batch_update data plus the row assignments to keep once it has been written
+    def _batch_data(self, batch):
+        rows = []
+        if self._row_numbers is None:
+            keys = self.backend.column_values(1)
+            if not keys:
+                rows.append((1, self.header))
+                keys = [self.header[0]]
+            row_numbers = {key: number for number, key in enumerate(keys, start=1) if number > 1}
+            next_row = len(keys) + 1
+        else:
+            row_numbers, next_row = dict(self._row_numbers), self._next_row
+        for key, values in batch:
+            number = row_numbers.get(str(key))
+            if number is None:
+                number = row_numbers[str(key)] = next_row
+                next_row += 1
+            rows.append((number, values))
+        return batch_ranges(rows), row_numbers, next_row
+
+
+_default_sync = None
+_default_sync_lock = threading.Lock()
+
+
+# Function to get the sync shared by every session in the server process
+# Returns None when no spreadsheet is configured (INDIVIDUALS_TOOL_SHEET), so logging is simply skipped
+def get_sheet_sync():
+    global _default_sync
+    if not SPREADSHEET_KEY:
+        return None
+    with _default_sync_lock:
+        if _default_sync is None:
+            _default_sync = SheetSync(GspreadBackend(SPREADSHEET_KEY))
+            atexit.register(_default_sync.close, 10)
+        return _default_sync
@@ -0,0 +1,397 @@
+# Statement import for Current You: bank and credit card exports (CSV, or OFX/QFX) are read in chunks and their
+# spending is added up per category per month as it streams past. Only the running monthly totals are kept,
+# so a multi-year export with hundreds of thousands of transactions never has to fit in memory at once.
+import csv
+import io
+import os
+import re
+from datetime import datetime, timedelta
+from html import unescape
+from itertools import islice
+
+import numpy as np
+
+from finance.rules import NO_MATCH, compile_rules
+
+# Transactions categorized and added to the totals at a time
+CHUNK_ROWS = 10_000
+# Months averaged into the Current You inputs, as its description suggests
+AVERAGE_MONTHS = 3
+# Category for spending no rule or statement category places
+UNCATEGORIZED = 'Other'
+
+# Current You's fixed expense categories; imported spending in any other category counts as variable
+FIXED_CATEGORIES = ('Housing', 'Utilities', 'Insurance', 'Transportation', 'Debt Payments', 'Groceries')
+
+# Keyword rules, checked in order: a transaction goes to the first category with a keyword in its description
+# (case-insensitive, as whole words, so plurals and run-together merchant names are listed too; see finance.rules).
+# A category of None marks money moving between the user's own accounts, which isn't spending.
+DEFAULT_CATEGORY_RULES = (
+    (None, ('payment thank you', 'payment - thank you', 'payment received', 'internal transfer', 'transfer to savings')),
+    ('Dining Out', ('restaurant', 'restaurants', 'cafe', 'coffee', 'starbucks', 'tim hortons', 'mcdonald', 'mcdonalds',
+                    'doordash', 'uber eats', 'skipthedishes', 'pizza')),
+    ('Housing', ('rent', 'mortgage', 'property tax', 'strata', 'hoa')),
+    ('Utilities', ('hydro', 'electric', 'water', 'internet', 'comcast', 'verizon', 'rogers', 'telus', 'at&t', 'mobile', 'wireless')),
+    ('Insurance', ('insurance', 'geico', 'allstate', 'state farm')),
+    ('Transportation', ('uber', 'lyft', 'transit', 'parking', 'chevron', 'esso', 'petro', 'petrocan', 'exxon', 'exxonmobil', 'fuel')),
+    ('Debt Payments', ('loan payment', 'student loan', 'navient', 'line of credit')),
+    ('Groceries', ('grocery', 'groceries', 'safeway', 'kroger', 'whole foods', 'trader joe', 'costco', 'loblaws', 'sobeys', 'aldi')),
+    ('Fun (trips, vacations etc.)', ('airbnb', 'expedia', 'airline', 'airlines', 'hotel', 'hotels',
+                                     'netflix', 'spotify', 'cinema', 'ticketmaster')),
+    ('Shopping', ('amazon', 'amzn', 'walmart', 'wal-mart', 'best buy', 'ikea')),
+)
+
+# Date formats a statement's dates may be in; each file's format is picked once from its first dates (see MonthParser)
+DATE_FORMATS = ('%Y-%m-%d', '%m/%d/%Y', '%d/%m/%Y', '%Y/%m/%d', '%m/%d/%y', '%d/%m/%y', '%d-%b-%Y', '%d %b %Y', '%b %d, %Y', '%Y%m%d')
+# The formats that put the day before the month, and those that put the month before the day
+DAY_FIRST_FORMATS = ('%d/%m/%Y', '%d/%m/%y')
+MONTH_FIRST_FORMATS = ('%m/%d/%Y', '%m/%d/%y')
+# Distinct dates from the start of a file its format is picked from
+DETECT_DATES = 1000
+# Dates before this year don't count as plausible (e.g. '03/04/25' read with a four-digit year is year 25)
+MIN_YEAR = 1900
+
+# CSV header names (lower-case) recognised for each column, most specific first; a header that only contains
+# one of the names matches too. Debit comes before amount, so 'Debit Amount' isn't taken for a signed amount.
+CSV_COLUMNS = {
+    'date': ('transaction date', 'trans. date', 'posted date', 'posting date', 'date'),
+    'description': ('description', 'merchant', 'payee', 'name', 'details', 'memo', 'transaction'),
+    'debit': ('debit', 'withdrawal', 'money out', 'paid out'),
+    'amount': ('amount', 'cad$', 'usd$'),
+    'category': ('category',),
+}
+
+_OFX_TAG = re.compile(r'<(/?)([A-Za-z0-9.]+)>([^<]*)')
+_DATE_PART = re.compile(r'%.|[A-Za-z0-9]')
+
+
+# Function to get a month as a single number (year * 12 + month - 1), so months sort and subtract
+def month_number(year, month):
+    return year * 12 + month - 1
+
+
+# Function to format a month number as e.g. 'Mar 2025'
+def month_name(number):
+    return datetime(number // 12, number % 12 + 1, 1).strftime('%b %Y')
+
+
+# Function to parse an amount like '$1,234.50', '-12.00' or '(12.00)'; None when the cell is blank
+def parse_amount(text):
+    try:
+        return float(text)
+    except ValueError:
+        pass
+    text = text.strip().replace('$', '').replace(',', '').replace(' ', '')
+    if not text:
+        return None
+    if text.startswith('(') and text.endswith(')'):
+        return -float(text[1:-1])
+    return float(text)
+
+
+# Turns one statement's dates into month numbers, remembering every date it has seen (an export repeats each
+# date many times). The file's date format is picked once by detect(), from its first dates, and every date is
+# parsed with it; a date that doesn't fit raises ValueError rather than being read in another format.
+# day_first settles day/month order when the dates can't (True for dd/mm, False for mm/dd, None to detect it).
+class MonthParser:
+    def __init__(self, formats=DATE_FORMATS, day_first=None, today=None):
+        excluded = MONTH_FIRST_FORMATS if day_first else DAY_FIRST_FORMATS if day_first is False else ()
+        self.formats = [fmt for fmt in formats if fmt not in excluded]
+        self.today = datetime.now() if today is None else today
+        self.format = None
+        self._months = {}
+
+    def __call__(self, text):
+        month = self._months.get(text)
+        if month is None:
+            if self.format is None:
+                self.detect([text])
+            parsed = self._parse(text, self.format)
+            if parsed is None:
+                raise ValueError(f"Unrecognised date {text.strip()!r}; the statement's other dates are in the format {self.format}.")
+            month = self._months[text] = month_number(parsed.year, parsed.month)
+        return month
+
+    # Function to get the parts of a date text that may be the date itself: all of it, or what comes before a time
+    @staticmethod
+    def _candidates(text):
+        text = text.strip()
+        return dict.fromkeys((text, text.split(' ')[0], text.split('T')[0]))
+
+    # Function to parse a date in one format, allowing a time after it; None if it doesn't fit
+    def _parse(self, text, fmt):
+        for candidate in self._candidates(text):
+            try:
+                return datetime.strptime(candidate, fmt)
+            except ValueError:
+                continue
+        return None
+
+    # Function to pick the file's format from a sample of its dates (the first DETECT_DATES distinct ones are used)
+    # Only formats that parse every date are considered, and of those the ones that put no date in the future
+    # (or before MIN_YEAR); raises ValueError if none fits, or if the ones left read the dates as different months
+    def detect(self, dates):
+        sample = list(islice(dict.fromkeys(dates), DETECT_DATES))
+        fitting, closest, closest_count = {}, None, 0
+        # Formats whose punctuation differs from the first date's (e.g. '%m/%d/%Y' for '2025-03-04') can't fit
+        shapes = {_DATE_PART.sub('', candidate) for candidate in self._candidates(sample[0])}
+        for fmt in self.formats:
+            if _DATE_PART.sub('', fmt) not in shapes:
+                continue
+            parsed = []
+            # Most formats fail on the first date, so stop at a format's first miss
+            for text in sample:
+                day = self._parse(text, fmt)
+                if day is None:
+                    break
+                parsed.append(day)
+            if len(parsed) == len(sample):
+                fitting[fmt] = parsed
+            elif len(parsed) > closest_count:
+                closest, closest_count = fmt, len(parsed)
+        if not fitting:
+            if closest is None:
+                raise ValueError(f"Unrecognised dates such as {sample[0].strip()!r}.")
+            raise ValueError(f"The statement's dates aren't all in one format: {sample[closest_count].strip()!r} doesn't match the others ({closest}).")
+        latest = self.today + timedelta(days=1)
+        plausible = {fmt: parsed for fmt, parsed in fitting.items() if all(MIN_YEAR <= day.year and day <= latest for day in parsed)}
+        candidates = plausible or fitting
+        months = {tuple(month_number(day.year, day.month) for day in parsed) for parsed in candidates.values()}
+        if len(months) > 1:
+            raise ValueError(
+                f"Can't tell whether dates such as {sample[0].strip()!r} are day/month or month/day "
+                f"(it could be {', '.join(candidates)}); choose the date order and import again."
+            )
+        self.format = next(iter(candidates))
+        self._months.update(zip(sample, next(iter(months))))
+        return self.format
+
+
+# Function to find the column index for each field in a CSV header; raises ValueError if it isn't a statement
+def _csv_columns(header):
+    names = [name.strip().lower() for name in header]
+    columns = {}
+    for field, candidates in CSV_COLUMNS.items():
+        for candidate in candidates:
+            matches = [index for index, name in enumerate(names) if name == candidate]
+            if not matches:
+                matches = [index for index, name in enumerate(names) if candidate in name and index not in columns.values()]
+            if matches:
+                columns[field] = matches[0]
+                break
+    if 'date' not in columns or 'description' not in columns or not ('amount' in columns or 'debit' in columns):
+        raise ValueError(f"Couldn't find date, description and amount columns in the CSV header {header}.")
+    return columns
+
+
+# Function to stream (date text, description, statement category, amount spent) from a CSV statement
+# Money coming in (and zero amounts) is skipped. A single amount column is negative for spending, as in bank
+# exports, unless charges_positive is set, as in most credit card exports; a debit column is always spending.
+def iter_csv_transactions(handle, charges_positive=False):
+    rows = csv.reader(handle)
+    header = next(rows, None)
+    if header is None:
+        return
+    columns = _csv_columns(header)
+    date_column, description_column = columns['date'], columns['description']
+    amount_column, debit_column = columns.get('amount'), columns.get('debit')
+    category_column = columns.get('category')
+    sign = 1.0 if charges_positive else -1.0
+    width = max(columns.values()) + 1
+    for row in rows:
+        if len(row) < width:
+            continue
+        if debit_column is not None:
+            spent = parse_amount(row[debit_column])
+            spent = abs(spent) if spent else None
+        else:
+            spent = parse_amount(row[amount_column])
+            spent = sign * spent if spent is not None else None
+        if spent is None or spent <= 0:
+            continue
+        category = row[category_column].strip() if category_column is not None else ''
+        yield row[date_column], row[description_column].strip(), category, spent
+
+
+# Function to stream (date text, description, '', amount spent) from an OFX/QFX statement (SGML or XML flavour)
+# The file is read read_size characters at a time and scanned tag by tag; only debits are spending.
+def iter_ofx_transactions(handle, read_size=1 << 16):
+    buffer = ''
+    transaction = None
+    while True:
+        block = handle.read(read_size)
+        buffer += block
+        # Leave a tag that may continue in the next block for the next pass
+        cut = len(buffer) if not block else buffer.rfind('<')
+        if cut > 0:
+            for closing, tag, text in _OFX_TAG.findall(buffer, 0, cut):
+                tag = tag.upper()
+                if tag == 'STMTTRN':
+                    if not closing:
+                        transaction = {}
+                    elif transaction is not None:
+                        amount = transaction.get('TRNAMT')
+                        if amount is not None and amount < 0 and 'DTPOSTED' in transaction:
+                            description = transaction.get('NAME') or transaction.get('MEMO') or ''
+                            yield transaction['DTPOSTED'][:8], unescape(description), '', -amount
+                        transaction = None
+                elif transaction is not None and not closing and tag in ('DTPOSTED', 'TRNAMT', 'NAME', 'MEMO'):
+                    text = text.strip()
+                    transaction[tag] = parse_amount(text) if tag == 'TRNAMT' else text
+            buffer = buffer[cut:]
+        if not block:
+            return
+
+
+# Function to pick a category: the first keyword rule matching the description, then the statement's own
+# category, then UNCATEGORIZED; None for transfers between the user's own accounts
+def categorize(description, statement_category='', rules=DEFAULT_CATEGORY_RULES):
+    engine = compile_rules(rules)
+    rule = engine.match(description)
+    return statement_category or UNCATEGORIZED if rule == NO_MATCH else engine.categories[rule]
+
+
+# Running spending totals per category per month, added to one chunk of transactions at a time
+# totals holds one row per category and one column per month from first_month to last_month
+class SpendingHistory:
+    def __init__(self):
+        self.categories = []
+        self._category_index = {}
+        self.first_month = None
+        self.totals = np.zeros((0, 0))
+        self.transactions = 0
+        # (keyword, category) -> [transactions matched, amount]; keyword None for those no rule matched
+        self.rule_matches = {}
+
+    @property
+    def last_month(self):
+        return None if self.first_month is None else self.first_month + self.totals.shape[1] - 1
+
+    # Function to get the row for a category, adding one if it's new
+    def category_index(self, category):
+        index = self._category_index.get(category)
+        if index is None:
+            index = self._category_index[category] = len(self.categories)
+            self.categories.append(category)
+        return index
+
+    # Function to add a chunk of transactions given as parallel sequences of month numbers, category rows and amounts
+    def add(self, months, category_rows, amounts):
+        months = np.asarray(months, dtype=int)
+        if not len(months):
+            return
+        category_rows = np.asarray(category_rows, dtype=int)
+        first = int(months.min()) if self.first_month is None else min(self.first_month, int(months.min()))
+        last = int(months.max()) if self.first_month is None else max(self.last_month, int(months.max()))
+        shape = (len(self.categories), last - first + 1)
+        if shape != self.totals.shape:
+            grown = np.zeros(shape)
+            if self.first_month is not None:
+                offset = self.first_month - first
+                grown[:self.totals.shape[0], offset:offset + self.totals.shape[1]] = self.totals
+            self.totals = grown
+            self.first_month = first
+        cells = category_rows * shape[1] + (months - first)
+        self.totals += np.bincount(cells, weights=amounts, minlength=shape[0] * shape[1]).reshape(shape)
+        self.transactions += len(months)
+
+    # Function to add per-rule statistics from RuleEngine.statistics to the running ones
+    def add_rule_statistics(self, statistics):
+        for row in statistics:
+            matches = self.rule_matches.setdefault((row['keyword'], row['category']), [0, 0.0])
+            matches[0] += row['matches']
+            matches[1] += row['amount']
+
+    # Function to list how many transactions (and how much spending) each rule caught, most used first,
+    # with the transactions no rule caught last
+    def rule_statistics(self):
+        rows = [
+            {'keyword': keyword, 'category': category, 'matches': matches, 'amount': round(amount, 2)}
+            for (keyword, category), (matches, amount) in self.rule_matches.items()
+        ]
+        rows.sort(key=lambda row: (row['keyword'] is None, -row['matches']))
+        return rows
+
+    # Function to get each category's average monthly spending over the last `months` months of the history, or
+    # all of it if shorter (months without spending in a category count as zero), as {category: amount}
+    def recent_average(self, months=AVERAGE_MONTHS):
+        if self.first_month is None:
+            return {}
+        window = self.totals[:, -months:]
+        averages = window.sum(axis=1) / window.shape[1]
+        return {category: round(float(average), 2) for category, average in zip(self.categories, averages) if average > 0}
+
+    # Function to describe the months that recent_average covers, e.g. 'Jan 2025 - Mar 2025'
+    def recent_window(self, months=AVERAGE_MONTHS):
+        if self.first_month is None:
+            return ''
+        return f"{month_name(max(self.last_month - months + 1, self.first_month))} - {month_name(self.last_month)}"
+
+
+# Function to pick the transaction reader for a file from its name
+def statement_reader(file_name):
+    extension = file_name.rsplit('.', 1)[-1].lower()
+    if extension == 'csv':
+        return iter_csv_transactions
+    if extension in ('ofx', 'qfx'):
+        return iter_ofx_transactions
+    raise ValueError(f"Unsupported statement file {file_name!r}; expected .csv, .ofx or .qfx.")
+
+
+# Function to stream a statement into a SpendingHistory (a new one unless given), chunk_rows transactions at a time
+# source is a path or a binary file object such as a Streamlit upload; file_name picks the reader when it's a file object
+# The date format is picked from the first chunk's dates; day_first is passed to MonthParser
+def import_statement(source, file_name=None, history=None, charges_positive=False, rules=DEFAULT_CATEGORY_RULES, chunk_rows=CHUNK_ROWS, day_first=None):
+    history = SpendingHistory() if history is None else history
+    file_name = file_name or getattr(source, 'name', None) or str(source)
+    reader = statement_reader(file_name)
+    opened = isinstance(source, (str, os.PathLike))
+    if opened:
+        handle = open(source, encoding='utf-8-sig', errors='replace', newline='')
+    else:
+        handle = io.TextIOWrapper(source, encoding='utf-8-sig', errors='replace', newline='')
+    parse_month = MonthParser(day_first=day_first)
+    engine = compile_rules(rules)
+    try:
+        transactions = reader(handle, charges_positive) if reader is iter_csv_transactions else reader(handle)
+        while True:
+            chunk = list(islice(transactions, chunk_rows))
+            if not chunk:
+                break
+            dates, descriptions, statement_categories, spent = zip(*chunk)
+            if parse_month.format is None:
+                parse_month.detect(dates)
+            amounts = np.array(spent)
+            rule_ids = engine.classify(descriptions)
+            history.add_rule_statistics(engine.statistics(*engine.match_counts(rule_ids, amounts)))
+            # History row per transaction: its rule's category, or for no match its statement's; -1 for transfers
+            rules_seen, rule_index = np.unique(rule_ids, return_inverse=True)
+            rule_rows = np.array([
+                -1 if rule == NO_MATCH or engine.categories[rule] is None else history.category_index(engine.categories[rule])
+                for rule in rules_seen
+            ], dtype=int)
+            rows = rule_rows[rule_index]
+            unmatched = np.flatnonzero(rule_ids == NO_MATCH)
+            rows[unmatched] = [history.category_index(statement_categories[i] or UNCATEGORIZED) for i in unmatched]
+            spending = np.flatnonzero(rows >= 0)
+            months = [parse_month(dates[i]) for i in spending]
+            history.add(months, rows[spending], amounts[spending])
+    finally:
+        if opened:
+            handle.close()
+        else:
+            # Leave the caller's file object open
+            handle.detach()
+    return history
+
+
+# Function to split average monthly spending into Current You's fixed and variable categories
+# Categories already on the page stay on their side; new ones are fixed only if they're in fixed_categories
+def split_fixed_variable(averages, fixed_expenses=(), variable_expenses=(), fixed_categories=FIXED_CATEGORIES):
+    fixed, variable = {}, {}
+    for category, amount in averages.items():
+        if category in fixed_expenses or (category not in variable_expenses and category in fixed_categories):
+            fixed[category] = amount
+        else:
+            variable[category] = amount
+    return fixed, variable
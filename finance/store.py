@@ -0,0 +1,212 @@
+# Local SQLite store for saved scenarios: the inputs of one user's scenario in one app, plus any
+# precomputed results, which are only returned while they still match the saved inputs.
+# Results are stored as an .npz archive holding their arrays and a JSON description of everything else, read back
+# with allow_pickle=False, so loading a result never runs code; objects are limited to the types in RESULT_TYPES.
+import importlib
+import io
+import json
+import os
+import sqlite3
+import threading
+import time
+from datetime import date
+
+from finance.cache import content_hash
+
+DEFAULT_PATH = os.environ.get('INDIVIDUALS_TOOL_DB', 'scenarios.db')
+
+# Classes a stored result may contain, by name, with the module defining them; they're rebuilt from their attributes
+RESULT_TYPES = {
+    'Dashboard': 'finance.household',
+    'DashboardProjection': 'finance.projections',
+    'AmortizationSchedule': 'finance.amortization',
+    'GoalFunding': 'finance.funding',
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS scenarios (
+    user_id TEXT NOT NULL,
+    app TEXT NOT NULL,
+    scenario TEXT NOT NULL,
+    inputs TEXT NOT NULL,
+    input_hash TEXT NOT NULL,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (user_id, app, scenario)
+);
+CREATE INDEX IF NOT EXISTS scenarios_by_user ON scenarios (user_id, app, updated_at);
+CREATE TABLE IF NOT EXISTS results (
+    user_id TEXT NOT NULL,
+    app TEXT NOT NULL,
+    scenario TEXT NOT NULL,
+    name TEXT NOT NULL,
+    input_hash TEXT NOT NULL,
+    payload BLOB NOT NULL,
+    PRIMARY KEY (user_id, app, scenario, name)
+);
+"""
+
+
+# Function to encode a result as bytes: lists, tuples, dicts, dates, numbers, strings, None, numpy arrays
+# and the objects in RESULT_TYPES; raises TypeError for anything else
+def encode_result(value):
+    import numpy as np
+
+    arrays = {}
+
+    def encode(item):
+        if item is None or isinstance(item, (bool, int, float, str)):
+            return item
+        if isinstance(item, np.generic):
+            return item.item()
+        if isinstance(item, np.ndarray):
+            if item.dtype.hasobject:
+                return {'object_array': [encode(element) for element in item.ravel().tolist()], 'shape': list(item.shape)}
+            name = f"array_{len(arrays)}"
+            arrays[name] = item
+            return {'array': name}
+        if isinstance(item, date):
+            return {'date': item.isoformat()}
+        if isinstance(item, (list, tuple)):
+            return {'list' if isinstance(item, list) else 'tuple': [encode(element) for element in item]}
+        if isinstance(item, dict):
+            return {'dict': [[encode(key), encode(element)] for key, element in item.items()]}
+        type_name = type(item).__name__
+        if RESULT_TYPES.get(type_name) == type(item).__module__:
+            return {'object': type_name, 'attributes': encode(vars(item))}
+        raise TypeError(f"Can't store a {type(item).__module__}.{type_name} in a scenario result.")
+
+    structure = json.dumps(encode(value), separators=(',', ':'))
+    buffer = io.BytesIO()
+    np.savez(buffer, structure=np.frombuffer(structure.encode('utf-8'), dtype=np.uint8), **arrays)
+    return buffer.getvalue()
+
+
+# Function to decode bytes from encode_result; raises ValueError if they aren't an encoded result
+def decode_result(payload):
+    import numpy as np
+
+    try:
+        archive = np.load(io.BytesIO(payload), allow_pickle=False)
+        structure = json.loads(archive['structure'].tobytes().decode('utf-8'))
+    except (OSError, KeyError, UnicodeDecodeError) as error:
+        raise ValueError(f"Not a stored scenario result: {error}") from error
+
+    def decode(item):
+        if not isinstance(item, dict):
+            return item
+        if 'array' in item:
+            return archive[item['array']]
+        if 'object_array' in item:
+            elements = np.empty(len(item['object_array']), dtype=object)
+            elements[:] = [decode(element) for element in item['object_array']]
+            return elements.reshape(item['shape'])
+        if 'date' in item:
+            return date.fromisoformat(item['date'])
+        if 'list' in item:
+            return [decode(element) for element in item['list']]
+        if 'tuple' in item:
+            return tuple(decode(element) for element in item['tuple'])
+        if 'dict' in item:
+            return {decode(key): decode(element) for key, element in item['dict']}
+        if item.get('object') in RESULT_TYPES:
+            cls = getattr(importlib.import_module(RESULT_TYPES[item['object']]), item['object'])
+            instance = cls.__new__(cls)
+            instance.__dict__.update(decode(item['attributes']))
+            return instance
+        raise ValueError(f"Unknown value in a stored scenario result: {item!r}")
+
+    with archive:
+        return decode(structure)
+
+
+# SQLite-backed scenario store, safe to share between Streamlit sessions (threads)
+# user_id should be an id the user can't guess for someone else (see identity.owner_id), not a name they type
+class ScenarioStore:
+    def __init__(self, path=DEFAULT_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute('PRAGMA journal_mode=WAL')
+        self._connection.executescript(SCHEMA)
+
+    # Function to save (or overwrite) a scenario's inputs and, optionally, results computed from them
+    def save(self, user_id, app, scenario, inputs, results=None):
+        payload = json.dumps(inputs)
+        input_hash = content_hash(json.loads(payload))
+        with self._lock, self._connection:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO scenarios (user_id, app, scenario, inputs, input_hash, updated_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (user_id, app, scenario, payload, input_hash, time.time()),
+            )
+            self._connection.execute(
+                "DELETE FROM results WHERE user_id = ? AND app = ? AND scenario = ?", (user_id, app, scenario)
+            )
+            self._connection.executemany(
+                "INSERT INTO results (user_id, app, scenario, name, input_hash, payload) VALUES (?, ?, ?, ?, ?, ?)",
+                [(user_id, app, scenario, name, input_hash, encode_result(value)) for name, value in (results or {}).items()],
+            )
+
+    # Function to store one more result for a saved scenario, tied to its current inputs
+    def save_result(self, user_id, app, scenario, name, value):
+        with self._lock, self._connection:
+            row = self._connection.execute(
+                "SELECT input_hash FROM scenarios WHERE user_id = ? AND app = ? AND scenario = ?", (user_id, app, scenario)
+            ).fetchone()
+            if row is None:
+                raise KeyError(f"No saved scenario {scenario!r} for {user_id!r}.")
+            self._connection.execute(
+                "INSERT OR REPLACE INTO results (user_id, app, scenario, name, input_hash, payload) VALUES (?, ?, ?, ?, ?, ?)",
+                (user_id, app, scenario, name, row[0], encode_result(value)),
+            )
+
+    # Function to load a scenario; returns (inputs, results) or None if it doesn't exist
+    def load(self, user_id, app, scenario):
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT inputs, input_hash FROM scenarios WHERE user_id = ? AND app = ? AND scenario = ?", (user_id, app, scenario)
+            ).fetchone()
+            if row is None:
+                return None
+            inputs, input_hash = row
+            result_rows = self._connection.execute(
+                "SELECT name, payload FROM results WHERE user_id = ? AND app = ? AND scenario = ? AND input_hash = ?",
+                (user_id, app, scenario, input_hash),
+            ).fetchall()
+        results = {}
+        for name, payload in result_rows:
+            # Results saved in an older format are skipped; they're only a shortcut past recomputing
+            try:
+                results[name] = decode_result(payload)
+            except ValueError:
+                continue
+        return json.loads(inputs), results
+
+    # Function to list a user's saved scenarios for an app, most recently saved first
+    def list_scenarios(self, user_id, app):
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT scenario FROM scenarios WHERE user_id = ? AND app = ? ORDER BY updated_at DESC", (user_id, app)
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def delete(self, user_id, app, scenario):
+        with self._lock, self._connection:
+            self._connection.execute("DELETE FROM scenarios WHERE user_id = ? AND app = ? AND scenario = ?", (user_id, app, scenario))
+            self._connection.execute("DELETE FROM results WHERE user_id = ? AND app = ? AND scenario = ?", (user_id, app, scenario))
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
+
+
+_default_store = None
+_default_store_lock = threading.Lock()
+
+
+# Function to get the store shared by every session in the server process, opening it on first use
+def get_store():
+    global _default_store
+    with _default_store_lock:
+        if _default_store is None:
+            _default_store = ScenarioStore()
+        return _default_store
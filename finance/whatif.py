@@ -0,0 +1,70 @@
+import numpy as np
+
+from finance.models import HouseholdTables
+from finance.projections import _growth_factors
+
+
+# Goal attainment over a grid of assumed returns x monthly savings x horizon years
+# progress has shape (goals, rates, savings, years): each goal's account balance over its cost, capped at 1,
+# and attainment (rates, savings, years) is the mean over the goals, like the dashboard's goal progress
+class ScenarioGrid:
+    def __init__(self, start_year, rates, savings, goal_names, target_years, progress):
+        self.start_year = start_year
+        self.rates = rates
+        self.savings = savings
+        self.goal_names = goal_names
+        self.target_years = target_years
+        self.progress = progress
+        self.attainment = progress.mean(axis=0) if len(goal_names) else np.zeros(progress.shape[1:])
+
+    @property
+    def years(self):
+        return np.arange(self.start_year, self.start_year + self.progress.shape[3])
+
+    # Function to get the (rates x savings) attainment matrix in a calendar year
+    def attainment_in(self, year):
+        index = int(year) - self.start_year
+        if index < 0 or index >= self.progress.shape[3]:
+            raise ValueError(f"Year {year} is outside the scenario grid {self.start_year}-{self.years[-1]}.")
+        return self.attainment[:, :, index]
+
+    # Function to get the smallest monthly savings that fully funds every goal by its target year, per rate
+    # Returns NaN for rates where no savings level on the grid is enough
+    def savings_needed(self):
+        columns = np.clip(self.target_years - self.start_year, 0, self.progress.shape[3] - 1)
+        met = np.all(self.progress[np.arange(len(columns)), :, :, columns] >= 1.0, axis=0)
+        first = np.argmax(met, axis=1)
+        return np.where(met.any(axis=1), self.savings[first], np.nan)
+
+
+# Function to evaluate every (annual return, monthly savings, year) combination in one vectorized pass
+# Every account earns the assumed annual return (%), and the monthly savings are split across accounts
+# by the responses' allocation percentages; goals whose account doesn't exist are left out
+def scenario_grid(responses, rates, savings, start_year, end_year):
+    tables = HouseholdTables.from_responses(responses)
+    rates = np.asarray(rates, dtype=float)
+    savings = np.asarray(savings, dtype=float)
+    months = np.arange(max(int(end_year) - int(start_year), 0) + 1) * 12.0
+
+    # (rates, years) factors, shared by every account since they all earn the assumed return
+    growth, annuity = _growth_factors(rates / 100 / 12, months)
+
+    accounts = tables.accounts
+    account_index = accounts.index_by('name')
+    goals = tables.goals
+    keep = np.array([account in account_index for account in goals['account']], dtype=bool)
+    goal_names = [name for name, kept in zip(goals['name'], keep) if kept]
+    goal_accounts = np.array([account_index[account] for account in goals['account'] if account in account_index], dtype=int)
+    costs = goals['cost'][keep]
+    target_years = goals['target_year'][keep].astype(int)
+
+    # (goals, rates, savings, years) balances of each goal's account
+    principals = accounts['balance'][goal_accounts]
+    shares = tables.allocations[goal_accounts] / 100
+    balances = (
+        principals[:, None, None, None] * growth[None, :, None, :]
+        + shares[:, None, None, None] * savings[None, None, :, None] * annuity[None, :, None, :]
+    )
+    with np.errstate(divide='ignore', invalid='ignore'):
+        progress = np.where(costs[:, None, None, None] > 0, balances / costs[:, None, None, None], 1.0)
+    return ScenarioGrid(int(start_year), rates, savings, goal_names, target_years, np.minimum(progress, 1.0))
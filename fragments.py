@@ -0,0 +1,17 @@
+# Helpers for the apps' @st.fragment editors (goal, debt, account and asset cards).
+# A click inside a fragment normally reruns just that fragment, but the same click can land in a
+# full-page run (e.g. it arrived together with a change elsewhere on the page), where Streamlit
+# refuses a fragment-scoped rerun.
+import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+
+# Function to check whether the current run is a fragment rerun rather than a full-page run
+def in_fragment_rerun():
+    ctx = get_script_run_ctx()
+    return ctx is not None and bool(ctx.fragment_ids_this_run)
+
+
+# Function to rerun after an editor's action: only the fragment if nothing outside it changed, else the page
+def rerun_editor(changed=False):
+    st.rerun(scope="app" if changed or not in_fragment_rerun() else "fragment")
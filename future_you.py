@@ -1,270 +1,203 @@
 import streamlit as st
-import plotly.graph_objects as go
-import pandas as pd
-import numpy as np
 from datetime import date
 
-# Set page config for better layout
-st.set_page_config(layout="wide")
-
-# Define custom CSS styles
-st.markdown("""
-<style>
-/* General styles */
-body {
-    color: #333333;
-    background-color: #f0f2f6;
-}
-
-/* Title and description */
-.title {
-    color: #4B0082;  /* Indigo */
-    text-align: center;
-    margin-bottom: 20px;
-}
-
-.description {
-    background-color: #e6e6fa;  /* Lavender */
-    padding: 20px;
-    border-radius: 10px;
-    margin-bottom: 30px;
-}
-
-/* Section headers */
-.section-header {
-    color: #4B0082;  /* Indigo */
-    margin-top: 30px;
-    margin-bottom: 10px;
-}
-
-/* Section2 headers */
-.section2-header {
-    color: black;  /* Black */
-    margin-top: 10px;
-    margin-bottom: 10px;
-}
-
-/* Input sections */
-.input-section {
-    background-color: #ffffff;
-    padding: 20px;
-    border-radius: 10px;
-    margin-bottom: 30px;
-}
-/* Button styling */
-.stButton>button {
-    color: black;
-    background-color: #e6e6fa;
-    border-radius: 5px;
-    padding: 0.6em 1.2em;
-    font-weight: bold;
-}
-/* Text styling */
-.stApp p, .stApp div, .stApp span, .stApp label {
-    color: #4f4f4f;
-    font-family: 'Verdana', sans-serif;
- }
-/* Add goal section */
-.add-goal-section {
-    padding: 20px;
-    border: 2px dashed #9370DB;  /* Medium Purple */
-    border-radius: 10px;
-    margin-bottom: 30px;
-    background-color: #f9f9ff;
-}
-
-/* Sidebar styles */
-.sidebar .sidebar-content {
-    padding: 20px;
-}
-
-/* Results section */
-.results-section {
-    border: 2px solid #1E90FF;  /* Dodger Blue */
-    padding: 20px;
-    border-radius: 10px;
-    background-color: #f9f9ff;
-    margin-bottom: 30px;
-}
-
-/* Timeline */
-.plotly-chart {
-    margin-bottom: 30px;
-}
-</style>
-""", unsafe_allow_html=True)
-
-# Title and Description
-st.markdown("<h1 class='title'>The Future You Tool</h1>", unsafe_allow_html=True)
-st.markdown("""
-<div class='description'>
-    <h5>Play around with designing the life you want to live. Add multiple goals like a down payment, education, or a vacation. Have fun and design your dream life! A retirement suggestion will be provided based on 20x your current salary. Please edit the year or amount as it makes sense for you in the "Manage Goals" left panel.
-</div>
-""", unsafe_allow_html=True)
-
-# Initialize variables
-current_year = date.today().year
-
-# Initialize session state for goals and edit tracking
-if 'goals' not in st.session_state:
-    st.session_state.goals = []
-if 'retirement_goal_added' not in st.session_state:
-    st.session_state.retirement_goal_added = False
-if 'edit_goal_index' not in st.session_state:
-    st.session_state.edit_goal_index = None
+from fragments import rerun_editor
+from profile_panel import profile_panel, start_profiling
+from profiling import section
+from scenario_panel import scenario_panel
+from startup import lazy_import
+from styles import apply_styles
+
+from finance.cached import contributions_for_months, goal_sweep, months_for_contributions
+from finance.goals import GoalGraph, retirement_goal, target_years_for_months
+
+# Define custom CSS styles, on top of the shared styles
+FUTURE_YOU_STYLES = """
+    /* Input sections */
+    .input-section {
+        background-color: #ffffff;
+        padding: 20px;
+        border-radius: 10px;
+        margin-bottom: 30px;
+    }
+    /* Button styling */
+    .stButton>button {
+        color: black;
+        background-color: #e6e6fa;
+        border-radius: 5px;
+        padding: 0.6em 1.2em;
+        font-weight: bold;
+    }
+    /* Add goal section */
+    .add-goal-section {
+        padding: 20px;
+        border: 2px dashed #9370DB;  /* Medium Purple */
+        border-radius: 10px;
+        margin-bottom: 30px;
+        background-color: #f9f9ff;
+    }
 
-# Inputs Section
-st.markdown("<h2 class='section-header'>Inputs</h2>", unsafe_allow_html=True)
-
-# Input fields for income
-monthly_income = st.number_input(
-    "Enter your total monthly income after tax:",
-    min_value=0.0,
-    step=100.0,
-    format="%.2f"
-)
-
-# Add default 'Retirement' goal if not already added and monthly income is provided
-if not st.session_state.retirement_goal_added and monthly_income > 0:
-    retirement_goal = {
-        'goal_name': 'Retirement',
-        'goal_amount': int(round(monthly_income * 12 * 25)),
-        'current_savings': 0.0,  # Initialize with zero savings as float
-        'interest_rate': 7.0,
-        'monthly_contribution': None,  # Will be calculated below
-        'target_year': current_year + 40,
-        'goal_type': 'Target Year'
+    /* Sidebar styles */
+    .sidebar .sidebar-content {
+        padding: 20px;
     }
-    # Calculate monthly contribution for the retirement goal
-    months_to_goal = 12 * (retirement_goal['target_year'] - current_year)
-    rate_of_return_monthly = retirement_goal['interest_rate'] / 100 / 12
-    if months_to_goal <= 0:
-        st.error("Retirement goal target year must be greater than the current year.")
-    else:
-        if rate_of_return_monthly > 0:
-            denominator = (1 + rate_of_return_monthly) ** months_to_goal - 1
-            if denominator == 0:
-                st.error("Invalid calculation for retirement goal due to zero denominator.")
-            else:
-                retirement_goal['monthly_contribution'] = (retirement_goal['goal_amount'] - retirement_goal['current_savings'] * (1 + rate_of_return_monthly) ** months_to_goal) * rate_of_return_monthly / denominator
-        else:
-            retirement_goal['monthly_contribution'] = (retirement_goal['goal_amount'] - retirement_goal['current_savings']) / months_to_goal
-        retirement_goal['monthly_contribution'] = int(round(retirement_goal['monthly_contribution']))
-        st.session_state.goals.append(retirement_goal)
-        st.session_state.retirement_goal_added = True
-
-# Goal Addition
-st.markdown("<h4 class='section2-header'>Add a New Goal</h4>", unsafe_allow_html=True)
-goal_name = st.text_input("Name of goal")
-goal_amount = st.number_input(
-    "Goal amount",
-    min_value=0.0,
-    step=100.0,
-    format="%.2f"
-)
-current_savings = st.number_input(
-    "Initial contribution towards this goal",
-    min_value=0.0,
-    step=100.0,
-    format="%.2f",
-    value=0.0
-)
-interest_rate = st.number_input(
-    "Rate of return or interest rate (%)",
-    min_value=0.0,
-    max_value=100.0,
-    value=5.0,
-    step=0.1,
-    format="%.1f"
-)
-goal_type = st.radio("Select how you want to calculate your goal", ["Target Year", "Monthly Contribution"])
-
-if goal_type == "Monthly Contribution":
-    contribution_amount = st.number_input(
-        "Monthly contribution towards this goal",
-        min_value=0.0,
-        step=50.0,
-        format="%.2f"
-    )
-    if contribution_amount > 0 and goal_amount > 0:
-        rate_of_return_monthly = interest_rate / 100 / 12
-        if rate_of_return_monthly > 0:
-            try:
-                # Adjusted for current_savings
-                future_value_contributions = contribution_amount * ((1 + rate_of_return_monthly) ** (12 * 100) - 1) / rate_of_return_monthly
-                target_year = current_year + int(np.ceil(np.log((goal_amount - current_savings * (1 + rate_of_return_monthly) ** (12 * 100)) / (contribution_amount * rate_of_return_monthly) + 1) / np.log(1 + rate_of_return_monthly)))
-            except:
-                st.error("Invalid calculation for months to goal.")
-                target_year = current_year + 1
+
+    /* Results section */
+    .results-section {
+        border: 2px solid #1E90FF;  /* Dodger Blue */
+        padding: 20px;
+        border-radius: 10px;
+        background-color: #f9f9ff;
+        margin-bottom: 30px;
+    }
+
+    /* Timeline */
+    .plotly-chart {
+        margin-bottom: 30px;
+    }
+"""
+
+# Function to build the timeline DataFrame from the goal graph's timeline columns
+def timeline_frame(timeline):
+    return lazy_import('pandas').DataFrame(timeline)
+
+# Plans with more goals than this get the scalable timeline: WebGL traces and one point per year
+SCALABLE_TIMELINE_GOALS = 50
+
+# Function to create an empty timeline figure; the scalable one uses WebGL traces
+def new_timeline_figure(scalable):
+    go = lazy_import('plotly.graph_objects')
+    scatter = go.Scattergl if scalable else go.Scatter
+
+    fig = go.Figure()
+
+    # Add dots for current year and goals
+    fig.add_trace(scatter(
+        mode='markers+text',
+        marker=dict(size=12, color='black', line=dict(width=2, color='black')),
+        textposition='top center',
+        hoverinfo='text'
+    ))
+
+    # Add line connecting the dots
+    fig.add_trace(scatter(
+        mode='lines',
+        line=dict(color='black', width=2)
+    ))
+
+    fig.update_layout(xaxis_title='Year', yaxis=dict(visible=False), showlegend=False)
+    return fig
+
+# Function to write the timeline points into the figure's traces in place
+# Scalable points are per-year clusters: sized by how many goals they hold, labels alternating above
+# and below the line, and the line drawn from the first year to the last instead of through every point
+def patch_timeline_figure(fig, points, scalable):
+    years = list(points['Year'])
+    with fig.batch_update():
+        dots, line = fig.data
+        dots.x = years
+        dots.y = [0] * len(years)
+        dots.text = list(points['Event'])
+        dots.hovertext = list(points['Text'])
+        if scalable:
+            dots.marker.size = [min(12 + 4 * (count - 1) ** 0.5, 30) for count in points['Count']]
+            dots.textposition = ['top center' if index % 2 == 0 else 'bottom center' for index in range(len(years))]
+            line.x = [years[0], years[-1]] if years else []
+            line.y = [0, 0] if years else []
         else:
-            try:
-                months_to_goal = (goal_amount - current_savings) / contribution_amount
-                target_year = current_year + int(np.ceil(months_to_goal / 12))
-            except:
-                target_year = current_year + 1
-elif goal_type == "Target Year":
-    target_year = st.number_input(
-        "Target year to reach this goal (yyyy)",
-        min_value=current_year + 1,
-        step=1,
-        format="%d"
-    )
-    contribution_amount = None
-
-# Add goal button
-if st.button("Add goal to timeline"):
-    if goal_name and goal_amount > 0 and current_savings >= 0:
-        if goal_type == "Monthly Contribution":
-            if contribution_amount is None or contribution_amount <= 0:
-                st.error("Please enter a valid monthly contribution amount.")
-                st.stop()
-            target_year = int(target_year)
-            monthly_contribution = contribution_amount
-        elif goal_type == "Target Year":
-            if target_year is None or target_year <= current_year:
-                st.error("Please enter a valid target year.")
-                st.stop()
-            months_to_goal = 12 * (int(target_year) - current_year)
-            rate_of_return_monthly = interest_rate / 100 / 12
-            if months_to_goal <= 0:
-                st.error("Target year must be greater than the current year.")
-                st.stop()
-            if rate_of_return_monthly > 0:
-                denominator = (1 + rate_of_return_monthly) ** months_to_goal - 1
-                if denominator == 0:
-                    st.error("Invalid calculation due to zero denominator.")
-                    st.stop()
-                monthly_contribution = (goal_amount - current_savings * (1 + rate_of_return_monthly) ** months_to_goal) * rate_of_return_monthly / denominator
-            else:
-                monthly_contribution = (goal_amount - current_savings) / months_to_goal
-        monthly_contribution = int(round(monthly_contribution))
-
-        # Add goal to session state
-        new_goal = {
-            'goal_name': goal_name,
-            'goal_amount': int(round(goal_amount)),  # Ensure integer
-            'current_savings': float(round(current_savings, 2)),
-            'interest_rate': round(interest_rate, 2),
-            'monthly_contribution': monthly_contribution,  # Ensure integer
-            'target_year': int(target_year),
-            'goal_type': goal_type  # Store goal type for display
-        }
-        st.session_state.goals.append(new_goal)
-        st.success(f"Goal '{goal_name}' added successfully.")
-    else:
-        st.error("Please enter a valid goal name, amount, and Initial contribution.")
+            line.x = years
+            line.y = [0] * len(years)
+
+# Function to plot the goal timeline
+# The figure is kept in the session and only its trace data is replaced when the timeline changes,
+# so an unchanged timeline reuses the figure as is
+def plot_timeline(goal_graph, goal_count):
+    scalable = goal_count > SCALABLE_TIMELINE_GOALS
+    # Timeline data, rebuilt by the goal graph only when a goal or the income changed
+    with section('dataframes'):
+        points = goal_graph.timeline_clusters() if scalable else goal_graph.timeline_frame()
+
+    cached = st.session_state.get('timeline_figure')
+    if cached is None or cached['scalable'] != scalable:
+        cached = st.session_state.timeline_figure = {'scalable': scalable, 'points': None, 'figure': new_timeline_figure(scalable)}
+    if cached['points'] is not points:
+        patch_timeline_figure(cached['figure'], points, scalable)
+        cached['points'] = points
+    st.plotly_chart(cached['figure'], use_container_width=True)
+
+# Function to plot a goal's required monthly contribution against target year and against rate of return
+def plot_goal_sweep(sweep, target_year, rate):
+    go = lazy_import('plotly.graph_objects')
+    make_subplots = lazy_import('plotly.subplots').make_subplots
+    contribution = sweep.contribution(target_year, rate)
+
+    fig = make_subplots(rows=1, cols=2, subplot_titles=(f"By target year (at {rate:.2f}%)", f"By rate of return (in {target_year})"))
+    fig.add_trace(go.Scatter(x=sweep.years, y=sweep.by_year(rate), mode='lines', line=dict(color='indigo', width=2),
+                             hovertemplate='%{x}: $%{y:,.0f}/month<extra></extra>'), row=1, col=1)
+    fig.add_trace(go.Scatter(x=sweep.rates, y=sweep.by_rate(target_year), mode='lines', line=dict(color='#1E90FF', width=2),
+                             hovertemplate='%{x:.2f}%: $%{y:,.0f}/month<extra></extra>'), row=1, col=2)
+    fig.add_trace(go.Scatter(x=[target_year], y=[contribution], mode='markers', marker=dict(size=12, color='#D22B2B'), hoverinfo='skip'), row=1, col=1)
+    fig.add_trace(go.Scatter(x=[rate], y=[contribution], mode='markers', marker=dict(size=12, color='#D22B2B'), hoverinfo='skip'), row=1, col=2)
+    fig.update_xaxes(title_text='Target Year', row=1, col=1)
+    fig.update_xaxes(title_text='Rate of Return (%)', row=1, col=2)
+    fig.update_yaxes(title_text='Monthly Contribution ($)', rangemode='tozero', row=1, col=1)
+    fig.update_yaxes(rangemode='tozero', row=1, col=2)
+    fig.update_layout(showlegend=False, height=400)
+    st.plotly_chart(fig, use_container_width=True)
 
-# Sidebar for managing goals
-st.sidebar.header("Manage Goals")
+# Function to save the target year and rate picked in the sensitivity sweep to the goal; runs as a button callback
+# The goal is replaced with a new dict so the goal graph picks up the change
+def apply_sweep_choice(index, target_year, rate):
+    goal = st.session_state.goals[index]
+    months_to_goal = 12 * (int(target_year) - date.today().year)
+    monthly_contribution = float(contributions_for_months(goal['goal_amount'], goal['current_savings'], rate, months_to_goal))
+    st.session_state.goals[index] = {
+        **goal,
+        'interest_rate': round(rate, 2),
+        'monthly_contribution': int(round(monthly_contribution)),
+        'target_year': int(target_year),
+        'goal_type': 'Target Year',
+    }
+    st.session_state.edit_goal_index = None
 
-# Manage goals section
-for index, goal in enumerate(st.session_state.goals):
-    with st.sidebar.expander(f"{goal['goal_name']} (Target Year: {goal['target_year']}, Monthly Contribution: ${goal['monthly_contribution']})"):
+# Function to show the target year sensitivity of one goal
+# The sweep is computed once per goal (and cached); moving the sliders only looks values up in it
+def show_goal_sweep(goals, current_year):
+    st.markdown("<h4 class='section2-header'>Find Your Sweet Spot</h4>", unsafe_allow_html=True)
+    names = [f"{goal['goal_name']} ({goal['target_year']})" for goal in goals]
+    index = st.selectbox("Goal", range(len(goals)), format_func=names.__getitem__, key='sweep_goal')
+    goal = goals[index]
+    with section('sweep math'):
+        sweep = goal_sweep(goal['goal_amount'], goal['current_savings'], goal['interest_rate'], current_year)
+
+    col1, col2 = st.columns(2)
+    with col1:
+        target_year = st.slider(
+            "Target year", int(sweep.years[0]), int(sweep.years[-1]),
+            value=int(min(max(goal['target_year'], sweep.years[0]), sweep.years[-1])), key=f"sweep_year_{index}"
+        )
+    with col2:
+        rate = st.select_slider(
+            "Rate of return (%)", options=sweep.rates.tolist(), value=round(float(goal['interest_rate']), 2),
+            format_func=lambda value: f"{value:.2f}", key=f"sweep_rate_{index}"
+        )
+    contribution = sweep.contribution(target_year, rate)
+    st.markdown(f"<h5 style='color: black;'>Reaching <b>{goal['goal_name']}</b> by {target_year} at {rate:.2f}% takes <span style='color: indigo;'><b>${int(round(contribution))}</b></span> a month.</h5>", unsafe_allow_html=True)
+    plot_goal_sweep(sweep, target_year, rate)
+    st.button("Use this target year and rate", key='sweep_apply', on_click=apply_sweep_choice, args=(index, target_year, rate))
+
+# Function to show one goal in the Manage Goals sidebar with its edit form
+# A fragment: Edit, Cancel, the edit form's widgets and an Update that changes nothing rerun only this goal;
+# the whole page reruns only when a goal is actually updated or removed
+@st.fragment
+def goal_editor(index, current_year):
+    goal = st.session_state.goals[index]
+    with st.expander(f"{goal['goal_name']} (Target Year: {goal['target_year']}, Monthly Contribution: ${goal['monthly_contribution']})"):
         st.write(f"**Goal Amount:** ${goal['goal_amount']}")
         st.write(f"**Initial contribution:** ${int(round(goal['current_savings']))}")
         st.write(f"**Interest Rate:** {goal['interest_rate']}%")
         st.write(f"**Goal Type:** {goal['goal_type']}")
-        
+
         # Check if this goal is being edited
         if st.session_state.edit_goal_index == index:
             # Editable fields
@@ -273,7 +206,7 @@ for index, goal in enumerate(st.session_state.goals):
                 value=goal['goal_name'],
                 key=f"edit_name_{index}"
             )
-            
+
             edited_goal_amount = st.number_input(
                 "Goal amount",
                 value=goal['goal_amount'],
@@ -282,7 +215,7 @@ for index, goal in enumerate(st.session_state.goals):
                 format="%d",
                 key=f"edit_amount_{index}"
             )
-            
+
             edited_current_savings = st.number_input(
                 "Initial contribution towards this goal",
                 value=goal['current_savings'],
@@ -291,7 +224,7 @@ for index, goal in enumerate(st.session_state.goals):
                 format="%.2f",
                 key=f"edit_current_savings_{index}"
             )
-            
+
             edited_interest_rate = st.number_input(
                 "Rate of return or interest rate (%)",
                 value=goal['interest_rate'],
@@ -301,14 +234,14 @@ for index, goal in enumerate(st.session_state.goals):
                 format="%.1f",
                 key=f"edit_rate_{index}"
             )
-            
+
             edited_goal_type = st.radio(
                 "Select how you want to calculate your goal",
                 ["Target Year", "Monthly Contribution"],
                 index=0 if goal['goal_type'] == "Target Year" else 1,
                 key=f"edit_goal_type_{index}"
             )
-            
+
             if edited_goal_type == "Monthly Contribution":
                 edited_contribution_amount = st.number_input(
                     "Monthly contribution towards this goal",
@@ -320,22 +253,13 @@ for index, goal in enumerate(st.session_state.goals):
                 )
                 # Recalculate target_year based on new contribution
                 if edited_contribution_amount > 0 and edited_goal_amount > 0:
-                    rate_of_return_monthly = edited_interest_rate / 100 / 12
-                    if rate_of_return_monthly > 0:
-                        try:
-                            # Adjusted for current_savings
-                            # Using future value formula to estimate months_to_goal
-                            months_to_goal = np.log(1 + (edited_goal_amount - edited_current_savings * (1 + rate_of_return_monthly) ** (12 * 100)) / (edited_contribution_amount * rate_of_return_monthly)) / np.log(1 + rate_of_return_monthly)
-                            target_year_calculated = current_year + int(np.ceil(months_to_goal / 12))
-                        except:
-                            st.error("Invalid calculation for months to goal.")
-                            target_year_calculated = current_year + 1
-                    else:
-                        try:
-                            months_to_goal = (edited_goal_amount - edited_current_savings) / edited_contribution_amount
-                            target_year_calculated = current_year + int(np.ceil(months_to_goal / 12))
-                        except:
-                            target_year_calculated = current_year + 1
+                    # Adjusted for current_savings
+                    months_to_goal = months_for_contributions(edited_goal_amount, edited_current_savings, edited_interest_rate, edited_contribution_amount)
+                    target_year_calculated = int(target_years_for_months(current_year, months_to_goal))
+                    if target_year_calculated < 0:
+                        st.error("Invalid calculation for months to goal.")
+                        target_year_calculated = current_year + 1
+                    st.write(f"**Estimated Target Year:** {target_year_calculated}")
             elif edited_goal_type == "Target Year":
                 edited_target_year = st.number_input(
                     "Target Year",
@@ -345,51 +269,34 @@ for index, goal in enumerate(st.session_state.goals):
                     format="%d",
                     key=f"edit_target_year_{index}"
                 )
-            
+
             # Update button
             if st.button("Update Goal", key=f"update_{index}"):
                 if edited_goal_type == "Target Year":
                     months_to_goal = 12 * (int(edited_target_year) - current_year)
-                    rate_of_return_monthly = edited_interest_rate / 100 / 12
                     if months_to_goal <= 0:
                         st.error("Target year must be greater than the current year.")
                         st.stop()
-                    if rate_of_return_monthly > 0:
-                        denominator = (1 + rate_of_return_monthly) ** months_to_goal - 1
-                        if denominator == 0:
-                            st.error("Invalid calculation due to zero denominator.")
-                            st.stop()
-                        edited_monthly_contribution = (edited_goal_amount - edited_current_savings * (1 + rate_of_return_monthly) ** months_to_goal) * rate_of_return_monthly / denominator
-                    else:
-                        edited_monthly_contribution = (edited_goal_amount - edited_current_savings) / months_to_goal
+                    edited_monthly_contribution = float(contributions_for_months(edited_goal_amount, edited_current_savings, edited_interest_rate, months_to_goal))
                 else:
                     # For "Monthly Contribution", recalculate target_year
                     contribution_amount = edited_contribution_amount
-                    rate_of_return_monthly = edited_interest_rate / 100 / 12
                     if contribution_amount <= 0:
                         st.error("Monthly contribution must be greater than zero.")
                         st.stop()
-                    if rate_of_return_monthly > 0:
-                        try:
-                            # Adjusted for current_savings
-                            months_to_goal = np.log(1 + (edited_goal_amount - edited_current_savings * (1 + rate_of_return_monthly) ** months_to_goal) / (contribution_amount * rate_of_return_monthly)) / np.log(1 + rate_of_return_monthly)
-                            edited_target_year = current_year + int(np.ceil(months_to_goal / 12))
-                        except:
-                            st.error("Invalid calculation for months to goal.")
-                            edited_target_year = current_year + 1
-                    else:
-                        try:
-                            months_to_goal = (edited_goal_amount - edited_current_savings) / contribution_amount
-                            edited_target_year = current_year + int(np.ceil(months_to_goal / 12))
-                        except:
-                            edited_target_year = current_year + 1
+                    # Adjusted for current_savings
+                    months_to_goal = months_for_contributions(edited_goal_amount, edited_current_savings, edited_interest_rate, contribution_amount)
+                    edited_target_year = int(target_years_for_months(current_year, months_to_goal))
+                    if edited_target_year < 0:
+                        st.error("Invalid calculation for months to goal.")
+                        edited_target_year = current_year + 1
                     edited_monthly_contribution = int(round(contribution_amount))
-                
+
                 # Ensure monthly_contribution is integer after recalculation
                 edited_monthly_contribution = int(round(edited_monthly_contribution)) if edited_goal_type == "Target Year" else int(round(edited_monthly_contribution))
-                
+
                 # Update the goal values in the session state
-                st.session_state.goals[index] = {
+                edited_goal = {
                     'goal_name': edited_goal_name,
                     'goal_amount': int(edited_goal_amount),
                     'current_savings': float(round(edited_current_savings, 2)),
@@ -398,111 +305,243 @@ for index, goal in enumerate(st.session_state.goals):
                     'target_year': int(edited_target_year),
                     'goal_type': edited_goal_type
                 }
-                st.success(f"Goal '{edited_goal_name}' updated successfully.")
                 # Reset edit_goal_index
                 st.session_state.edit_goal_index = None
-            
+                if edited_goal == goal:
+                    rerun_editor()
+                st.session_state.goals[index] = edited_goal
+                st.toast(f"Goal '{edited_goal_name}' updated successfully.")
+                # The goal changed, so the timeline and breakdown rerun with it
+                st.rerun()
+
             # Cancel Edit button
             if st.button("Cancel", key=f"cancel_{index}"):
                 st.session_state.edit_goal_index = None
+                rerun_editor()
 
         else:
             # Edit button
             if st.button("Edit Goal", key=f"edit_{index}"):
+                # Another goal's open editor has to close too, which needs the whole sidebar
+                other_editor_open = st.session_state.edit_goal_index is not None
                 st.session_state.edit_goal_index = index
+                rerun_editor(other_editor_open)
 
             # Remove button
             if st.button("Remove Goal", key=f"remove_{index}"):
                 st.session_state.goals.pop(index)
-                st.success(f"Goal '{goal['goal_name']}' removed successfully.")
+                st.toast(f"Goal '{goal['goal_name']}' removed successfully.")
                 # If the removed goal was being edited, reset edit_goal_index
                 if st.session_state.edit_goal_index == index:
                     st.session_state.edit_goal_index = None
                 # Adjust edit_goal_index if necessary
                 elif st.session_state.edit_goal_index is not None and st.session_state.edit_goal_index > index:
                     st.session_state.edit_goal_index -= 1
-                break  # Exit after removal to prevent index issues
+                st.rerun()
 
-# Outputs Section
-st.markdown("<h2 class='section-header'>Outputs</h2>", unsafe_allow_html=True)
+# Function to collect the inputs saved with a scenario; goals already hold their computed contributions and years
+def collect_scenario_inputs():
+    return {'goals': st.session_state.goals, 'monthly_income': st.session_state.get('monthly_income', 0.0)}
 
-# Timeline section
-st.markdown("<h4 class='section2-header'>My Timeline</h4>", unsafe_allow_html=True)
+# Function to restore a saved scenario into the session
+def apply_scenario_inputs(inputs, results):
+    st.session_state.goals = inputs['goals']
+    st.session_state.monthly_income = float(inputs['monthly_income'])
+    st.session_state.retirement_goal_added = True
+    st.session_state.edit_goal_index = None
 
-def plot_timeline():
-    # Get latest goal year for timeline end
-    if st.session_state.goals:
-        latest_year = max(goal['target_year'] for goal in st.session_state.goals)
-    else:
-        latest_year = current_year
-
-    # Create timeline data
-    total_contribution = sum(goal['monthly_contribution'] for goal in st.session_state.goals)
-    remaining_for_current_you = monthly_income - total_contribution
-    timeline_data = {
-        'Year': [current_year] + [goal['target_year'] for goal in st.session_state.goals],
-        'Event': ['Current Year'] + [goal['goal_name'] for goal in st.session_state.goals],
-        'Text': [
-            f"<b>Year:</b> {current_year}<br><b>Monthly Income:</b> ${int(round(monthly_income))}<br><b>Monthly contributions towards goals:</b> ${int(round(total_contribution))}<br><b>Monthly money remaining for current you:</b> ${int(round(remaining_for_current_you))}"
-        ] + [
-            f"<b>Year:</b> {goal['target_year']}<br><b>Goal Name:</b> {goal['goal_name']}<br><b>Goal Amount:</b> ${int(round(goal['goal_amount']))}<br><b>Initial Contribution:</b> ${int(round(goal['current_savings']))}<br><b>Monthly Contribution:</b> ${int(round(goal['monthly_contribution']))}"
-            for goal in st.session_state.goals
-        ]
-    }
-    timeline_df = pd.DataFrame(timeline_data)
+# Main function to run the app
+def main():
+    # Set page config for better layout
+    st.set_page_config(layout="wide")
+    start_profiling('future_you')
 
-    fig = go.Figure()
+    apply_styles(FUTURE_YOU_STYLES)
 
-    # Add dots for current year and goals
-    fig.add_trace(go.Scatter(
-        x=timeline_df['Year'],
-        y=[0] * len(timeline_df),
-        mode='markers+text',
-        marker=dict(size=12, color='black', line=dict(width=2, color='black')), 
-        text=timeline_df['Event'],
-        textposition='top center',
-        hoverinfo='text',
-        hovertext=timeline_df['Text']
-    ))
+    # Title and Description
+    st.markdown("<h1 class='title'>The Future You Tool</h1>", unsafe_allow_html=True)
+    st.markdown("""
+    <div class='description'>
+        <h5>Play around with designing the life you want to live. Add multiple goals like a down payment, education, or a vacation. Have fun and design your dream life! A retirement suggestion will be provided based on 20x your current salary. Please edit the year or amount as it makes sense for you in the "Manage Goals" left panel.
+    </div>
+    """, unsafe_allow_html=True)
 
-    # Add line connecting the dots
-    fig.add_trace(go.Scatter(
-        x=timeline_df['Year'],
-        y=[0] * len(timeline_df),
-        mode='lines',
-        line=dict(color='black', width=2)
-    ))
+    # Initialize variables
+    current_year = date.today().year
+
+    # Initialize session state for goals and edit tracking
+    if 'goals' not in st.session_state:
+        st.session_state.goals = []
+    if 'retirement_goal_added' not in st.session_state:
+        st.session_state.retirement_goal_added = False
+    if 'edit_goal_index' not in st.session_state:
+        st.session_state.edit_goal_index = None
+
+    with section('input widgets'):
+        # Inputs Section
+        st.markdown("<h2 class='section-header'>Inputs</h2>", unsafe_allow_html=True)
+
+        # Input fields for income
+        monthly_income = st.number_input(
+            "Enter your total monthly income after tax:",
+            min_value=0.0,
+            step=100.0,
+            format="%.2f",
+            key='monthly_income'
+        )
+
+        # Add default 'Retirement' goal if not already added and monthly income is provided
+        if not st.session_state.retirement_goal_added and monthly_income > 0:
+            st.session_state.goals.append(retirement_goal(monthly_income, current_year))
+            st.session_state.retirement_goal_added = True
+
+        # Goal Addition
+        st.markdown("<h4 class='section2-header'>Add a New Goal</h4>", unsafe_allow_html=True)
+        goal_name = st.text_input("Name of goal")
+        goal_amount = st.number_input(
+            "Goal amount",
+            min_value=0.0,
+            step=100.0,
+            format="%.2f"
+        )
+        current_savings = st.number_input(
+            "Initial contribution towards this goal",
+            min_value=0.0,
+            step=100.0,
+            format="%.2f",
+            value=0.0
+        )
+        interest_rate = st.number_input(
+            "Rate of return or interest rate (%)",
+            min_value=0.0,
+            max_value=100.0,
+            value=5.0,
+            step=0.1,
+            format="%.1f"
+        )
+        goal_type = st.radio("Select how you want to calculate your goal", ["Target Year", "Monthly Contribution"])
 
-    fig.update_layout(xaxis_title='Year', yaxis=dict(visible=False), showlegend=False)
-    st.plotly_chart(fig, use_container_width=True)
+        if goal_type == "Monthly Contribution":
+            contribution_amount = st.number_input(
+                "Monthly contribution towards this goal",
+                min_value=0.0,
+                step=50.0,
+                format="%.2f"
+            )
+            target_year = current_year + 1
+            if contribution_amount > 0 and goal_amount > 0:
+                # Adjusted for current_savings
+                months_to_goal = months_for_contributions(goal_amount, current_savings, interest_rate, contribution_amount)
+                target_year = int(target_years_for_months(current_year, months_to_goal))
+                if target_year < 0:
+                    st.error("Invalid calculation for months to goal.")
+                    target_year = current_year + 1
+        elif goal_type == "Target Year":
+            target_year = st.number_input(
+                "Target year to reach this goal (yyyy)",
+                min_value=current_year + 1,
+                step=1,
+                format="%d"
+            )
+            contribution_amount = None
+
+        # Add goal button
+        if st.button("Add goal to timeline"):
+            if goal_name and goal_amount > 0 and current_savings >= 0:
+                if goal_type == "Monthly Contribution":
+                    if contribution_amount is None or contribution_amount <= 0:
+                        st.error("Please enter a valid monthly contribution amount.")
+                        st.stop()
+                    target_year = int(target_year)
+                    monthly_contribution = contribution_amount
+                elif goal_type == "Target Year":
+                    if target_year is None or target_year <= current_year:
+                        st.error("Please enter a valid target year.")
+                        st.stop()
+                    months_to_goal = 12 * (int(target_year) - current_year)
+                    if months_to_goal <= 0:
+                        st.error("Target year must be greater than the current year.")
+                        st.stop()
+                    monthly_contribution = float(contributions_for_months(goal_amount, current_savings, interest_rate, months_to_goal))
+                monthly_contribution = int(round(monthly_contribution))
+
+                # Add goal to session state
+                new_goal = {
+                    'goal_name': goal_name,
+                    'goal_amount': int(round(goal_amount)),  # Ensure integer
+                    'current_savings': float(round(current_savings, 2)),
+                    'interest_rate': round(interest_rate, 2),
+                    'monthly_contribution': monthly_contribution,  # Ensure integer
+                    'target_year': int(target_year),
+                    'goal_type': goal_type  # Store goal type for display
+                }
+                st.session_state.goals.append(new_goal)
+                st.success(f"Goal '{goal_name}' added successfully.")
+            else:
+                st.error("Please enter a valid goal name, amount, and Initial contribution.")
 
-# Show Timeline
-plot_timeline()
+    with section('goal editors'), st.sidebar:
+        # Sidebar for managing goals
+        scenario_panel('future_you', collect_scenario_inputs, apply_scenario_inputs)
 
+        st.header("Manage Goals")
 
-# Monthly Contribution Results Section
-# Check if goals exist in session state
-if 'goals' in st.session_state and st.session_state.goals:
-    total_contribution = sum(goal['monthly_contribution'] for goal in st.session_state.goals)
-    remaining_for_current_you = monthly_income - total_contribution
+        # Manage goals section
+        for index in range(len(st.session_state.goals)):
+            goal_editor(index, current_year)
 
-    # Display the Monthly Breakdown header
-    st.markdown("<h4 class='section2-header'>Monthly Breakdown</h4>", unsafe_allow_html=True)
+    # Bring the goal graph up to date; only goals added, edited or removed since the last rerun are recomputed
+    if 'goal_graph' not in st.session_state:
+        st.session_state.goal_graph = GoalGraph(current_year, frame_builder=timeline_frame)
+    goal_graph = st.session_state.goal_graph
+    with section('goal graph'):
+        goal_graph.sync(st.session_state.goals, monthly_income, current_year)
 
-    # Display the subheader for contributions towards goals
-    st.markdown(f"<h5 style='color: black;'>1) Monthly contribution towards goals: <span style='color: indigo;'><b>${int(round(total_contribution))}</b></span></h5>", unsafe_allow_html=True)
+    # Outputs Section
+    st.markdown("<h2 class='section-header'>Outputs</h2>", unsafe_allow_html=True)
 
-    # Loop through the goals and include them in the list
-    st.markdown("<ul>", unsafe_allow_html=True)
-    for goal in st.session_state.goals:
-        st.markdown(f"<li><b>{goal['goal_name']}:</b> ${int(round(goal['monthly_contribution']))}/month</li>", unsafe_allow_html=True)
-    st.markdown("</ul>", unsafe_allow_html=True)
+    # Timeline section
+    st.markdown("<h4 class='section2-header'>My Timeline</h4>", unsafe_allow_html=True)
 
-    # Display the remaining money section
-    st.markdown(f"""
-        <h5 style='color: black;'>2) This is how much money you have left each month after you put money aside for your goals. (Monthly expense limit - input this into the Current You tool): <span style='color: #D22B2B;'><b>${int(round(remaining_for_current_you))}</b></span></h5>
-    """, unsafe_allow_html=True)
+    # Show Timeline
+    with section('timeline'):
+        plot_timeline(goal_graph, len(st.session_state.goals))
+
+
+    # Monthly Contribution Results Section
+    # Check if goals exist in session state
+    if 'goals' in st.session_state and st.session_state.goals:
+        total_contribution = goal_graph.total_contribution()
+        remaining_for_current_you = goal_graph.remaining_for_current_you()
+        # Hand the limit to the Current You page, which runs in the same session when served from app.py
+        st.session_state.future_you_limit = float(int(round(remaining_for_current_you)))
+
+        # Display the Monthly Breakdown header
+        st.markdown("<h4 class='section2-header'>Monthly Breakdown</h4>", unsafe_allow_html=True)
+
+        # Display the subheader for contributions towards goals
+        st.markdown(f"<h5 style='color: black;'>1) Monthly contribution towards goals: <span style='color: indigo;'><b>${int(round(total_contribution))}</b></span></h5>", unsafe_allow_html=True)
+
+        # Loop through the goals and include them in the list
+        st.markdown("<ul>", unsafe_allow_html=True)
+        for goal in st.session_state.goals:
+            st.markdown(f"<li><b>{goal['goal_name']}:</b> ${int(round(goal['monthly_contribution']))}/month</li>", unsafe_allow_html=True)
+        st.markdown("</ul>", unsafe_allow_html=True)
+
+        # Display the remaining money section
+        st.markdown(f"""
+            <h5 style='color: black;'>2) This is how much money you have left each month after you put money aside for your goals. (Monthly expense limit - input this into the Current You tool): <span style='color: #D22B2B;'><b>${int(round(remaining_for_current_you))}</b></span></h5>
+        """, unsafe_allow_html=True)
+
+        with section('sweet spot'):
+            show_goal_sweep(st.session_state.goals, current_year)
+
+
+    else:
+        st.markdown("<h4>No goals have been added yet.</h4>", unsafe_allow_html=True)
+        st.session_state.pop('future_you_limit', None)
 
+    profile_panel('future_you')
 
-else:
-    st.markdown("<h4>No goals have been added yet.</h4>", unsafe_allow_html=True)
+if __name__ == "__main__":
+    main()
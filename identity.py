@@ -0,0 +1,29 @@
+# Who a browser's saved scenarios and spending history belong to, without accounts or a typed name.
+# Each browser gets a random key the first time it opens a tool; it's kept in the page's URL (?key=...), so the
+# user comes back to their data by bookmarking the link, and nobody can reach it by guessing a name or email.
+# The stores only ever see a hash of the key.
+import re
+import secrets
+
+import streamlit as st
+
+from finance.cache import content_hash
+
+QUERY_PARAM = 'key'
+KEY_BYTES = 16
+# What secrets.token_urlsafe(KEY_BYTES) looks like; anything shorter in the URL is replaced with a fresh key
+KEY_PATTERN = re.compile(r'[A-Za-z0-9_-]{22,64}')
+
+
+# Function to get this browser's owner id for the scenario and history stores, keeping its key in the URL
+def owner_id():
+    key = st.session_state.get('owner_key')
+    if key is None:
+        key = st.query_params.get(QUERY_PARAM, '')
+        if not KEY_PATTERN.fullmatch(key):
+            key = secrets.token_urlsafe(KEY_BYTES)
+        st.session_state.owner_key = key
+    # Switching pages clears the query string, so put the key back on every rerun
+    if st.query_params.get(QUERY_PARAM) != key:
+        st.query_params[QUERY_PARAM] = key
+    return content_hash(key)
@@ -1,73 +1,117 @@
 import streamlit as st
-import pandas as pd
-import matplotlib.pyplot as plt
-import numpy as np
-from datetime import date, datetime
+from datetime import date
 
-# Set the page config to wide mode
-st.set_page_config(page_title="Get Aligned as a Couple", layout="wide")
+from charts import default_renderer
+from fragments import rerun_editor
+from identity import owner_id
+from profile_panel import profile_panel, start_profiling
+from profiling import section
+from scenario_panel import scenario_panel
+from startup import lazy_import
 
-# Function to calculate age from birthday
-def calculate_age(birthday):
-    today = date.today()
-    birthdate = pd.to_datetime(birthday)
-    age = today.year - birthdate.year - ((today.month, today.day) < (birthdate.month, birthdate.day))
-    return age
+from finance.cache import default_cache
+from finance.cached import amortize, compute_dashboard, scenario_grid, simulate_responses
+from finance.household import calculate_age, remaining_monthly_funds
+from finance.sheets import get_sheet_sync, profile_row
 
 # Function to calculate future account value considering principal and monthly contributions
 def calculate_future_value(principal, annual_rate, years, monthly_contribution):
-    if annual_rate == 0:
-        # Simple formula when the rate is 0 (no interest)
-        future_value = principal + (monthly_contribution * years * 12)
-    else:
-        monthly_rate = annual_rate / 100 / 12
-        months = years * 12
-        try:
-            future_value = principal * (1 + monthly_rate) ** months
-            future_value += monthly_contribution * (((1 + monthly_rate) ** months - 1) / monthly_rate)
-        except ZeroDivisionError:
-            # Gracefully handle division by zero
-            future_value = principal + (monthly_contribution * months)
-    return future_value
+    return lazy_import('finance.projections').future_value(principal, annual_rate, years, monthly_contribution)
 
 # Function to calculate debt payback date based on fixed monthly payments
 def calculate_payback_date(amount, interest_rate, monthly_payment):
-    if monthly_payment <= 0:
-        raise ValueError("Monthly payment must be greater than zero.")
-    
-    if interest_rate == 0:
-        if monthly_payment < amount:
-            raise ValueError("The monthly payment is not sufficient to pay off the debt.")
-        months = amount / monthly_payment
-    else:
-        monthly_rate = interest_rate / 100 / 12
-        if monthly_payment <= amount * monthly_rate:
-            raise ValueError("The monthly payment is not sufficient to cover the interest on the debt.")
-        months = np.log(monthly_payment / (monthly_payment - amount * monthly_rate)) / np.log(1 + monthly_rate)
+    return amortize([amount], [interest_rate], [monthly_payment]).payoff_date(0)
+
+# Function to create the projected account values bar chart
+def create_projection_chart(account_balances, selected_year):
+    fig = lazy_import('matplotlib.figure').Figure(figsize=(10, 5))
+    ax = fig.subplots()
+    ax.bar(account_balances.keys(), account_balances.values(), color='skyblue')
+    ax.set_ylabel('Projected Value ($)')
+    ax.set_title(f'Projected Account Values in {selected_year}')
+    ax.tick_params(axis='x', labelrotation=45)
+    return fig
+
+# Function to create the what-if heatmap of goal attainment by assumed return and monthly savings
+# savings_needed (one value per rate, NaN when out of reach) is drawn as the line where every goal is met on time
+def create_scenario_heatmap(rates, savings, attainment, year, savings_needed, current=None):
+    fig = lazy_import('matplotlib.figure').Figure(figsize=(10, 6))
+    ax = fig.subplots()
+    image = ax.imshow(
+        attainment.T * 100, origin='lower', aspect='auto', cmap='RdYlGn',
+        vmin=0, vmax=100, extent=(rates[0], rates[-1], savings[0], savings[-1]),
+    )
+    fig.colorbar(image, ax=ax, label=f'Average goal progress in {year} (%)')
+    ax.plot(rates, savings_needed, color='black', linewidth=2, label='Savings needed to meet every goal on time')
+    if current is not None:
+        ax.plot(*current, marker='*', markersize=15, color='navy', linestyle='none', label='Your current plan')
+    ax.set_xlabel('Assumed Annual Return (%)')
+    ax.set_ylabel('Monthly Savings ($)')
+    ax.set_title(f'What-If Scenarios: Goal Progress in {year}')
+    ax.legend(loc='upper left')
+    return fig
+
+# Function to display the what-if scenario grid: every combination of return and savings is evaluated at once
+def show_scenario_grid(responses, selected_year):
+    st.subheader("What-If Scenarios:")
+    goals = responses.get("goals", [])
+    if not responses['accounts'] or not goals:
+        st.write("Add at least one account and one goal to explore what-if scenarios.")
+        return
+
+    current_year = date.today().year
+    remaining = remaining_monthly_funds(responses)
+    rate_range = st.slider("Assumed annual return (%)", 0.0, 20.0, (0.0, 12.0), step=0.5, key='individuals_whatif_rates')
+    savings_range = st.slider(
+        "Monthly savings ($)", 0.0, float(max(5000, round(remaining * 3, -3))), (0.0, float(max(2000, round(remaining * 2, -2)))),
+        step=50.0, key='individuals_whatif_savings'
+    )
+    steps = st.number_input("Grid steps per axis", min_value=5, max_value=200, value=50, key='individuals_whatif_steps')
+    np = lazy_import('numpy')
+    end_year = max([int(selected_year)] + [int(goal['target_year']) for goal in goals])
+    with section('scenario grid math'):
+        grid = scenario_grid(responses, np.linspace(*rate_range, steps), np.linspace(*savings_range, steps), current_year, end_year)
+    if not grid.goal_names:
+        st.write("None of your goals are linked to an existing account.")
+        return
 
-    payback_date = date.today() + pd.DateOffset(months=int(months))
-    return payback_date.date()
+    horizon = st.select_slider("Horizon year", options=grid.years.tolist(), value=int(selected_year))
+    # Mark the current plan: the balance-weighted return of the accounts and today's remaining funds
+    accounts = responses['accounts']
+    total_balance = sum(account[3] for account in accounts)
+    current = None
+    if total_balance:
+        current_rate = sum(account[2] * account[3] for account in accounts) / total_balance
+        if rate_range[0] <= current_rate <= rate_range[1] and savings_range[0] <= remaining <= savings_range[1]:
+            current = (current_rate, remaining)
+    with section('charts'):
+        image = default_renderer.render(
+            create_scenario_heatmap, grid.rates, grid.savings, grid.attainment_in(horizon), horizon, grid.savings_needed(), current
+        )
+    st.image(image)
+    st.write(f"{grid.attainment.size:,} scenarios evaluated ({len(grid.rates)} returns x {len(grid.savings)} savings levels x {len(grid.years)} years).")
 
 # Function to display progress toward goals
-def display_goal_progress(goals, selected_year, account_balances):
+def display_goal_progress(goals, selected_year, dashboard, goal_probabilities=None):
     st.subheader(f"Goal Progress in {selected_year}:")
     if not goals:
         st.write("No goals have been added.")
         return
 
-    for goal in goals:
+    # Progress comes from the funding simulation: goals sharing an account split its money instead of each
+    # claiming the whole balance, and a goal's cost leaves the account once it's paid out
+    funding = dashboard.funding
+    withdrawal_years = funding.withdrawal_years()
+    for idx, (goal, progress) in enumerate(zip(goals, dashboard.goal_progress)):
         goal_name = goal["name"]
         goal_cost = goal["cost"]
         goal_year = goal["target_year"]
         account_name = goal["account"]
 
-        if account_name not in account_balances:
+        if progress is None:
             st.write(f"Account {account_name} not found.")
             continue
 
-        # Calculate progress
-        account_balance = account_balances[account_name]
-        progress = min(account_balance / goal_cost, 1)  # Cap at 100%
         progress_percentage = progress * 100
 
         # Display progress bar and details
@@ -75,26 +119,49 @@ def display_goal_progress(goals, selected_year, account_balances):
         st.write(f"Cost: ${goal_cost:,.0f}, Target Year: {goal_year}")
         st.progress(progress)
         st.write(f"{progress_percentage:.0f}% of goal achieved.\n")
+        paid_year = withdrawal_years[idx]
+        if paid_year is None:
+            st.write(f"Not fully funded from {account_name} by {funding.end_year}.")
+        elif paid_year <= goal_year:
+            st.write(f"On track: paid out of {account_name} in {paid_year}.")
+        else:
+            st.write(f"Fully funded in {paid_year}, {paid_year - goal_year} year(s) after the target.")
+        if goal_probabilities is not None and goal_probabilities[idx] is not None:
+            st.write(f"Chance of reaching this goal by {goal_year}: {goal_probabilities[idx] * 100:.0f}%")
+
+# Function to label a month counted from the current one, e.g. "Mar 2028"
+def month_label(months_out):
+    today = date.today()
+    years, month = divmod(today.month - 1 + int(months_out), 12)
+    return date(today.year + years, month + 1, 1).strftime("%b %Y")
 
 # Function to display the dashboard based on user responses
-def show_dashboard(responses, selected_year):
+# volatility is the annual volatility (%) of invested accounts; when given, a Monte Carlo risk range is shown
+# goal_order is how goals sharing an account are funded (a key of GOAL_ORDERS)
+def show_dashboard(responses, selected_year, volatility=None, goal_order='target_date'):
     st.title("Your Personalized Financial Dashboard")
+    pd = lazy_import('pandas')
 
     current_year = date.today().year
+    # Cached on the content of the responses, so an unchanged rerun costs a lookup
+    with section('projection math'):
+        dashboard = compute_dashboard(responses, selected_year, current_year, start_date=date.today(), goal_order=goal_order)
+    responses['remaining_funds'] = dashboard.remaining_funds
     
     st.subheader("Your Monthly Overview:")
     # st.write(f"**Age**: {responses.get('age', 'N/A')}")
     st.write(f"**Monthly Take-Home Pay**: ${responses.get('paycheck', 0):,.0f}")
     st.write(f"**Monthly Expenses**: ${responses.get('total_expenses', 0):,.0f}")
     st.write(f"**Monthly Debt Payments**: ${responses.get('total_debt_payments', 0):,.0f}")
-    
-    remaining_funds = responses['paycheck'] - responses['total_expenses'] - responses['total_debt_payments']
-    responses['remaining_funds'] = remaining_funds if remaining_funds > 0 else 0  # Ensure remaining funds don't go negative
     st.write(f"**Remaining Monthly Funds (After Expenses and Debt Payments)**: ${responses['remaining_funds']:,.0f}")
+    # Money freed up by paid-off debts (and income changes) flows into the accounts from the month it's freed
+    for months_out, funds, reason in dashboard.cash_flow_changes:
+        st.write(f"From {month_label(months_out)}: ${funds:,.0f}/month to your accounts ({reason})")
 
     st.subheader("Your Accounts Today:")
     if responses['accounts']:
-        accounts_df = pd.DataFrame(responses['accounts'], columns=['Account Name', 'Type', 'Interest Rate (%)', 'Balance ($)'])
+        with section('dataframes'):
+            accounts_df = pd.DataFrame(responses['accounts'].tolist(), columns=['Account Name', 'Type', 'Interest Rate (%)', 'Balance ($)'])
         st.write(accounts_df)
     else:
         st.write("No accounts added yet.")
@@ -103,59 +170,286 @@ def show_dashboard(responses, selected_year):
     # Debt payback
     st.subheader("Debt Payback Dates:")
     st.write("These are the dates you will finish paying off your debts if you maintain your current monthly payments.")
-    for debt in responses.get("debts", []):
+    debts = responses.get("debts", [])
+    schedule = dashboard.schedule
+    for idx, debt in enumerate(debts):
         debt_name = debt['name']
-        current_amount = debt['amount']
-        interest_rate = debt['rate']
-        monthly_payment = debt['monthly_payment']
         try:
-            payback_date = calculate_payback_date(current_amount, interest_rate, monthly_payment)
-            st.write(f"**{debt_name}** will be paid off by: {payback_date}")
+            payback_date = schedule.payoff_date(idx)
+            st.write(f"**{debt_name}** will be paid off by: {payback_date} (total interest paid: ${schedule.total_interest[idx]:,.0f})")
         except Exception as e:
             st.error(f"Error calculating payback date for {debt_name}: {e}")
 
+    if debts and len(schedule.payment_dates):
+        with section('dataframes'):
+            balances_df = pd.DataFrame(schedule.balances.T, index=schedule.payment_dates, columns=[debt['name'] for debt in debts])
+        with section('charts'):
+            st.line_chart(balances_df)
+
     st.session_state.dashboard_run = True
 
     st.subheader(f"Financial Snapshot in {selected_year}:")
-    future_values = {}
-    account_balances = {}  # To track balances for goal progress
-
-    for account in responses['accounts']:
-        account_name, _, interest_rate, balance = account
-        allocation_percentage = responses['allocations'].get(account_name, 0)
-        monthly_contribution = (responses['remaining_funds'] * (allocation_percentage / 100))
-        years_to_project = selected_year - current_year
-
-        try:
-            future_value = calculate_future_value(balance, interest_rate, years_to_project, monthly_contribution)
-            future_values[account_name] = future_value
-            account_balances[account_name] = future_value
-            st.write(f"Estimated balance in your **{account_name}** account in {selected_year}: ${future_value:,.0f}")
-        except Exception as e:
-            st.error(f"Error calculating future value for {account_name}: {e}")
-
-    if future_values:
-        fig, ax = plt.subplots(figsize=(10, 5))
-        ax.bar(future_values.keys(), future_values.values(), color='skyblue')
-        ax.set_ylabel('Projected Value ($)')
-        ax.set_title(f'Projected Account Values in {selected_year}')
-        plt.xticks(rotation=45)
-        st.pyplot(fig)
+    projection = dashboard.projection
+    account_balances = dashboard.account_balances  # To track balances for goal progress
+
+    paid_out_years = [year for year in dashboard.funding.withdrawal_years() if year is not None]
+    if any(year <= selected_year for year in paid_out_years):
+        st.write("These balances are after paying for the goals reached by then.")
+    for account_name, projected_value in account_balances.items():
+        st.write(f"Estimated balance in your **{account_name}** account in {selected_year}: ${projected_value:,.0f}")
+
+    if account_balances:
+        with section('charts'):
+            image = default_renderer.render(create_projection_chart, account_balances, selected_year)
+        st.image(image)
+
+    goal_probabilities = None
+    if volatility is not None and responses['accounts']:
+        volatility_by_type = {**lazy_import('finance.montecarlo').DEFAULT_VOLATILITY, 'Invested': volatility, 'Registered': volatility}
+        with section('monte carlo'):
+            simulation = simulate_responses(responses, current_year, selected_year, volatility_by_type, order=goal_order)
+        goal_probabilities = simulation.goal_probabilities
+        st.subheader(f"Range of Outcomes in {selected_year}:")
+        st.write("Based on thousands of simulated market scenarios, in which goals sharing an account are paid out in the same order as above, your balance has a 10% chance of ending below the pessimistic value and a 10% chance of ending above the optimistic value.")
+        with section('dataframes'):
+            range_df = pd.DataFrame(
+                [(name, *values) for name, values in simulation.account_percentiles(selected_year).items()],
+                columns=['Account Name', 'Pessimistic (P10) ($)', 'Median (P50) ($)', 'Optimistic (P90) ($)']
+            )
+        st.write(range_df)
 
     # Asset projections
     st.subheader(f"Asset Projections for {selected_year}:")
-    for asset in responses.get("assets", []):
-        asset_name = asset['name']
-        current_value = asset['value']
-        appreciation_rate = asset['rate']
-        future_asset_value = calculate_future_value(current_value, appreciation_rate, selected_year - current_year, 0)
+    for asset_name, future_asset_value in projection.asset_values(selected_year):
         st.write(f"The estimated value of **{asset_name}** in {selected_year} is: ${future_asset_value:,.0f}")
         
     # Display goal progress
-    display_goal_progress(responses.get("goals", []), selected_year, account_balances)
+    display_goal_progress(responses.get("goals", []), selected_year, dashboard, goal_probabilities)
+
+# Widget keys on this page start with WIDGET_PREFIX, which app.py keeps across page switches; main() copies
+# the widgets into st.session_state.responses, so a widget reset by a page switch would overwrite the answers
+WIDGET_PREFIX = 'individuals_'
+
+# Function to get the widget key of an expense category's amount
+def expense_key(category):
+    return f"{WIDGET_PREFIX}expense_{category}"
+
+ACCOUNT_TYPES = ["Chequing", "Regular Savings", "HYSA", "Invested", "Registered"]
+
+# Ways to queue goals that share an account for its money, as finance.funding.FUNDING_ORDERS
+GOAL_ORDERS = {'target_date': "Earliest target year first", 'priority': "In the order they were added"}
+
+# Function to check whether a card's edit form is open
+def is_editing(kind, idx):
+    return st.session_state.get(f"editing_{kind}_{idx}", False)
+
+# Function to close a card's edit form after Cancel or Update
+# An update that changed the item reruns the whole page (so the dashboard and charts pick it up);
+# otherwise only the card reruns
+def finish_editing(kind, idx, changed):
+    st.session_state[f"editing_{kind}_{idx}"] = False
+    rerun_editor(changed)
+
+# Function to delete an item and rerun the page; edit forms of the kind are closed as indices shift
+def delete_item(kind, items, idx, message):
+    del items[idx]
+    for key in [key for key in st.session_state if str(key).startswith(f"editing_{kind}_")]:
+        del st.session_state[key]
+    st.toast(message)
+    st.rerun()
+
+# Function to show one debt card; a fragment, so Edit and Cancel rerun only this card
+@st.fragment
+def debt_card(idx):
+    responses = st.session_state.responses
+    debt = responses['debts'][idx]
+    st.markdown(f"**{debt['name']}** - Amount: \${debt['amount']:,.0f}, Interest: {debt['rate']}%, Monthly Payment: \${debt['monthly_payment']:,.0f}")
+
+    col_edit_debt, col_delete_debt = st.columns([1, 1])
+    with col_edit_debt:
+        if st.button(f"Edit {debt['name']}", key=f"edit_debt_{idx}"):
+            st.session_state[f"editing_debt_{idx}"] = True
+    with col_delete_debt:
+        if st.button(f"Delete {debt['name']}", key=f"delete_debt_{idx}"):
+            responses['total_debt_payments'] -= debt['monthly_payment']
+            delete_item('debt', responses['debts'], idx, f"Debt '{debt['name']}' deleted.")
+
+    if is_editing('debt', idx):
+        with st.form(f"edit_debt_form_{idx}"):
+            debt_name = st.text_input("Debt Name", value=debt['name'])
+            debt_amount = st.number_input("Current Amount ($)", min_value=0.0, value=debt['amount'])
+            debt_rate = st.number_input("Interest Rate (%)", min_value=0.0, value=debt['rate'])
+            monthly_payment = st.number_input("Monthly Payment Amount ($)", min_value=0.0, value=debt['monthly_payment'])
+            update, cancel = st.columns([1, 1])
+            if update.form_submit_button("Update Debt"):
+                updated = {
+                    "name": debt_name,
+                    "amount": debt_amount,
+                    "rate": debt_rate,
+                    "monthly_payment": monthly_payment
+                }
+                if updated != debt:
+                    responses['total_debt_payments'] += monthly_payment - debt['monthly_payment']
+                    responses['debts'][idx] = updated
+                finish_editing('debt', idx, updated != debt)
+            if cancel.form_submit_button("Cancel"):
+                finish_editing('debt', idx, False)
+
+# Function to show one account card; a fragment, so Edit and Cancel rerun only this card
+# A renamed account keeps its allocation and the goals it funds
+@st.fragment
+def account_card(idx):
+    responses = st.session_state.responses
+    account = responses['accounts'][idx]
+    st.markdown(f"**{account[0]}** - Type: {account[1]}, Interest Rate: {account[2]}%, Balance: ${account[3]:,.0f}")
+
+    col_edit, col_delete = st.columns([1, 1])
+    with col_edit:
+        if st.button(f"Edit {account[0]}", key=f"edit_{idx}"):
+            st.session_state[f"editing_account_{idx}"] = True
+    with col_delete:
+        if st.button(f"Delete {account[0]}", key=f"delete_{idx}"):
+            delete_item('account', responses['accounts'], idx, f"Account {account[0]} deleted.")
+
+    if is_editing('account', idx):
+        with st.form(f"edit_account_form_{idx}"):
+            acc_name = st.text_input("Account Name", value=account[0])
+            acc_type = st.selectbox("Account Type", ACCOUNT_TYPES, index=ACCOUNT_TYPES.index(account[1]) if account[1] in ACCOUNT_TYPES else 0)
+            interest_rate = st.number_input("Interest Rate (%)", min_value=0.0, value=account[2])
+            balance = st.number_input("Current Balance ($)", min_value=0.0, value=account[3])
+            update, cancel = st.columns([1, 1])
+            if update.form_submit_button("Update Account"):
+                updated = (acc_name, acc_type, interest_rate, balance)
+                if updated != tuple(account):
+                    responses['accounts'][idx] = updated
+                    if acc_name != account[0]:
+                        responses['allocations'][acc_name] = responses['allocations'].pop(account[0], 0.0)
+                        st.session_state[f"alloc_{acc_name}"] = float(responses['allocations'][acc_name])
+                        responses['goals'].replace('account', account[0], acc_name)
+                finish_editing('account', idx, updated != tuple(account))
+            if cancel.form_submit_button("Cancel"):
+                finish_editing('account', idx, False)
+
+# Function to show one asset card; a fragment, so Edit and Cancel rerun only this card
+@st.fragment
+def asset_card(idx):
+    responses = st.session_state.responses
+    asset = responses['assets'][idx]
+    st.markdown(f"**{asset['name']}** - Value: ${asset['value']:,.0f}, Appreciation Rate: {asset['rate']}%")
+
+    col_edit_asset, col_delete_asset = st.columns([1, 1])
+    with col_edit_asset:
+        if st.button(f"Edit {asset['name']}", key=f"edit_asset_{idx}"):
+            st.session_state[f"editing_asset_{idx}"] = True
+    with col_delete_asset:
+        if st.button(f"Delete {asset['name']}", key=f"delete_asset_{idx}"):
+            delete_item('asset', responses['assets'], idx, f"Asset '{asset['name']}' deleted.")
+
+    if is_editing('asset', idx):
+        with st.form(f"edit_asset_form_{idx}"):
+            asset_name = st.text_input("Asset Name", value=asset['name'])
+            asset_value = st.number_input("Current Value ($)", min_value=0.0, value=asset['value'])
+            asset_rate = st.number_input("Expected Appreciation Rate (%)", min_value=0.0, value=asset['rate'])
+            update, cancel = st.columns([1, 1])
+            if update.form_submit_button("Update Asset"):
+                updated = {
+                    "name": asset_name,
+                    "value": asset_value,
+                    "rate": asset_rate
+                }
+                if updated != asset:
+                    responses['assets'][idx] = updated
+                finish_editing('asset', idx, updated != asset)
+            if cancel.form_submit_button("Cancel"):
+                finish_editing('asset', idx, False)
+
+# Function to show one goal card; a fragment, so Edit and Cancel rerun only this card
+@st.fragment
+def goal_card(idx):
+    responses = st.session_state.responses
+    goal = responses['goals'][idx]
+    st.markdown(f"**{goal['name']}** - Cost: ${goal['cost']}, Target Year: {goal['target_year']}, Funded by: {goal['account']}")
+
+    col_edit_goal, col_delete_goal = st.columns([1, 1])
+    with col_edit_goal:
+        if st.button(f"Edit {goal['name']}", key=f"edit_goal_{idx}"):
+            st.session_state[f"editing_goal_{idx}"] = True
+    with col_delete_goal:
+        if st.button(f"Delete {goal['name']}", key=f"delete_goal_{idx}"):
+            delete_item('goal', responses['goals'], idx, f"Goal '{goal['name']}' deleted.")
+
+    if is_editing('goal', idx):
+        account_names = [acc[0] for acc in responses['accounts']]
+        with st.form(f"edit_goal_form_{idx}"):
+            goal_name = st.text_input("Goal Name", value=goal['name'])
+            goal_cost = st.number_input("Cost of the Goal ($)", min_value=0.0, value=goal['cost'])
+            goal_year = st.number_input("Target Year", min_value=date.today().year, value=goal['target_year'])
+            account_name = st.selectbox("Select Account to Fund the Goal", account_names, index=account_names.index(goal['account']) if goal['account'] in account_names else 0)
+            update, cancel = st.columns([1, 1])
+            if update.form_submit_button("Update Goal"):
+                updated = {
+                    "name": goal_name,
+                    "cost": goal_cost,
+                    "target_year": goal_year,
+                    "account": account_name
+                }
+                if updated != goal:
+                    responses['goals'][idx] = updated
+                finish_editing('goal', idx, updated != goal)
+            if cancel.form_submit_button("Cancel"):
+                finish_editing('goal', idx, False)
+
+# Function to collect the inputs saved with a scenario
+def collect_scenario_inputs():
+    birthday = st.session_state.get('individuals_birthday')
+    return {
+        'responses': lazy_import('finance.models').plain_responses(st.session_state.responses),
+        'birthday': birthday.isoformat() if birthday else None,
+        'selected_year': st.session_state.get('individuals_selected_year'),
+        'goal_order': st.session_state.get('individuals_goal_order', 'target_date'),
+    }
+
+# Function to precompute the dashboard for a scenario being saved, so loading it doesn't recompute
+def collect_scenario_results():
+    selected_year = st.session_state.get('individuals_selected_year', date.today().year + 5)
+    goal_order = st.session_state.get('individuals_goal_order', 'target_date')
+    entry = compute_dashboard.entry(st.session_state.responses, selected_year, date.today().year, start_date=date.today(), goal_order=goal_order)
+    return {'cache_entries': [entry]}
+
+# Function to restore a saved scenario into the session, including the widgets that feed the responses
+def apply_scenario_inputs(inputs, results):
+    responses = st.session_state.responses = lazy_import('finance.models').tabulate_responses(inputs['responses'])
+    if inputs.get('birthday'):
+        st.session_state.individuals_birthday = date.fromisoformat(inputs['birthday'])
+    if inputs.get('selected_year'):
+        st.session_state.individuals_selected_year = inputs['selected_year']
+    if inputs.get('goal_order') in GOAL_ORDERS:
+        st.session_state.individuals_goal_order = inputs['goal_order']
+    st.session_state.individuals_paycheck = float(responses.get('paycheck', 0.0))
+    st.session_state.individuals_expense_categories = ", ".join(responses['expenses']) or "Total expenses"
+    for category, amount in responses['expenses'].items():
+        st.session_state[expense_key(category)] = float(amount)
+    for account_name, percentage in responses['allocations'].items():
+        st.session_state[f"alloc_{account_name}"] = float(percentage)
+    st.session_state.personal_info_complete = True
+    st.session_state.income_info_complete = True
+    st.session_state.expenses_info_complete = True
+    default_cache.prime(results.get('cache_entries', []))
+
+# Function to queue the submitted profile for the shared Google Sheet; the write happens in the background
+def log_profile(responses):
+    sync = get_sheet_sync()
+    if sync is None:
+        return
+    key = owner_id()
+    sync.submit(key, profile_row(key, responses))
 
 # Main function to run the app
 def main():
+    # Set the page config to wide mode
+    st.set_page_config(page_title="Get Aligned as a Couple", layout="wide")
+    start_profiling('individuals_tool')
+
     if 'dashboard_run' not in st.session_state:
         st.session_state.dashboard_run = False
     
@@ -169,37 +463,64 @@ def main():
             'total_debt_payments': 0,
             'goals': [],
             'assets': [],
-            'debts': []
+            'debts': [],
+            'income_changes': []
         }
+    # Accounts, debts, assets and goals are kept as columnar tables (finance.models), which give rows back as the
+    # tuples and dicts the cards and forms below use; lists (a new session, or one from before) are converted once
+    st.session_state.responses = lazy_import('finance.models').tabulate_responses(st.session_state.responses)
 
     responses = st.session_state.responses
 
     col1, col2 = st.columns([2, 5])
 
-    with col1:
+    with col1, section('input widgets'):
+        scenario_panel('individuals_tool', collect_scenario_inputs, apply_scenario_inputs, collect_scenario_results)
+
         with st.expander("Personal Information", expanded=not st.session_state.get('personal_info_complete', False)):
-            birthday = st.date_input("When is your birthday?")
+            birthday = st.date_input("When is your birthday?", key='individuals_birthday')
             if birthday:
                 responses['age'] = calculate_age(birthday)
             st.session_state.personal_info_complete = True
 
         if st.session_state.get('personal_info_complete', False):
             with st.expander("Income", expanded=not st.session_state.get('income_info_complete', False)):
-                paycheck = st.number_input("What is your monthly take-home pay after tax?", min_value=0.0)
+                # Widgets start from the saved answers when their own state is gone
+                st.session_state.setdefault('individuals_paycheck', float(responses.get('paycheck', 0.0)))
+                paycheck = st.number_input("What is your monthly take-home pay after tax?", min_value=0.0, key='individuals_paycheck')
                 responses['paycheck'] = paycheck
+
+                # Expected changes in take-home pay; the dashboard projects with each from its year on
+                income_changes = responses.setdefault('income_changes', [])
+                st.write("Expecting a raise, a career break or retirement? Add the new monthly take-home pay and the year it starts.")
+                with st.form("add_income_change_form"):
+                    change_year = st.number_input("Starting Year", min_value=date.today().year + 1)
+                    new_paycheck = st.number_input("New Monthly Take-Home Pay ($)", min_value=0.0)
+                    if st.form_submit_button("Add Income Change"):
+                        income_changes.append({'year': int(change_year), 'paycheck': new_paycheck})
+                        income_changes.sort(key=lambda change: change['year'])
+                        st.rerun()
+                for idx, change in enumerate(income_changes):
+                    col_change, col_remove = st.columns([3, 1])
+                    col_change.write(f"From {change['year']}: ${change['paycheck']:,.0f}/month")
+                    if col_remove.button("Remove", key=f"remove_income_change_{idx}"):
+                        del income_changes[idx]
+                        st.rerun()
                 st.session_state.income_info_complete = True
 
         if st.session_state.get('income_info_complete', False):
             with st.expander("Expenses", expanded=not st.session_state.get('expenses_info_complete', False)):
                 st.subheader("Enter Your Monthly Expenses:")
-                expense_categories = st.text_input("Enter approximate total monthly expenses (if you would prefer to input by expense category, please write the categories in the text box below with commas between each category)", "Total expenses")
+                st.session_state.setdefault('individuals_expense_categories', ", ".join(responses['expenses']) or "Total expenses")
+                expense_categories = st.text_input("Enter approximate total monthly expenses (if you would prefer to input by expense category, please write the categories in the text box below with commas between each category)", key='individuals_expense_categories')
                 expense_categories = [category.strip() for category in expense_categories.split(",")]
-                total_expenses = 0.0
+                # Only the categories listed now are kept, so a removed one doesn't come back with a saved scenario
+                expenses = {}
                 for category in expense_categories:
-                    amount = st.number_input(f"{category}:", min_value=0.0, key=category)
-                    responses['expenses'][category] = amount
-                    total_expenses += amount
-                responses['total_expenses'] = total_expenses
+                    st.session_state.setdefault(expense_key(category), float(responses['expenses'].get(category, 0.0)))
+                    expenses[category] = st.number_input(f"{category}:", min_value=0.0, key=expense_key(category))
+                responses['expenses'] = expenses
+                responses['total_expenses'] = sum(expenses.values())
                 st.session_state.expenses_info_complete = True
 
         if st.session_state.get('expenses_info_complete', False):
@@ -225,36 +546,8 @@ def main():
 
                 # Display current debts as cards with edit and delete options
                 st.subheader("Current Debts:")
-                if responses['debts']:
-                    for idx, debt in enumerate(responses['debts']):
-                        st.markdown(f"**{debt['name']}** - Amount: \${debt['amount']:,.0f}, Interest: {debt['rate']}%, Monthly Payment: \${debt['monthly_payment']:,.0f}")
-                        
-                        col_edit_debt, col_delete_debt = st.columns([1, 1])
-                        with col_edit_debt:
-                            if st.button(f"Edit {debt['name']}", key=f"edit_debt_{idx}"):
-                                with st.form(f"edit_debt_form_{idx}"):
-                                    debt_name = st.text_input("Debt Name", value=debt['name'])
-                                    debt_amount = st.number_input("Current Amount ($)", min_value=0.0, value=debt['amount'])
-                                    debt_rate = st.number_input("Interest Rate (%)", min_value=0.0, value=debt['rate'])
-                                    monthly_payment = st.number_input("Monthly Payment Amount ($)", min_value=0.0, value=debt['monthly_payment'])
-                                    if st.form_submit_button("Update Debt"):
-                                        debt_difference = monthly_payment - debt['monthly_payment']
-                                        responses['debts'][idx] = {
-                                            "name": debt_name,
-                                            "amount": debt_amount,
-                                            "rate": debt_rate,
-                                            "monthly_payment": monthly_payment
-                                        }
-                                        responses['total_debt_payments'] += debt_difference
-                                        st.success(f"Debt '{debt_name}' updated.")
-                                        st.rerun()
-
-                        with col_delete_debt:
-                            if st.button(f"Delete {debt['name']}", key=f"delete_debt_{idx}"):
-                                responses['total_debt_payments'] -= debt['monthly_payment']
-                                del responses['debts'][idx]
-                                st.success(f"Debt '{debt['name']}' deleted.")
-                                st.rerun()
+                for idx in range(len(responses['debts'])):
+                    debt_card(idx)
 
         if st.session_state.get('expenses_info_complete', False):
             with st.expander("Accounts", expanded=True):
@@ -262,7 +555,7 @@ def main():
 
                 with st.form("add_account_form"):
                     acc_name = st.text_input("Account Name (e.g., Chequing, HYSA, etc.)")
-                    acc_type = st.selectbox("Account Type", ["Chequing", "Regular Savings", "HYSA", "Invested", "Registered"])
+                    acc_type = st.selectbox("Account Type", ACCOUNT_TYPES)
                     st.write("The interest rate represents the amount of interest gained based on the account it is in. If money in the account is invested, a good estimate is 7%, if the money is in a regular chequing/savings account, a good estimate is 0.05%.")
                     interest_rate = st.number_input("Interest Rate (%)", min_value=0.0)
                     balance = st.number_input("Current Balance ($)", min_value=0.0)
@@ -274,28 +567,8 @@ def main():
 
                 # Display current accounts as cards with edit and delete options
                 st.subheader("Current Accounts:")
-                if responses['accounts']:
-                    for idx, account in enumerate(responses['accounts']):
-                        st.markdown(f"**{account[0]}** - Type: {account[1]}, Interest Rate: {account[2]}%, Balance: ${account[3]:,.0f}")
-                        
-                        col_edit, col_delete = st.columns([1, 1])
-                        with col_edit:
-                            if st.button(f"Edit {account[0]}", key=f"edit_{idx}"):
-                                with st.form(f"edit_account_form_{idx}"):
-                                    acc_name = st.text_input("Account Name", value=account[0])
-                                    acc_type = st.selectbox("Account Type", ["HYSA", "Regular Savings", "Invested", "Registered"], index=["HYSA", "Regular Savings", "Invested", "Registered"].index(account[1]))
-                                    interest_rate = st.number_input("Interest Rate (%)", min_value=0.0, value=account[2])
-                                    balance = st.number_input("Current Balance ($)", min_value=0.0, value=account[3])
-                                    if st.form_submit_button("Update Account"):
-                                        responses['accounts'][idx] = (acc_name, acc_type, interest_rate, balance)
-                                        st.success(f"Account {acc_name} updated.")
-                                        st.rerun()
-
-                        with col_delete:
-                            if st.button(f"Delete {account[0]}", key=f"delete_{idx}"):
-                                del responses['accounts'][idx]
-                                st.success(f"Account {account[0]} deleted.")
-                                st.rerun()
+                for idx in range(len(responses['accounts'])):
+                    account_card(idx)
 
                 # Allocation inputs for each account
                 total_allocation = 0.0
@@ -329,31 +602,8 @@ def main():
 
                 # Display current assets as cards with edit and delete options
                 st.subheader("Current Assets:")
-                if responses['assets']:
-                    for idx, asset in enumerate(responses['assets']):
-                        st.markdown(f"**{asset['name']}** - Value: ${asset['value']:,.0f}, Appreciation Rate: {asset['rate']}%")
-                        
-                        col_edit_asset, col_delete_asset = st.columns([1, 1])
-                        with col_edit_asset:
-                            if st.button(f"Edit {asset['name']}", key=f"edit_asset_{idx}"):
-                                with st.form(f"edit_asset_form_{idx}"):
-                                    asset_name = st.text_input("Asset Name", value=asset['name'])
-                                    asset_value = st.number_input("Current Value ($)", min_value=0.0, value=asset['value'])
-                                    asset_rate = st.number_input("Expected Appreciation Rate (%)", min_value=0.0, value=asset['rate'])
-                                    if st.form_submit_button("Update Asset"):
-                                        responses['assets'][idx] = {
-                                            "name": asset_name,
-                                            "value": asset_value,
-                                            "rate": asset_rate
-                                        }
-                                        st.success(f"Asset '{asset_name}' updated.")
-                                        st.rerun()
-
-                        with col_delete_asset:
-                            if st.button(f"Delete {asset['name']}", key=f"delete_asset_{idx}"):
-                                del responses['assets'][idx]
-                                st.success(f"Asset '{asset['name']}' deleted.")
-                                st.rerun()
+                for idx in range(len(responses['assets'])):
+                    asset_card(idx)
 
         if st.session_state.get('expenses_info_complete', False):
             with st.expander("Goals", expanded=True):
@@ -377,39 +627,35 @@ def main():
 
                 # Display current goals as cards with edit and delete options
                 st.subheader("Current Goals:")
-                if responses['goals']:
-                    for idx, goal in enumerate(responses['goals']):
-                        st.markdown(f"**{goal['name']}** - Cost: ${goal['cost']}, Target Year: {goal['target_year']}, Funded by: {goal['account']}")
-                        
-                        col_edit_goal, col_delete_goal = st.columns([1, 1])
-                        with col_edit_goal:
-                            if st.button(f"Edit {goal['name']}", key=f"edit_goal_{idx}"):
-                                with st.form(f"edit_goal_form_{idx}"):
-                                    goal_name = st.text_input("Goal Name", value=goal['name'])
-                                    goal_cost = st.number_input("Cost of the Goal ($)", min_value=0.0, value=goal['cost'])
-                                    goal_year = st.number_input("Target Year", min_value=date.today().year, value=goal['target_year'])
-                                    account_name = st.selectbox("Select Account to Fund the Goal", [acc[0] for acc in responses['accounts']], index=[acc[0] for acc in responses['accounts']].index(goal['account']))
-                                    if st.form_submit_button("Update Goal"):
-                                        responses['goals'][idx] = {
-                                            "name": goal_name,
-                                            "cost": goal_cost,
-                                            "target_year": goal_year,
-                                            "account": account_name
-                                        }
-                                        st.success(f"Goal '{goal_name}' updated.")
-                                        st.rerun()
-
-                        with col_delete_goal:
-                            if st.button(f"Delete {goal['name']}", key=f"delete_goal_{idx}"):
-                                del responses['goals'][idx]
-                                st.success(f"Goal '{goal['name']}' deleted.")
-                                st.rerun()
+                for idx in range(len(responses['goals'])):
+                    goal_card(idx)
 
     with col2:
-        selected_year = st.number_input("Snapshot Year:", min_value=date.today().year, value=date.today().year + 5)
-
-        if st.button("Show Dashboard"):
-            show_dashboard(responses, selected_year)
+        if 'individuals_selected_year' not in st.session_state:
+            st.session_state.individuals_selected_year = date.today().year + 5
+        selected_year = st.number_input("Snapshot Year:", min_value=date.today().year, key='individuals_selected_year')
+
+        volatility = None
+        if st.checkbox("Show range of outcomes (Monte Carlo simulation)", key='individuals_monte_carlo'):
+            volatility = st.number_input("Expected annual volatility of invested and registered accounts (%)", min_value=0.0, max_value=100.0, value=15.0, key='individuals_volatility')
+
+        goal_order = st.selectbox("Fund goals that share an account", list(GOAL_ORDERS), format_func=GOAL_ORDERS.get, key='individuals_goal_order')
+
+        # Once shown, the dashboard stays up on later reruns; it's memoized, so it only recomputes when the data changed
+        show_clicked = st.button("Show Dashboard")
+        if show_clicked:
+            st.session_state.dashboard_run = True
+        if st.session_state.dashboard_run:
+            with section('dashboard'):
+                show_dashboard(responses, selected_year, volatility, goal_order)
+            if show_clicked:
+                log_profile(responses)
+
+        if st.checkbox("Explore what-if scenarios (returns x savings grid)", key='individuals_whatif'):
+            with section('what-if scenarios'):
+                show_scenario_grid(responses, selected_year)
+
+    profile_panel('individuals_tool')
 
 if __name__ == "__main__":
     main()
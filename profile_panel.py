@@ -0,0 +1,70 @@
+# Debug sidebar showing where each rerun's time went, from profiling's section timings.
+# Opt-in: set INDIVIDUALS_TOOL_PROFILE=1 for the whole server, or open one session with ?profile=1.
+import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+import profiling
+from charts import default_renderer
+from startup import lazy_import, startup_report
+
+from finance.cache import default_cache
+
+
+# Function to check whether this session's reruns are profiled
+def profiling_enabled():
+    return profiling.enabled_by_env() or st.query_params.get('profile') == '1'
+
+
+# Function to get the id of the browser session running this script, so each session sees only its own reruns
+def session_id():
+    ctx = get_script_run_ctx(suppress_warning=True)
+    return None if ctx is None else ctx.session_id
+
+
+# Function to start profiling the rerun, if enabled; call it first thing in main()
+def start_profiling(app):
+    if profiling_enabled():
+        profiling.start_rerun(app, session_id())
+
+
+# Function to finish the rerun's profile and show it, with this session's recent reruns of the app, in the sidebar
+# Call it last thing in main(), so the panel itself isn't part of what it measures
+def profile_panel(app):
+    profile = profiling.finish_rerun()
+    if profile is None:
+        return
+    pd = lazy_import('pandas')
+    with st.sidebar.expander("Rerun Profile", expanded=True):
+        widgets = "n/a" if profile.widgets is None else profile.widgets
+        st.write(f"**Last rerun:** {profile.total * 1000:,.1f} ms, {widgets} widgets")
+        if profile.sections:
+            st.dataframe(pd.DataFrame(
+                [(name, seconds * 1000, calls, widgets) for name, (seconds, calls, widgets) in profile.sections.items()],
+                columns=['Section', 'ms', 'Calls', 'Widgets'],
+            ), hide_index=True)
+        if profile.charts:
+            st.dataframe(pd.DataFrame(
+                [(name, seconds * 1000, 'cached' if cached else 'rendered') for name, seconds, cached in profile.charts],
+                columns=['Chart', 'ms', 'Source'],
+            ), hide_index=True)
+
+        recent = profiling.history(profile.session_id, app)
+        st.write(f"**Last {len(recent)} reruns:**")
+        st.dataframe(pd.DataFrame(profiling.summarize(recent), columns=['Section', 'Reruns', 'Mean ms', 'P95 ms', 'Max ms']), hide_index=True)
+        if len(recent) > 1:
+            st.line_chart(pd.DataFrame({'Rerun ms': [past.total * 1000 for past in recent]}))
+
+        st.write("**Computation cache:**")
+        st.dataframe(pd.DataFrame(
+            [(name, counts['hits'], counts['misses'], counts['hit_rate']) for name, counts in default_cache.stats().items()],
+            columns=['Function', 'Hits', 'Misses', 'Hit rate'],
+        ), hide_index=True)
+        renderer_stats = default_renderer.stats()
+        st.write(f"**Chart cache:** {renderer_stats['hits']} hits, {renderer_stats['misses']} misses, "
+                 f"{renderer_stats['images']} images ({renderer_stats['bytes'] / 1024:,.0f} KB)")
+        startup = startup_report()
+        if startup:
+            st.write("**Startup:**")
+            st.dataframe(pd.DataFrame(startup, columns=['Step', 'ms']), hide_index=True)
+        if st.button("Clear profile history", key='profile_clear'):
+            profiling.clear_history(profile.session_id)
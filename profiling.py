@@ -0,0 +1,153 @@
+# Opt-in per-rerun profiling for the Streamlit apps: how long each named section of a rerun took,
+# how many widgets it created and how long each chart took to render, with a rolling history per session so slow
+# reruns can be attributed in production without attaching a profiler. Costs nothing while no rerun is profiled.
+import os
+import statistics
+import threading
+import time
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+
+# Reruns kept per session, and sessions kept (the least recently profiled are dropped first)
+HISTORY_LENGTH = 200
+MAX_SESSIONS = 100
+ENV_FLAG = 'INDIVIDUALS_TOOL_PROFILE'
+
+_local = threading.local()
+# Each session's finished reruns, by session id (None for reruns started without one)
+_histories = OrderedDict()
+_history_lock = threading.Lock()
+
+
+# Function to check whether profiling is switched on for the whole server (INDIVIDUALS_TOOL_PROFILE=1)
+def enabled_by_env():
+    return os.environ.get(ENV_FLAG, '') not in ('', '0')
+
+
+# Function to count the widgets the current script run has created so far (None outside a Streamlit run)
+def _widget_count():
+    try:
+        from streamlit.runtime.scriptrunner import get_script_run_ctx
+    except ImportError:
+        return None
+    ctx = get_script_run_ctx(suppress_warning=True)
+    if ctx is None:
+        return None
+    shared = getattr(ctx, 'shared', ctx)
+    widget_ids = getattr(shared, 'widget_ids_this_run', None)
+    if widget_ids is None:
+        return None
+    return len(widget_ids.snapshot() if hasattr(widget_ids, 'snapshot') else widget_ids)
+
+
+# Timings of one rerun of one app
+# sections maps a name to [seconds, calls, widgets]; charts is a list of (builder name, seconds, cached)
+class RerunProfile:
+    def __init__(self, app, session_id=None):
+        self.app = app
+        self.session_id = session_id
+        self.started_at = time.time()
+        self.sections = OrderedDict()
+        self.charts = []
+        self.total = None
+        self.widgets = None
+        self._start = time.perf_counter()
+        self._widgets_at_start = _widget_count()
+        self._lock = threading.Lock()
+
+    def add_section(self, name, seconds, widgets):
+        with self._lock:
+            entry = self.sections.setdefault(name, [0.0, 0, 0])
+            entry[0] += seconds
+            entry[1] += 1
+            entry[2] += widgets or 0
+
+    # Called from the chart renderer's threads as well as the script thread
+    def add_chart(self, name, seconds, cached):
+        with self._lock:
+            self.charts.append((name, seconds, cached))
+
+    def finish(self):
+        self.total = time.perf_counter() - self._start
+        count = _widget_count()
+        if count is not None and self._widgets_at_start is not None:
+            self.widgets = count - self._widgets_at_start
+
+
+# Function to get the profile of the rerun running on this thread, or None when it isn't profiled
+def current():
+    return getattr(_local, 'profile', None)
+
+
+# Function to start profiling this thread's rerun; an unfinished profile (e.g. after st.stop) is dropped
+def start_rerun(app, session_id=None):
+    _local.profile = RerunProfile(app, session_id)
+    return _local.profile
+
+
+# Function to finish this thread's rerun and add it to its session's history; returns the profile (or None)
+def finish_rerun():
+    profile = current()
+    if profile is None:
+        return None
+    _local.profile = None
+    profile.finish()
+    with _history_lock:
+        session_history = _histories.pop(profile.session_id, None)
+        if session_history is None:
+            session_history = deque(maxlen=HISTORY_LENGTH)
+        _histories[profile.session_id] = session_history
+        session_history.append(profile)
+        while len(_histories) > MAX_SESSIONS:
+            _histories.popitem(last=False)
+    return profile
+
+
+# Context manager to time a named section of the current rerun, with the widgets it created
+# Sections with the same name in one rerun add up; nested sections are each counted in full
+@contextmanager
+def section(name):
+    profile = current()
+    if profile is None:
+        yield
+        return
+    widgets_before = _widget_count()
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        seconds = time.perf_counter() - start
+        widgets_after = _widget_count()
+        widgets = widgets_after - widgets_before if widgets_before is not None and widgets_after is not None else None
+        profile.add_section(name, seconds, widgets)
+
+
+# Function to get a session's finished reruns, oldest first, optionally only one app's
+def history(session_id, app=None):
+    with _history_lock:
+        profiles = list(_histories.get(session_id, ()))
+    return [profile for profile in profiles if app is None or profile.app == app]
+
+
+# Function to forget a session's finished reruns; other sessions' histories are kept
+def clear_history(session_id):
+    with _history_lock:
+        _histories.pop(session_id, None)
+
+
+# Function to summarise a list of reruns per section: calls, mean, p95 and max milliseconds, slowest mean first
+def summarize(profiles):
+    samples = {}
+    for profile in profiles:
+        samples.setdefault('(total rerun)', []).append(profile.total)
+        for name, (seconds, _, _) in profile.sections.items():
+            samples.setdefault(name, []).append(seconds)
+        for name, seconds, cached in profile.charts:
+            if not cached:
+                samples.setdefault(f"render {name}", []).append(seconds)
+    rows = []
+    for name, values in samples.items():
+        values = sorted(values)
+        p95 = values[min(len(values) - 1, int(round(0.95 * (len(values) - 1))))]
+        rows.append((name, len(values), statistics.fmean(values) * 1000, p95 * 1000, values[-1] * 1000))
+    return sorted(rows, key=lambda row: row[2], reverse=True)
@@ -0,0 +1,54 @@
+# "Saved Scenarios" panel shared by the apps: saves the session's inputs (and precomputed results)
+# to the local scenario store and restores them after a refresh or server restart.
+import streamlit as st
+
+from identity import owner_id
+
+from finance.store import get_store
+
+
+# Function to save the current inputs; runs as a button callback
+def _save(user_id, app, collect_inputs, collect_results):
+    scenario = st.session_state.get('scenario_name', '').strip()
+    if not scenario:
+        st.session_state.scenario_message = ('warning', "Please enter a scenario name.")
+        return
+    results = collect_results() if collect_results is not None else None
+    get_store().save(user_id, app, scenario, collect_inputs(), results)
+    st.session_state.scenario_message = ('success', f"Scenario '{scenario}' saved.")
+
+
+# Function to load the selected scenario; runs as a button callback, so it can set widget values before they render
+def _load(user_id, app, apply_inputs):
+    scenario = st.session_state.get('scenario_choice')
+    loaded = get_store().load(user_id, app, scenario) if scenario else None
+    if loaded is None:
+        st.session_state.scenario_message = ('warning', "Scenario not found.")
+        return
+    inputs, results = loaded
+    apply_inputs(inputs, results)
+    st.session_state.scenario_name = scenario
+    st.session_state.scenario_message = ('success', f"Scenario '{scenario}' loaded.")
+
+
+# Function to show the saved scenarios panel
+# collect_inputs() returns the JSON-serialisable inputs to save, collect_results() optional precomputed results,
+# and apply_inputs(inputs, results) restores them into st.session_state
+def scenario_panel(app, collect_inputs, apply_inputs, collect_results=None):
+    user_id = owner_id()
+    with st.expander("Saved Scenarios"):
+        st.caption("Scenarios are saved for this browser. Bookmark this page's link to come back to them.")
+        if 'scenario_name' not in st.session_state:
+            st.session_state.scenario_name = "My plan"
+        st.text_input("Scenario name", key='scenario_name')
+        st.button("Save scenario", key='scenario_save', on_click=_save, args=(user_id, app, collect_inputs, collect_results))
+
+        saved = get_store().list_scenarios(user_id, app)
+        if saved:
+            st.selectbox("Saved scenarios", saved, key='scenario_choice')
+            st.button("Load scenario", key='scenario_load', on_click=_load, args=(user_id, app, apply_inputs))
+
+        message = st.session_state.pop('scenario_message', None)
+        if message is not None:
+            level, text = message
+            getattr(st, level)(text)
@@ -0,0 +1,50 @@
+# Deferred imports for heavy libraries (pandas, matplotlib, plotly, numpy) with a startup timing report.
+# The apps import these on first use instead of at the top of the script, so a session's first paint
+# and a fresh container don't wait on libraries the current page doesn't need yet.
+import importlib
+import sys
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+_timings = OrderedDict()
+_lock = threading.Lock()
+
+
+# Function to record how long a startup step took
+def record(label, seconds):
+    with _lock:
+        _timings.setdefault(label, seconds)
+
+
+# Context manager to time a startup step, e.g. an app module's own imports
+@contextmanager
+def timed(label):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(label, time.perf_counter() - start)
+
+
+# Function to import a module on first use, recording how long the first import took
+def lazy_import(name):
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+    with timed(f"import {name}"):
+        module = importlib.import_module(name)
+    return module
+
+
+# Function to get the recorded startup timings as (label, milliseconds) pairs, slowest first
+def startup_report():
+    with _lock:
+        timings = list(_timings.items())
+    return sorted(((label, seconds * 1000) for label, seconds in timings), key=lambda item: item[1], reverse=True)
+
+
+# Function to format the startup timings as text
+def format_startup_report():
+    return "\n".join(f"{label:<40} {milliseconds:8.1f} ms" for label, milliseconds in startup_report())
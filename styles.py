@@ -0,0 +1,49 @@
+# CSS shared by the Current You and Future You pages; each page adds its own rules on top.
+import streamlit as st
+
+SHARED_STYLES = """
+    /* General styles */
+    body {
+        color: #333333;
+        background-color: #f0f2f6;
+    }
+
+    /* Title and description */
+    .title {
+        color: #4B0082;  /* Indigo */
+        text-align: center;
+        margin-bottom: 20px;
+    }
+
+    .description {
+        background-color: #e6e6fa;  /* Lavender */
+        padding: 20px;
+        border-radius: 10px;
+        margin-bottom: 30px;
+    }
+
+    /* Section headers */
+    .section-header {
+        color: #4B0082;  /* Indigo */
+        margin-top: 30px;
+        margin-bottom: 10px;
+    }
+
+    /* Section2 headers */
+    .section2-header {
+        color: black;  /* Black */
+        margin-top: 10px;
+        margin-bottom: 10px;
+    }
+
+    /* Text styling */
+    .stApp p, .stApp div, .stApp span, .stApp label {
+        color: #4f4f4f;
+        font-family: 'Verdana', sans-serif;
+    }
+"""
+
+
+# Function to apply the shared styles plus a page's own CSS rules
+def apply_styles(page_styles=""):
+    st.markdown(f"<style>{SHARED_STYLES}{page_styles}</style>", unsafe_allow_html=True)
@@ -0,0 +1,53 @@
+# The multipage app keeps each page's inputs when the user switches pages and comes back.
+# Run from the repository root: python -m pytest tests
+import os
+
+import pytest
+
+pytest.importorskip('streamlit')
+from streamlit.testing.v1 import AppTest
+
+APP = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'app.py')
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    monkeypatch.setenv('INDIVIDUALS_TOOL_DB', str(tmp_path / 'scenarios.db'))
+    monkeypatch.setenv('INDIVIDUALS_TOOL_HISTORY', str(tmp_path / 'history'))
+    at = AppTest.from_file(APP, default_timeout=120)
+    at.run()
+    assert not at.exception
+    return at
+
+
+def test_individuals_answers_survive_switching_pages(app):
+    app.switch_page('individuals_tool.py').run()
+    # The income and expense sections open once the one before has rendered
+    app.run()
+    app.run()
+    app.number_input(key='individuals_paycheck').set_value(5000.0).run()
+    app.text_input(key='individuals_expense_categories').set_value('Rent, Food').run()
+    app.number_input(key='individuals_expense_Rent').set_value(1500.0).run()
+    app.number_input(key='individuals_expense_Food').set_value(400.0).run()
+    app.number_input(key='individuals_selected_year').set_value(2040).run()
+    assert not app.exception
+
+    app.switch_page('future_you.py').run()
+    app.switch_page('current_you.py').run()
+    app.switch_page('individuals_tool.py').run()
+    assert not app.exception
+
+    responses = app.session_state.responses
+    assert responses['paycheck'] == 5000.0
+    assert responses['expenses'] == {'Rent': 1500.0, 'Food': 400.0}
+    assert responses['total_expenses'] == 1900.0
+    assert app.number_input(key='individuals_selected_year').value == 2040
+
+
+def test_current_you_expenses_survive_switching_pages(app):
+    app.switch_page('current_you.py').run()
+    app.number_input(key='fixed_Housing').set_value(1500.0).run()
+    app.switch_page('individuals_tool.py').run()
+    app.switch_page('current_you.py').run()
+
+    assert app.number_input(key='fixed_Housing').value == 1500.0
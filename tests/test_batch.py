@@ -0,0 +1,45 @@
+# A household the batch runner can't read gets an error result in its place; the rest of the shard still runs.
+# Run from the repository root: python -m pytest tests
+import io
+import json
+from datetime import date
+
+from finance.batch import read_households, run
+
+HOUSEHOLD = {
+    'accounts': [['Savings', 'HYSA', 4.0, 1000.0]], 'allocations': {'Savings': 100}, 'expenses': {'Rent': 1000},
+    'debts': [], 'assets': [], 'goals': [], 'paycheck': 3000,
+}
+
+
+def results(records):
+    output = io.StringIO()
+    run(records, output, 2030, date(2025, 1, 1))
+    return [json.loads(line) for line in output.getvalue().splitlines()]
+
+
+def test_malformed_json_line_is_reported_with_its_line_number(tmp_path):
+    path = tmp_path / 'households.jsonl'
+    lines = [dict(HOUSEHOLD, household_id='a'), None, dict(HOUSEHOLD, household_id='c')]
+    path.write_text('\n'.join('{"household_id": "b", "paycheck": ' if line is None else json.dumps(line) for line in lines))
+
+    a, b, c = results(read_households(str(path)))
+    assert a['household_id'] == 'a' and a['error'] is None
+    assert b['household_id'] == 1
+    assert b['error'].startswith("ValueError: Line 2 isn't valid JSON")
+    assert c['household_id'] == 'c' and c['error'] is None
+
+
+def test_undecodable_csv_field_is_reported_with_its_row_number(tmp_path):
+    path = tmp_path / 'households.csv'
+    path.write_text('household_id,paycheck,accounts\na,3000,"[]"\nb,3000,"[oops"\n')
+
+    a, b = results(read_households(str(path)))
+    assert a['error'] is None
+    assert b['error'].startswith("ValueError: Row 2: can't read accounts")
+
+
+def test_bad_record_contents_are_reported():
+    a, b = results([dict(HOUSEHOLD, household_id='a', debts=[{'name': 'Card'}]), dict(HOUSEHOLD, household_id='b')])
+    assert a['error'].startswith('KeyError')
+    assert b['error'] is None
@@ -0,0 +1,47 @@
+# Individuals keeps its accounts, debts, assets and goals as columnar tables; the cards and forms still read
+# and write rows in the old tuple and dict shapes.
+# Run from the repository root: python -m pytest tests
+from finance.cache import content_hash
+from finance.models import AccountTable, GoalTable, HouseholdTables, plain_responses, tabulate_responses
+
+RESPONSES = {
+    'accounts': [('HYSA', 'HYSA', 4.0, 1000.0), ('Invest', 'Invested', 7.0, 5000.0)],
+    'allocations': {'HYSA': 50.0, 'Invest': 50.0},
+    'goals': [{'name': 'Car', 'cost': 20000.0, 'target_year': 2030, 'account': 'HYSA'}],
+    'debts': [{'name': 'Card', 'amount': 5000.0, 'rate': 19.0, 'monthly_payment': 200.0}],
+    'assets': [],
+    'paycheck': 4000.0,
+}
+
+
+def test_rows_come_back_in_the_stored_shapes():
+    responses = tabulate_responses(RESPONSES)
+
+    assert isinstance(responses['accounts'], AccountTable)
+    assert responses['accounts'][1] == ('Invest', 'Invested', 7.0, 5000.0)
+    assert responses['goals'][0] == RESPONSES['goals'][0]
+    assert isinstance(responses['goals'][0]['target_year'], int)
+    assert list(responses['debts']) == RESPONSES['debts']
+    assert plain_responses(responses) == RESPONSES
+    # Equal content hashes, so memoized results and saved scenario results still match
+    assert content_hash(responses) == content_hash(RESPONSES)
+
+
+def test_rows_can_be_replaced_deleted_and_renamed():
+    goals = GoalTable.from_records(RESPONSES['goals'] * 3)
+    goals[1] = {'name': 'Trip', 'cost': 500.0, 'target_year': 2027, 'account': 'Invest'}
+    del goals[0]
+    goals.replace('account', 'HYSA', 'Savings')
+
+    assert [goal['name'] for goal in goals] == ['Trip', 'Car']
+    assert goals['account'] == ['Invest', 'Savings']
+    assert goals['cost'].tolist() == [500.0, 20000.0]
+    assert goals[-1]['target_year'] == 2030
+
+
+def test_household_tables_use_the_session_tables():
+    responses = tabulate_responses(RESPONSES)
+    tables = HouseholdTables.from_responses(responses)
+
+    assert tables.accounts is responses['accounts']
+    assert tables.allocations.tolist() == [50.0, 50.0]
@@ -0,0 +1,51 @@
+# Monte Carlo goal probabilities follow the dashboard's funding rules: goals sharing an account queue for its
+# money, and a goal's cost leaves the account once it's paid out.
+# Run from the repository root: python -m pytest tests
+import pytest
+
+from finance.household import compute_dashboard
+from finance.montecarlo import simulate_responses
+
+RESPONSES = {
+    'accounts': [('HYSA', 'HYSA', 0.0, 10000.0), ('Invest', 'Invested', 6.0, 20000.0)],
+    'allocations': {'HYSA': 50.0, 'Invest': 50.0},
+    'goals': [{'name': 'Car', 'cost': 8000.0, 'target_year': 2028, 'account': 'HYSA'},
+              {'name': 'Roof', 'cost': 8000.0, 'target_year': 2027, 'account': 'HYSA'},
+              {'name': 'Trip', 'cost': 6000.0, 'target_year': 2030, 'account': 'Invest'},
+              {'name': 'Boat', 'cost': 1000.0, 'target_year': 2030, 'account': 'Missing'}],
+    'debts': [],
+    'assets': [],
+    'paycheck': 3000.0,
+    'total_expenses': 2900.0,
+    'total_debt_payments': 0.0,
+    'remaining_funds': 100.0,
+}
+
+
+@pytest.mark.parametrize('order, chances', [
+    # Roof is due first and takes the money; Car only gets there years later
+    ('target_date', [0.0, 1.0, 1.0, None]),
+    # Car was added first, so Roof waits behind it and misses its year
+    ('priority', [1.0, 0.0, 1.0, None]),
+])
+def test_goals_sharing_an_account_split_it(order, chances):
+    volatility = {'HYSA': 0.0, 'Invested': 0.0}
+    simulation = simulate_responses(RESPONSES, 2026, 2030, volatility, order=order)
+    assert simulation.goal_probabilities == chances
+
+    # With no volatility every path is the dashboard's projection
+    dashboard = compute_dashboard(RESPONSES, 2030, 2026, goal_order=order)
+    on_track = [year is not None and year <= goal['target_year']
+                for year, goal in zip(dashboard.funding.withdrawal_years(), RESPONSES['goals'])]
+    assert on_track[:3] == [chance == 1.0 for chance in chances[:3]]
+    for name, (low, median, high) in simulation.account_percentiles(2030).items():
+        assert low == pytest.approx(dashboard.account_balances[name]) == high
+
+
+def test_volatile_balances_are_after_payouts():
+    simulation = simulate_responses(RESPONSES, 2026, 2030, {'HYSA': 0.0, 'Invested': 15.0})
+    trip_chance = simulation.goal_probabilities[2]
+    assert 0.9 < trip_chance <= 1.0
+    # Trip's cost has left the account on most paths by 2031
+    _, median, _ = simulation.account_percentiles(2030)['Invest']
+    assert median < 20000 * 1.06 ** 4
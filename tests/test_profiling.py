@@ -0,0 +1,53 @@
+# The rolling rerun history is kept per session: one session's panel shows and clears only its own reruns.
+# Run from the repository root: python -m pytest tests
+import pytest
+
+import profiling
+
+
+@pytest.fixture(autouse=True)
+def empty_history():
+    profiling._histories.clear()
+    yield
+    profiling._histories.clear()
+
+
+def rerun(app, session_id):
+    profiling.start_rerun(app, session_id)
+    with profiling.section('work'):
+        pass
+    return profiling.finish_rerun()
+
+
+def test_history_is_per_session():
+    rerun('current_you', 'a')
+    rerun('current_you', 'a')
+    rerun('future_you', 'a')
+    rerun('current_you', 'b')
+
+    assert len(profiling.history('a')) == 3
+    assert len(profiling.history('a', 'current_you')) == 2
+    assert [profile.session_id for profile in profiling.history('b')] == ['b']
+    assert profiling.history('c') == []
+
+
+def test_clearing_one_session_keeps_the_others():
+    rerun('current_you', 'a')
+    rerun('current_you', 'b')
+
+    profiling.clear_history('a')
+    assert profiling.history('a') == []
+    assert len(profiling.history('b')) == 1
+
+
+def test_history_is_bounded(monkeypatch):
+    monkeypatch.setattr(profiling, 'HISTORY_LENGTH', 3)
+    monkeypatch.setattr(profiling, 'MAX_SESSIONS', 2)
+    for _ in range(5):
+        rerun('current_you', 'a')
+    rerun('current_you', 'b')
+    rerun('current_you', 'c')
+
+    assert profiling.history('a') == []
+    assert len(profiling.history('b')) == 1
+    assert len(profiling.history('c')) == 1
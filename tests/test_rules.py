@@ -0,0 +1,73 @@
+# Categorizing transactions with keyword rules: the first matching rule wins, keywords match whole words, and the
+# per-rule statistics add up what each rule caught.
+# Run from the repository root: python -m pytest tests
+from finance.rules import NO_MATCH, RuleEngine, parse_rules
+from finance.statements import FIXED_CATEGORIES, split_fixed_variable
+
+RULES = (
+    (None, ('payment thank you',)),
+    ('Dining Out', ('uber eats', 'coffee')),
+    ('Transportation', ('uber', 'esso')),
+    ('Housing', ('rent', 'hoa ')),
+    ('Utilities', ('at&t', 'electric')),
+)
+
+
+def test_first_matching_rule_wins():
+    engine = RuleEngine(RULES)
+
+    assert engine.category('UBER EATS TORONTO') == 'Dining Out'
+    assert engine.category('UBER TRIP') == 'Transportation'
+    # Both rules match; the earlier one wins wherever its keyword appears
+    assert engine.category('ESSO STATION COFFEE') == 'Dining Out'
+    assert engine.category('PAYMENT THANK YOU', default='?') is None
+    assert engine.category('CORNER STORE', default='?') == '?'
+    assert engine.match('CORNER STORE') == NO_MATCH
+
+
+def test_keywords_match_whole_words():
+    engine = RuleEngine(RULES)
+
+    assert engine.category('RENT PAYMENT') == 'Housing'
+    assert engine.category('HOA FEES') == 'Housing'
+    assert engine.category('AT&T*BILL') == 'Utilities'
+    assert engine.category('CURRENT ELECTRIC') == 'Utilities'
+    assert engine.category('PARENT TEACHER ASSN') is None
+    assert engine.category('TORRENT SITE') is None
+    assert engine.category('ESPRESSO HOUSE') is None
+    assert engine.category('UBEREATS') is None
+    # A longer keyword only stands in for its prefix where the prefix is a word of its own
+    assert RuleEngine((('A', ('uber',)), ('B', ('ubereats',)))).category('UBEREATS') == 'B'
+
+    substring = RuleEngine(RULES, whole_word=False)
+    assert substring.category('TORRENT SITE') == 'Housing'
+    assert substring.category('ESPRESSO HOUSE') == 'Transportation'
+
+
+def test_statistics_count_matches_per_rule():
+    engine = RuleEngine(parse_rules("coffee: Dining Out\nrent: Housing\n\nesso: Transportation"))
+    descriptions = ['RENT', 'COFFEE', 'RENT', 'PARKING', 'RENT']
+    rule_ids = engine.classify(descriptions)
+
+    assert rule_ids.tolist() == [1, 0, 1, NO_MATCH, 1]
+    counts, totals = engine.match_counts(rule_ids, [1500.0, 5.0, 1500.0, 20.0, 1500.0])
+    assert engine.statistics(counts, totals) == [
+        {'keyword': 'rent', 'category': 'Housing', 'matches': 3, 'amount': 4500.0},
+        {'keyword': 'coffee', 'category': 'Dining Out', 'matches': 1, 'amount': 5.0},
+        {'keyword': None, 'category': None, 'matches': 1, 'amount': 20.0},
+    ]
+
+
+def test_categories_map_to_fixed_and_variable_expenses():
+    engine = RuleEngine(RULES)
+    averages = {}
+    for description, amount in (('RENT', 1500.0), ('AT&T', 80.0), ('UBER EATS', 45.0), ('ESSO', 60.0)):
+        category = engine.category(description)
+        averages[category] = averages.get(category, 0.0) + amount
+
+    fixed, variable = split_fixed_variable(averages, fixed_categories=FIXED_CATEGORIES)
+    assert fixed == {'Housing': 1500.0, 'Utilities': 80.0, 'Transportation': 60.0}
+    assert variable == {'Dining Out': 45.0}
+    # The user's own choice of fixed or variable beats the default
+    fixed, variable = split_fixed_variable(averages, variable_expenses={'Transportation'})
+    assert 'Transportation' in variable
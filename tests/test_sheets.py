@@ -0,0 +1,104 @@
+# SheetSync against the in-memory FakeSheetsBackend: batching, coalescing per key, retries and giving up.
+# Run from the repository root: python -m pytest tests
+import pytest
+
+from finance.sheets import FakeSheetsBackend, SheetSync
+
+HEADER = ['Key', 'Value']
+
+
+# Function to build a sync that only writes when flush() is called: the background thread waits a minute
+@pytest.fixture
+def make_sync():
+    syncs = []
+
+    def make(backend, **options):
+        sync = SheetSync(backend, header=HEADER, flush_interval=60, backoff=0, **options)
+        syncs.append(sync)
+        return sync
+
+    yield make
+    for sync in syncs:
+        sync.close(timeout=1)
+
+
+def test_rows_are_coalesced_per_key_and_written_in_one_batch(make_sync):
+    backend = FakeSheetsBackend()
+    sync = make_sync(backend)
+    sync.submit('a', ['a', 1])
+    sync.submit('b', ['b', 1])
+    sync.submit('a', ['a', 2])
+
+    assert sync.flush() == 2
+    assert len(backend.calls) == 1
+    assert backend.rows() == [HEADER, ['b', 1], ['a', 2]]
+    assert sync.stats()['coalesced'] == 1
+
+    # A later row for a key overwrites that key's sheet row
+    sync.submit('b', ['b', 3])
+    sync.flush()
+    assert backend.rows() == [HEADER, ['b', 3], ['a', 2]]
+
+
+def test_large_queues_are_split_into_batches(make_sync):
+    backend = FakeSheetsBackend()
+    sync = make_sync(backend, max_batch=2)
+    for key in 'abcde':
+        sync.submit(key, [key, 0])
+
+    assert sync.flush() == 5
+    assert len(backend.calls) == 3
+    assert [row[0] for row in backend.rows()] == ['Key', 'a', 'b', 'c', 'd', 'e']
+
+
+def test_retryable_errors_are_retried(make_sync):
+    backend = FakeSheetsBackend(fail_next=2)
+    sync = make_sync(backend, max_retries=3)
+    sync.submit('a', ['a', 1])
+
+    assert sync.flush() == 1
+    stats = sync.stats()
+    assert stats['retries'] == 2
+    assert stats['failed_batches'] == 0
+    assert backend.rows() == [HEADER, ['a', 1]]
+
+
+def test_retryable_failures_are_requeued_a_limited_number_of_times(make_sync):
+    backend = FakeSheetsBackend(fail_next=100)
+    sync = make_sync(backend, max_retries=0, max_requeues=2)
+    sync.submit('a', ['a', 1])
+
+    for _ in range(2):
+        assert sync.flush() == 0
+        assert sync.pending() == 1
+    assert sync.flush() == 0
+    assert sync.pending() == 0
+    assert [(key, values) for key, values, _ in sync.failed()] == [('a', ['a', 1])]
+    assert sync.stats()['failed_rows'] == 1
+
+
+def test_non_retryable_errors_drop_the_rows(make_sync):
+    backend = FakeSheetsBackend(fail_next=1, error=ValueError)
+    sync = make_sync(backend, max_retries=5)
+    sync.submit('a', ['a', 1])
+
+    assert sync.flush() == 0
+    stats = sync.stats()
+    assert stats['retries'] == 0
+    assert stats['pending'] == 0
+    assert stats['failed'] == 1
+    assert 'ValueError' in sync.failed()[0][2]
+    # Nothing is left to retry on the next flush
+    assert sync.flush() == 0
+    assert backend.calls == []
+
+
+def test_failed_list_is_bounded(make_sync):
+    backend = FakeSheetsBackend(fail_next=100, error=ValueError)
+    sync = make_sync(backend, max_failed=3)
+    for key in 'abcde':
+        sync.submit(key, [key, 0])
+
+    sync.flush()
+    assert [key for key, _, _ in sync.failed()] == ['c', 'd', 'e']
+    assert sync.stats()['failed_rows'] == 5
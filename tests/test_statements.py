@@ -0,0 +1,72 @@
+# Picking a statement's date format: once per file, from its first dates, never switching part way through; and
+# the default category rules, which match whole words only.
+# Run from the repository root: python -m pytest tests
+import io
+from datetime import datetime
+
+import pytest
+
+from finance.statements import UNCATEGORIZED, MonthParser, categorize, import_statement, month_number
+
+
+def statement(rows):
+    return io.BytesIO(("Date,Description,Amount\n" + "\n".join(rows)).encode('utf-8'))
+
+
+def test_day_first_file_is_read_day_first_throughout():
+    # The early dates could be either order; the 20th of each month settles it for the whole file
+    rows = []
+    for month in (1, 2, 3):
+        rows += [f"01/{month:02d}/2025,RENT,-1500", f"05/{month:02d}/2025,SAFEWAY,-60", f"20/{month:02d}/2025,SAFEWAY,-40"]
+    history = import_statement(statement(rows), 'statement.csv')
+
+    assert history.recent_window() == 'Jan 2025 - Mar 2025'
+    assert history.recent_average() == {'Housing': 1500.0, 'Groceries': 100.0}
+
+
+def test_ambiguous_dates_need_the_date_order():
+    rows = [f"0{day}/0{month}/2025,RENT,-1500" for month in (1, 2, 3) for day in (1, 5)]
+    with pytest.raises(ValueError, match='day/month or month/day'):
+        import_statement(statement(rows), 'statement.csv')
+
+    assert import_statement(statement(rows), 'statement.csv', day_first=True).recent_window() == 'Jan 2025 - Mar 2025'
+    assert import_statement(statement(rows), 'statement.csv', day_first=False).recent_window() == 'Mar 2025 - May 2025'
+
+
+def test_formats_putting_dates_in_the_future_lose():
+    parser = MonthParser(today=datetime(2026, 10, 16))
+    # As mm/dd, 11/10/2026 would be November 2026
+    assert parser.detect(['11/10/2026', '03/04/2026']) == '%d/%m/%Y'
+    assert parser('03/04/2026') == month_number(2026, 4)
+
+
+def test_a_later_date_in_another_format_is_an_error():
+    rows = ["13/01/2025,RENT,-1500", "13/02/2025,RENT,-1500", "2025-03-13,RENT,-1500"]
+    with pytest.raises(ValueError, match="'2025-03-13'"):
+        import_statement(statement(rows), 'statement.csv', chunk_rows=2)
+
+
+@pytest.mark.parametrize('description, category', [
+    ('CURRENT ELECTRIC CO', 'Utilities'),
+    ('PARENT TEACHER ASSN', UNCATEGORIZED),
+    ('TORRENT BOOKS', UNCATEGORIZED),
+    ('ESPRESSO HOUSE', UNCATEGORIZED),
+    ('WATERLOO PIZZA', 'Dining Out'),
+    ('RENT PAYMENT', 'Housing'),
+    ('HOA FEES', 'Housing'),
+    ('ESSO 1234', 'Transportation'),
+    ('PETRO-CANADA 55', 'Transportation'),
+    ('UBER EATS', 'Dining Out'),
+    ("MCDONALD'S #40", 'Dining Out'),
+    ('AMAZON.CA', 'Shopping'),
+])
+def test_default_rules_only_match_whole_words(description, category):
+    assert categorize(description) == category
+
+
+def test_imported_spending_isnt_put_in_housing_by_part_of_a_word():
+    rows = [f"2025-0{month}-02,CURRENT ELECTRIC,-90" for month in (1, 2, 3)]
+    rows += [f"2025-0{month}-03,ESPRESSO HOUSE,-12" for month in (1, 2, 3)]
+    history = import_statement(statement(rows), 'statement.csv')
+
+    assert history.recent_average() == {'Utilities': 90.0, UNCATEGORIZED: 12.0}